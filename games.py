@@ -1,57 +1,190 @@
 import json, asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
+from urllib.parse import urlparse
 from tqdm.asyncio import tqdm
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 BASE = "https://www.crazygames.com"
 TARGET = 50      # 想抓多少条
 OUT = Path("crazygames_top50.json")
 
+CONCURRENCY = 8          # 同时打开的页面数（并发上限）
+PAGES_PER_CONTEXT = 4    # 每个隔离上下文里最多开几个页面
+RECYCLE_AFTER = 200      # 上下文处理多少个游戏后关闭重建，释放累积的内存
+BLOCKED_TYPES = {"image", "font", "media"}
+AD_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "google-analytics.com", "googletagmanager.com", "imasdk.googleapis.com", "amazon-adsystem.com",
+)
+STALL_TIMEOUT = 4000     # 滚动后等待新卡片出现的最长时间（毫秒）
+MAX_STALLS = 3           # 连续几次没有新卡片就认为到底了
+
+# 在页面里取出上一轮之后新出现的游戏链接并滚到底部，返回新链接
+COLLECT_JS = """() => {
+  const seen = window.__collectedLinks || (window.__collectedLinks = new WeakSet());
+  const anchors = document.querySelectorAll('a[href^="/game/"]');
+  const fresh = [];
+  for (const a of anchors) {
+    if (!seen.has(a)) {
+      seen.add(a);
+      fresh.push(a.getAttribute('href'));
+    }
+  }
+  window.scrollTo(0, document.body.scrollHeight);
+  return fresh;
+}"""
+# 出现了还没取过的链接（列表做了虚拟化、旧卡片被移除时也成立）
+MORE_CARDS_JS = """() => Array.from(document.querySelectorAll('a[href^="/game/"]'))
+  .some(a => !window.__collectedLinks.has(a))"""
+
+async def block_heavy(route):
+    """拦截图片、字体、媒体和广告请求，只加载文档和脚本"""
+    request = route.request
+    host = urlparse(request.url).hostname or ""
+    if request.resource_type in BLOCKED_TYPES or host.endswith(AD_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+class PagePool:
+    """一个浏览器 + 有限个隔离上下文，页面在游戏之间复用
+
+    信号量限制同时使用的页面数；上下文处理 RECYCLE_AFTER 个游戏后关闭重建，内存不随 TARGET 增长
+    """
+
+    def __init__(self, browser, size=CONCURRENCY, pages_per_context=PAGES_PER_CONTEXT,
+                 recycle_after=RECYCLE_AFTER):
+        self.browser = browser
+        self.semaphore = asyncio.Semaphore(size)
+        self.pages_per_context = pages_per_context
+        self.recycle_after = recycle_after
+        self.context = None    # 正在分配新页面的上下文
+        self.idle = []         # 空闲页面
+        self.open_pages = {}   # 上下文 -> 打开的页面数
+        self.uses = {}         # 上下文 -> 已处理的游戏数
+        self.lock = asyncio.Lock()   # 选择/创建上下文并占用名额的过程不能被其他借出者打断
+
+    async def _new_page(self):
+        # 在锁内占好名额再创建页面：并发借出时每个上下文不超过 pages_per_context，也不会重复创建上下文
+        async with self.lock:
+            if self.context is None or self.open_pages[self.context] >= self.pages_per_context:
+                context = await self.browser.new_context()
+                try:
+                    await context.route("**/*", block_heavy)
+                except Exception:
+                    await context.close()
+                    raise
+                self.open_pages[context] = 0
+                self.uses[context] = 0
+                self.context = context
+            context = self.context
+            self.open_pages[context] += 1
+        try:
+            return await context.new_page()
+        except Exception:
+            await self._free_slot(context)
+            raise
+
+    async def _free_slot(self, context):
+        """页面关闭后归还名额；上下文已不再分配新页面且没有页面时一并关闭"""
+        self.open_pages[context] -= 1
+        if not self.open_pages[context] and context is not self.context:
+            del self.open_pages[context], self.uses[context]
+            await context.close()
+
+    async def _release(self, page, ok):
+        context = page.context
+        self.uses[context] += 1
+        if ok and not page.is_closed() and self.uses[context] < self.recycle_after:
+            self.idle.append(page)
+            return
+        # 出错的页面直接关掉；上下文用满后不再分配新页面，最后一个页面关闭时一并关闭
+        if self.uses[context] >= self.recycle_after and context is self.context:
+            self.context = None
+        if not page.is_closed():
+            await page.close()
+        await self._free_slot(context)
+
+    @asynccontextmanager
+    async def page(self):
+        """借出一个页面，用完归还；池满时等待"""
+        async with self.semaphore:
+            page = self.idle.pop() if self.idle else await self._new_page()
+            ok = False
+            try:
+                yield page
+                ok = True
+            finally:
+                await self._release(page, ok)
+
+    async def close(self):
+        for context in list(self.open_pages):
+            await context.close()
+        self.idle.clear()
+        self.open_pages.clear()
+        self.uses.clear()
+        self.context = None
+
 async def collect_links(page, limit):
-    """滚动页面直到收集到足够的 /game/ 链接"""
-    links = set()
-    while len(links) < limit:
-        # 抓取新出现的卡片
-        for a in await page.query_selector_all('a[href^="/game/"]'):
-            href = await a.get_attribute("href")
-            if href:
-                links.add(BASE + href.split("#", 1)[0])
-        await page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
-        await page.wait_for_timeout(1200)
+    """滚动页面直到收集到足够的 /game/ 链接，或者确认已经滚到底
+
+    每轮只用一次 evaluate 取出上一轮之后新出现的链接并滚到底部，然后等待新卡片出现，不再固定等待
+    """
+    links = {}   # 保持首页上的先后顺序
+    stalls = 0
+    while True:
+        before = len(links)
+        for href in await page.evaluate(COLLECT_JS):
+            links.setdefault(BASE + href.split("#", 1)[0], None)
+        if len(links) >= limit:
+            break
+        # 连续 MAX_STALLS 轮没有新链接就是到底了（卡片重新渲染出的重复链接不算）
+        stalls = 0 if len(links) > before else stalls + 1
+        if stalls >= MAX_STALLS:
+            print(f" 首页没有更多游戏了，共收集到 {len(links)} 个链接")
+            break
+        try:
+            await page.wait_for_function(MORE_CARDS_JS, timeout=STALL_TIMEOUT)
+        except PlaywrightTimeoutError:
+            # 没有新卡片：往回滚一屏，下一轮再滚到底重新触发加载
+            await page.evaluate("window.scrollBy(0, -window.innerHeight)")
     return list(links)[:limit]
 
-async def scrape_game(playwright, url):
-    """进入详情页抓取信息"""
-    browser = playwright.chromium
-    context = await browser.launch_persistent_context(user_data_dir="/tmp/playwright", headless=True)
-    page = await context.new_page()
+async def scrape_game(pool, url):
+    """进入详情页抓取信息（使用页面池中的页面）"""
     try:
-        await page.goto(url, timeout=60000)
-        await page.wait_for_selector("h1", timeout=10000)
-        name = await page.locator("h1").inner_text()
-        desc = await page.locator('meta[name="description"]').get_attribute("content") or ""
-        feats = []
-        if await page.locator("h2:text-is('Features'), h2:has-text('Features')").count():
-            items = page.locator("h2:text-is('Features') + ul li, h2:has-text('Features') + ul li")
-            feats = [await items.nth(i).inner_text() for i in range(await items.count())]
-        return {"url": url, "name": name.strip(), "description": desc.strip(), "features": feats}
-    finally:
-        await context.close()
+        async with pool.page() as page:
+            await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            await page.wait_for_selector("h1", timeout=10000)
+            name = await page.locator("h1").first.inner_text()
+            desc = await page.locator('meta[name="description"]').get_attribute("content") or ""
+            feats = []
+            if await page.locator("h2:text-is('Features'), h2:has-text('Features')").count():
+                items = page.locator("h2:text-is('Features') + ul li, h2:has-text('Features') + ul li")
+                feats = [await items.nth(i).inner_text() for i in range(await items.count())]
+            return {"url": url, "name": name.strip(), "description": desc.strip(), "features": feats}
+    except Exception as e:
+        tqdm.write(f" 抓取失败 {url}: {e}")
+        return None
 
 async def main():
     async with async_playwright() as p:
-        # 先滚动首页拿链接
         browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(BASE, timeout=60000)
-        await page.wait_for_load_state("networkidle")
-        links = await collect_links(page, TARGET)
-        await page.close()
-        await browser.close()
-
-        # 再并发抓取详情
-        tasks = [scrape_game(p, link) for link in links]
-        data = [d for d in await tqdm.gather(*tasks) if d]
+        pool = PagePool(browser)
+        try:
+            # 先滚动首页拿链接
+            async with pool.page() as page:
+                await page.goto(BASE, timeout=60000)
+                await page.wait_for_load_state("networkidle")
+                links = await collect_links(page, TARGET)
+
+            # 再并发抓取详情，同时打开的页面不超过 CONCURRENCY 个
+            tasks = [scrape_game(pool, link) for link in links]
+            data = [d for d in await tqdm.gather(*tasks) if d]
+        finally:
+            await pool.close()
+            await browser.close()
 
         OUT.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
         print(f" 已保存 {len(data)} 条记录 -> {OUT.resolve()}")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步详情页爬虫：基于asyncio + aiohttp的第二步爬虫引擎
+共享连接池驱动大量并发请求，按主机限制并发数，限速等待不阻塞线程
+"""
+
+import asyncio
+import json
+import logging
+import queue
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:  # 可选依赖，仅异步引擎需要
+    aiohttp = None
+
+import requests
+
+from html_parsers import HtmlParserBackend
+from http_cache import HttpCache
+from rate_limiter import RateLimiter
+from scraper_config import DEFAULT_BASE_URL
+from step2_detail_scraper import DetailScraper, DetailedGameInfo, parse_game_page
+
+logger = logging.getLogger(__name__)
+
+class AsyncDetailScraper(DetailScraper):
+    """异步详情页爬虫类，输出与 DetailScraper 完全相同的 DetailedGameInfo"""
+
+    def __init__(self, max_concurrency: int = 200, per_host_limit: int = 8,
+                 cache: Optional[HttpCache] = None, parser: Optional[HtmlParserBackend] = None,
+                 limiter: Optional[RateLimiter] = None, parse_processes: int = 0,
+                 base_url: str = DEFAULT_BASE_URL):
+        super().__init__(max_workers=max_concurrency, cache=cache, parser=parser, limiter=limiter,
+                         parse_processes=parse_processes, base_url=base_url)
+        if aiohttp is None:
+            raise ImportError("异步引擎需要 aiohttp，请先执行: pip install aiohttp")
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def scrape_game_details(self, game_urls: List[str],
+                            on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+                            on_failure: Optional[Callable[[str, str], None]] = None) -> List[DetailedGameInfo]:
+        """同步入口，供 run_scraper.py 直接替换线程池引擎"""
+        with self._parse_stage():
+            return asyncio.run(self.scrape_game_details_async(game_urls, on_result, on_failure))
+
+    async def scrape_game_details_async(self, game_urls: List[str],
+                                        on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+                                        on_failure: Optional[Callable[[str, str], None]] = None
+                                        ) -> List[DetailedGameInfo]:
+        """异步并发爬取多个游戏的详细信息，指定 on_result 时结果不保存在返回列表中"""
+        logger.info(f"开始异步爬取 {len(game_urls)} 个游戏的详细信息 "
+                    f"(总并发 {self.max_concurrency}, 单主机并发 {self.per_host_limit})")
+
+        self._host_semaphores = {}
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                         limit_per_host=self.per_host_limit)
+        timeout = aiohttp.ClientTimeout(total=self.limiter.timeout)
+        headers = dict(self.session.headers)
+
+        detailed_games = []
+        success_count = 0
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers=headers) as session:
+            tasks = [
+                asyncio.create_task(self._scrape_single_game_async(session, url))
+                for url in game_urls
+            ]
+
+            # 按完成顺序处理结果
+            for task in asyncio.as_completed(tasks):
+                if self._report(*await task, detailed_games, on_result, on_failure):
+                    success_count += 1
+
+        logger.info(f"异步详情页爬取完成，共获取 {success_count} 个游戏的详细信息")
+        self.limiter.log_stats()
+        if self.cache:
+            self.cache.log_stats()
+        return detailed_games
+
+    def scrape_game_details_from_queue(self, url_queue: queue.Queue,
+                                       on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+                                       on_failure: Optional[Callable[[str, str], None]] = None
+                                       ) -> List[DetailedGameInfo]:
+        """流水线模式的同步入口"""
+        with self._parse_stage():
+            return asyncio.run(self.scrape_game_details_from_queue_async(url_queue, on_result, on_failure))
+
+    async def scrape_game_details_from_queue_async(self, url_queue: queue.Queue,
+                                                   on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+                                                   on_failure: Optional[Callable[[str, str], None]] = None
+                                                   ) -> List[DetailedGameInfo]:
+        """流水线模式：持续从线程队列取URL并发爬取，取到 None 结束标记后等待剩余请求完成
+
+        同时进行的请求数不超过 max_concurrency，达到上限时暂停取URL，背压传回第一步
+        """
+        logger.info(f"开始从队列异步爬取游戏详细信息 "
+                    f"(总并发 {self.max_concurrency}, 单主机并发 {self.per_host_limit})")
+
+        self._host_semaphores = {}
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                         limit_per_host=self.per_host_limit)
+        timeout = aiohttp.ClientTimeout(total=self.limiter.timeout)
+        headers = dict(self.session.headers)
+        loop = asyncio.get_running_loop()
+
+        detailed_games = []
+        success_count = 0
+        results: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.max_concurrency)
+        running = set()
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers=headers) as session:
+            async def scrape(url: str):
+                try:
+                    await results.put(await self._scrape_single_game_async(session, url))
+                finally:
+                    slots.release()
+
+            async def feed():
+                while True:
+                    # 阻塞的 queue.get 放到线程池执行，不阻塞事件循环
+                    url = await loop.run_in_executor(None, url_queue.get)
+                    if url is None:
+                        break
+                    await slots.acquire()
+                    task = asyncio.create_task(scrape(url))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                if running:
+                    await asyncio.gather(*running)
+                await results.put(None)
+
+            feeder = asyncio.create_task(feed())
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                if self._report(*item, detailed_games, on_result, on_failure):
+                    success_count += 1
+            await feeder
+
+        logger.info(f"异步详情页爬取完成，共获取 {success_count} 个游戏的详细信息")
+        self.limiter.log_stats()
+        if self.cache:
+            self.cache.log_stats()
+        return detailed_games
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """获取URL所属主机的并发信号量"""
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _scrape_single_game_async(self, session, url: str):
+        """异步爬取单个游戏，返回 (url, 游戏信息, 错误)"""
+        try:
+            content = await self._fetch_async(session, url)
+            loop = asyncio.get_running_loop()
+            if self._parse_pool:
+                # 解析放到进程池，不占用事件循环线程
+                game_info, parse_path, seconds = await loop.run_in_executor(
+                    self._parse_pool, parse_game_page, content, url)
+                self._record_parse(parse_path, seconds)
+                return url, game_info, None
+            # 没有进程池时在默认线程池中解析，事件循环继续调度其他请求
+            return url, await loop.run_in_executor(None, self._parse_game_page, content, url), None
+
+        except Exception as e:
+            return url, None, e
+
+    async def _fetch_async(self, session, url: str) -> bytes:
+        """异步请求页面，启用缓存时走条件请求
+
+        缓存的 SQLite 读写（lookup/touch/refresh/store）是同步的磁盘I/O，放到默认线程池中执行，不阻塞事件循环
+        """
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self.cache.lookup, url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            self.cache.record('hit')
+            await loop.run_in_executor(None, self.cache.touch, entry)
+            return entry.body
+
+        async with self._host_semaphore(url):
+            # 令牌桶限速 + 429/5xx 退避重试，等待时只挂起当前协程
+            headers = self.cache.conditional_headers(entry) if self.cache else None
+            status, response_headers, body, charset = await self.limiter.fetch_async(session, url, headers,
+                                                                                      stage=self.stage)
+
+        if entry and status == 304:
+            self.cache.record('revalidated')
+            return (await loop.run_in_executor(None, self.cache.refresh, entry)).body
+
+        if status == 304:
+            # 没有缓存条目却收到304：不能把空正文当作有效响应，去掉条件请求头重新获取
+            async with self._host_semaphore(url):
+                status, response_headers, body, charset = await self.limiter.fetch_async(session, url, None,
+                                                                                          stage=self.stage)
+
+        if status >= 400 or status == 304:
+            raise requests.HTTPError(f"{status} Error for url: {url}")
+
+        if self.cache:
+            self.cache.record('miss')
+            await loop.run_in_executor(None, self.cache.store, url, body, charset, response_headers)
+        return body
+
+def main():
+    """主函数"""
+    try:
+        with open('step1_homepage_games.json', 'r', encoding='utf-8') as f:
+            step1_data = json.load(f)
+
+        game_urls = [game['url'] for game in step1_data.get('games', [])]
+        logger.info(f"从第一步结果中读取到 {len(game_urls)} 个游戏URL")
+
+    except FileNotFoundError:
+        logger.error("未找到第一步的结果文件 step1_homepage_games.json")
+        return
+    except Exception as e:
+        logger.error(f"读取第一步结果时出错: {e}")
+        return
+
+    scraper = AsyncDetailScraper()
+    detailed_games = scraper.scrape_game_details(game_urls)
+
+    if detailed_games:
+        scraper.save_to_json(detailed_games)
+        logger.info(f"✅ 异步第二步爬取完成！共获取 {len(detailed_games)} 个游戏的详细信息")
+    else:
+        logger.error("❌ 异步第二步爬取失败，未获取到任何详细数据")
+
+if __name__ == "__main__":
+    main()
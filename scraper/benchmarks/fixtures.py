@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试语料：录制的页面（fixtures/）或根据已有爬取结果合成的页面
+合成的详情页与CrazyGames详情页结构一致：__NEXT_DATA__ 游戏JSON + 回退选择器使用的DOM
+合成的主页轮流使用几种卡片结构（图片在链接内、与链接同级、在卡片的其他子元素中），封面图URL都包含游戏slug
+"""
+
+import html
+import json
+import logging
+import random
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+SCRAPER_DIR = Path(__file__).resolve().parent.parent
+if str(SCRAPER_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRAPER_DIR))
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+INDEX_FILE = 'index.json'
+SYNTHETIC_HOMEPAGE = 'synthetic_homepage.html'
+
+@dataclass
+class Corpus:
+    """基准测试语料"""
+    homepages: List[Tuple[str, bytes]] = field(default_factory=list)       # (名称, HTML)
+    detail_pages: List[Tuple[str, bytes]] = field(default_factory=list)    # (URL, 带 __NEXT_DATA__ 的HTML)
+    fallback_pages: List[Tuple[str, bytes]] = field(default_factory=list)  # (URL, 不带 __NEXT_DATA__ 的HTML)
+    scraped_games: List[Dict[str, Any]] = field(default_factory=list)      # 第二步结果记录
+    source: str = ""
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "homepages": len(self.homepages),
+            "detail_pages": len(self.detail_pages),
+            "fallback_pages": len(self.fallback_pages),
+            "scraped_games": len(self.scraped_games),
+            "detail_bytes": sum(len(page) for _, page in self.detail_pages)
+        }
+
+def game_slug(url: str) -> str:
+    return url.rstrip('/').split('/game/')[-1].split('?')[0].split('#')[0]
+
+def next_data_game(game: Dict[str, Any]) -> Dict[str, Any]:
+    """把第二步记录还原为 props.pageProps.game 的结构（DetailScraper 提取逻辑的逆过程）"""
+    description = game.get('description', '')
+    first, _, rest = description.partition('. ')
+    return {
+        "name": game.get('title', ''),
+        "slug": game_slug(game.get('url', '')),
+        "desktopUrl": game.get('iframe_url', ''),
+        "descriptionFirst": f"<p>{html.escape(first)}{'.' if rest else ''}</p>",
+        "descriptionRest": f"<p>{html.escape(rest)}</p>" if rest else "",
+        "controls": "<ul>" + "".join(f"<li>{html.escape(item)}</li>"
+                                     for item in game.get('features', [])) + "</ul>",
+        "upvotes": game.get('likes', 0),
+        "downvotes": max(0, game.get('likes', 0) // 10),
+        "tags": [{"name": tag, "slug": tag.lower().replace(' ', '-')} for tag in game.get('tags', [])],
+        "category": {"name": game.get('category', ''), "slug": game.get('category', '').lower()}
+    }
+
+def _padding(seed: str, kilobytes: int) -> str:
+    """确定性的填充标记，使合成页面接近真实页面大小（导航、推荐游戏卡片、内联脚本）"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < kilobytes * 1024:
+        n = rng.randint(1, 99999)
+        part = (f'<div class="related-game"><a href="/game/related-{n}">'
+                f'<img src="https://imgs.crazygames.com/related-{n}/cover?width=273" alt="Related {n}">'
+                f'<span class="title">Related Game {n}</span></a></div>'
+                f'<script>window.__ad_{n}={{"slot":{n},"sizes":[[300,250],[728,90]]}};</script>')
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+def synthesize_detail_page(game: Dict[str, Any], next_data: bool = True, padding_kb: int = 64) -> bytes:
+    """合成一个详情页：包含回退选择器使用的DOM，next_data 为真时嵌入 __NEXT_DATA__"""
+    title = html.escape(game.get('title', ''))
+    description = html.escape(game.get('description', ''))
+    features = "".join(f"<li>{html.escape(item)}</li>" for item in game.get('features', []))
+    tags = "".join(f'<a class="tag" href="/t/{html.escape(tag.lower())}">{html.escape(tag)}</a>'
+                   for tag in game.get('tags', []))
+    next_data_script = ""
+    if next_data:
+        payload = {
+            "props": {"pageProps": {"game": next_data_game(game)}, "__N_SSP": True},
+            "page": "/game/[slug]",
+            "query": {"slug": game_slug(game.get('url', ''))},
+            "buildId": "benchmark"
+        }
+        next_data_script = ('<script id="__NEXT_DATA__" type="application/json">'
+                            + json.dumps(payload, ensure_ascii=False) + '</script>')
+
+    page = f"""<!DOCTYPE html>
+<html lang="en"><head>
+<meta charset="utf-8"><title>{title} - Play Online</title>
+<meta name="description" content="{description[:160]}">
+</head><body>
+<header class="game-header"><h1 class="game-title">{title}</h1></header>
+<main>
+<div class="game-container"><iframe id="game-iframe" src="{html.escape(game.get('iframe_url', ''))}"></iframe></div>
+<div class="game-stats"><span class="likes-count">{game.get('likes', 0)}</span>
+<span class="favorites-count">{game.get('favorites', 0)}</span>
+<span class="duration">{html.escape(game.get('duration', ''))}</span></div>
+<section class="game-info"><p class="game-description">{description}</p>
+<ul class="game-features">{features}</ul><div class="game-tags">{tags}</div></section>
+{_padding(game.get('url', ''), padding_kb)}
+</main>
+{next_data_script}
+</body></html>"""
+    return page.encode('utf-8')
+
+# 主页卡片结构：{slug} 为游戏slug，{cover} 为封面图URL，{title} 为标题
+HOMEPAGE_CARD_LAYOUTS = [
+    '<a class="game-link" href="/game/{slug}"><img src="{cover}" alt="{title}"><span>{title}</span></a>',
+    '<div class="game-card"><img src="{cover}" alt="{title}"><a href="/game/{slug}">{title}</a></div>',
+    '<li class="game-tile"><img data-src="{cover}"><p><a href="/game/{slug}">{title}</a></p></li>',
+    '<article class="game-card"><section><img src="{cover}"></section><h3><a href="/game/{slug}">{title}</a></h3></article>',
+]
+
+def homepage_cover(slug: str) -> str:
+    return f"https://imgs.crazygames.com/{slug}/cover.png?width=273"
+
+def synthesize_homepage(games: List[Dict[str, Any]]) -> bytes:
+    """合成一个主页：每个游戏一张卡片，轮流使用 HOMEPAGE_CARD_LAYOUTS 中的结构"""
+    cards = []
+    for i, game in enumerate(games):
+        slug = game_slug(game.get('url', ''))
+        layout = HOMEPAGE_CARD_LAYOUTS[i % len(HOMEPAGE_CARD_LAYOUTS)]
+        cards.append(layout.format(slug=html.escape(slug), cover=homepage_cover(slug),
+                                   title=html.escape(game.get('title', ''))))
+    page = f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Free Online Games</title></head><body>
+<main><div class="games-grid">
+{chr(10).join(cards)}
+</div></main>
+</body></html>"""
+    return page.encode('utf-8')
+
+def _load_scraped_games() -> List[Dict[str, Any]]:
+    from streaming_output import load_games
+
+    for name in ('step2_detailed_games.json', 'merged_scraped_data.json'):
+        path = SCRAPER_DIR / name
+        if path.exists():
+            games = [game for game in load_games(str(path)) if game.get('url')]
+            if games:
+                return games
+    return []
+
+def synthesize_corpus(padding_kb: int = 64, scale: int = 1) -> Corpus:
+    """根据仓库中已有的第二步结果和主页快照合成语料，scale 为复制倍数（URL加后缀区分）"""
+    base_games = _load_scraped_games()
+    games = []
+    for copy in range(scale):
+        for game in base_games:
+            game = dict(game)
+            if copy:
+                game['url'] = f"{game['url']}-{copy}"
+                game['title'] = f"{game['title']} {copy}"
+            games.append(game)
+
+    corpus = Corpus(source='synthetic', scraped_games=games)
+    homepage = SCRAPER_DIR / 'debug_homepage.html'
+    if homepage.exists():
+        corpus.homepages.append(('debug_homepage.html', homepage.read_bytes()))
+    if games:
+        corpus.homepages.append((SYNTHETIC_HOMEPAGE, synthesize_homepage(games)))
+    corpus.detail_pages = [(game['url'], synthesize_detail_page(game, True, padding_kb)) for game in games]
+    corpus.fallback_pages = [(game['url'], synthesize_detail_page(game, False, padding_kb)) for game in games]
+    return corpus
+
+def load_corpus(fixtures_dir: Path = FIXTURES_DIR, padding_kb: int = 64, scale: int = 1) -> Corpus:
+    """加载录制的语料；fixtures 目录没有录制页面时使用合成语料"""
+    index_path = Path(fixtures_dir) / INDEX_FILE
+    if not index_path.exists():
+        return synthesize_corpus(padding_kb=padding_kb, scale=scale)
+
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    corpus = Corpus(source=str(fixtures_dir))
+    for kind, target in (('homepage', corpus.homepages), ('detail', corpus.detail_pages),
+                         ('fallback', corpus.fallback_pages)):
+        for entry in index.get(kind, []):
+            target.append((entry['url'], (Path(fixtures_dir) / entry['file']).read_bytes()))
+    corpus.scraped_games = index.get('scraped_games') or _load_scraped_games()
+    return corpus
+
+def save_corpus(corpus: Corpus, fixtures_dir: Path = FIXTURES_DIR):
+    """把语料写入 fixtures 目录（每个页面一个文件 + index.json）"""
+    fixtures_dir = Path(fixtures_dir)
+    index: Dict[str, Any] = {"source": corpus.source, "scraped_games": corpus.scraped_games}
+    for kind, pages in (('homepage', corpus.homepages), ('detail', corpus.detail_pages),
+                        ('fallback', corpus.fallback_pages)):
+        (fixtures_dir / kind).mkdir(parents=True, exist_ok=True)
+        entries = []
+        for i, (url, content) in enumerate(pages):
+            file_name = f"{kind}/{i:05d}.html"
+            (fixtures_dir / file_name).write_bytes(content)
+            entries.append({"url": url, "file": file_name})
+        index[kind] = entries
+    with open(fixtures_dir / INDEX_FILE, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    logger.info(f"语料已保存到 {fixtures_dir}：{corpus.describe()}")
+
+def record_corpus(game_urls: List[str], include_homepage: bool = True) -> Corpus:
+    """从真实站点录制页面（经过共享限速器），用于之后的离线基准测试"""
+    from step1_homepage_scraper import HomepageScraper
+    from step2_detail_scraper import DetailScraper
+
+    corpus = Corpus(source='recorded')
+    if include_homepage:
+        homepage_scraper = HomepageScraper()
+        corpus.homepages.append((homepage_scraper.base_url,
+                                 homepage_scraper._fetch(homepage_scraper.base_url).encode('utf-8')))
+
+    detail_scraper = DetailScraper()
+    for url in game_urls:
+        try:
+            corpus.detail_pages.append((url, detail_scraper._fetch_content(url)))
+        except Exception as e:
+            logger.warning(f"录制 {url} 失败: {e}")
+    corpus.scraped_games = [record for record in _load_scraped_games()
+                            if record['url'] in set(game_urls)]
+    return corpus
+
+def main():
+    """命令行：录制真实页面或生成合成语料到 fixtures 目录"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='基准测试语料')
+    parser.add_argument('command', choices=['record', 'synthesize'],
+                        help='record: 录制第一步结果中的真实页面；synthesize: 生成合成语料')
+    parser.add_argument('--step1-file', default=str(SCRAPER_DIR / 'step1_homepage_games.json'))
+    parser.add_argument('--limit', type=int, default=50, help='录制的详情页数量')
+    parser.add_argument('--padding-kb', type=int, default=64, help='合成页面的填充大小（KB）')
+    parser.add_argument('--scale', type=int, default=1, help='合成语料的复制倍数')
+    parser.add_argument('--output', default=str(FIXTURES_DIR), help='语料目录')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        from streaming_output import load_games
+        urls = [game['url'] for game in load_games(args.step1_file)][:args.limit]
+        corpus = record_corpus(urls)
+    else:
+        corpus = synthesize_corpus(padding_kb=args.padding_kb, scale=args.scale)
+    save_corpus(corpus, Path(args.output))
+
+if __name__ == "__main__":
+    main()
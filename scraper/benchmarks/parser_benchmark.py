@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线解析基准测试：在录制/合成的页面语料上测量各提取函数的延迟分位数、吞吐和峰值内存
+结果保存为JSON基线，之后的运行与基线比较，出现性能回退时以非零状态退出
+
+用法（在 scraper 目录下）：
+    python benchmarks/parser_benchmark.py --save-baseline
+    python benchmarks/parser_benchmark.py --compare benchmarks/baseline.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from fixtures import SYNTHETIC_HOMEPAGE, Corpus, game_slug, homepage_cover, load_corpus
+
+from html_parsers import HtmlParserBackend
+from modular_data_updater import ModularDataUpdater
+from step1_homepage_scraper import HomepageScraper
+from step2_detail_scraper import DetailScraper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# 回退路径的选择器提取函数
+FALLBACK_EXTRACTORS = [
+    '_extract_title',
+    '_extract_description',
+    '_extract_features',
+    '_extract_favorites',
+    '_extract_likes',
+    '_extract_duration',
+    '_extract_tags'
+]
+
+# 比较时检查的指标：(字段, 越大越差)
+COMPARED_METRICS = [('p50_ms', True), ('p90_ms', True), ('per_second', False), ('peak_kb', True)]
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """最近秩分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def run_benchmark(func: Callable[[Any], Any], inputs: Sequence[Any], repeat: int) -> Dict[str, float]:
+    """对每个输入计时 repeat 轮，再单独跑一轮 tracemalloc 统计峰值内存（避免影响计时）"""
+    timings = []
+    gc.collect()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t0 = time.perf_counter_ns()
+            func(item)
+            timings.append((time.perf_counter_ns() - t0) / 1e6)
+    elapsed = time.perf_counter() - started
+
+    gc.collect()
+    tracemalloc.start()
+    for item in inputs:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "mean_ms": round(sum(timings) / len(timings), 4) if timings else 0.0,
+        "p50_ms": round(percentile(timings, 50), 4),
+        "p90_ms": round(percentile(timings, 90), 4),
+        "p99_ms": round(percentile(timings, 99), 4),
+        "max_ms": round(timings[-1], 4) if timings else 0.0,
+        "per_second": round(len(timings) / elapsed, 2) if elapsed else 0.0,
+        "peak_kb": round(peak / 1024, 1)
+    }
+
+def build_benchmarks(corpus: Corpus, backend: str) -> Dict[str, tuple]:
+    """基准项：名称 -> (函数, 输入列表)，页面预先解析好的项只计提取本身"""
+    homepage_scraper = HomepageScraper(parser=HtmlParserBackend(backend))
+    detail_scraper = DetailScraper(parser=HtmlParserBackend(backend))
+    updater = ModularDataUpdater()
+    benchmarks: Dict[str, tuple] = {}
+
+    if corpus.homepages:
+        pages = [content for _, content in corpus.homepages]
+        benchmarks['HomepageScraper.parser.parse'] = (homepage_scraper.parser.parse, pages)
+
+        links = []
+        for content in pages:
+            soup = homepage_scraper.parser.parse(content)
+            links.extend((link, soup) for link in soup.select('a[href*="/game/"]'))
+        benchmarks['HomepageScraper._extract_game_info'] = (
+            lambda item: homepage_scraper._extract_game_info(*item), links)
+
+    detail_pages = [(url, content) for url, content in corpus.detail_pages]
+    if detail_pages:
+        benchmarks['DetailScraper._extract_next_data_game'] = (
+            lambda item: detail_scraper._extract_next_data_game(item[1]), detail_pages)
+        soups = [detail_scraper.parser.parse(content) for _, content in detail_pages]
+        benchmarks['DetailScraper._extract_game_data_from_script'] = (
+            detail_scraper._extract_game_data_from_script, soups)
+        benchmarks['DetailScraper._parse_game_page[next_data]'] = (
+            lambda item: detail_scraper._parse_game_page(item[1], item[0]), detail_pages)
+
+    fallback_pages = corpus.fallback_pages or corpus.detail_pages
+    if fallback_pages:
+        fallback_soups = [(url, detail_scraper.parser.parse(content)) for url, content in fallback_pages]
+        for name in FALLBACK_EXTRACTORS:
+            extractor = getattr(detail_scraper, name)
+            benchmarks[f'DetailScraper.{name}'] = (lambda item, f=extractor: f(item[1]), fallback_soups)
+        benchmarks['DetailScraper._extract_iframe_url'] = (
+            lambda item: detail_scraper._extract_iframe_url(item[1], item[0]), fallback_soups)
+        if corpus.fallback_pages:
+            benchmarks['DetailScraper._parse_game_page[fallback]'] = (
+                lambda item: detail_scraper._parse_game_page(item[1], item[0]), corpus.fallback_pages)
+
+    if corpus.scraped_games:
+        benchmarks['ModularDataUpdater.convert_to_games_data_format'] = (
+            updater.convert_to_games_data_format, [corpus.scraped_games])
+    return benchmarks
+
+def check_homepage_images(corpus: Corpus, backend: str = 'lxml') -> List[str]:
+    """计时前先检查合成主页的封面图：每个链接都应取到自己游戏的封面（返回不一致的说明）"""
+    scraper = HomepageScraper(parser=HtmlParserBackend(backend))
+    mismatches = []
+    for name, content in corpus.homepages:
+        if name != SYNTHETIC_HOMEPAGE:
+            continue
+        soup = scraper.parser.parse(content)
+        for link in soup.select('a[href*="/game/"]'):
+            slug = game_slug(link['href'])
+            image = scraper._extract_image(link, soup)
+            if image != homepage_cover(slug):
+                mismatches.append(f"{slug}: {image or '(无图片)'}")
+    return mismatches
+
+def run_suite(corpus: Corpus, backend: str = 'lxml', repeat: int = 5,
+              only: List[str] = None) -> Dict[str, Any]:
+    """运行全部基准项，返回可保存为基线的结果"""
+    results = {}
+    for name, (func, inputs) in build_benchmarks(corpus, backend).items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        results[name] = run_benchmark(func, inputs, repeat)
+        print(f"  {name:<55} p50 {results[name]['p50_ms']:>9.3f} ms   "
+              f"p99 {results[name]['p99_ms']:>9.3f} ms   {results[name]['per_second']:>10.1f} /s   "
+              f"峰值 {results[name]['peak_kb']:>9.1f} KB")
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend,
+            "repeat": repeat,
+            "corpus": corpus.describe()
+        },
+        "benchmarks": results
+    }
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float = 0.05) -> List[str]:
+    """与基线比较，返回回退项说明（延迟/内存增加或吞吐下降超过 tolerance）
+
+    延迟的绝对变化小于 min_delta_ms 时视为计时噪声，不算回退
+    """
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            if metric.endswith('_ms') and new - old < min_delta_ms:
+                continue
+            change = (new - old) / old
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='离线解析基准测试')
+    parser.add_argument('--fixtures', default=None, help='语料目录（默认 benchmarks/fixtures，没有时合成）')
+    parser.add_argument('--backend', default='lxml', help='HTML解析器后端')
+    parser.add_argument('--repeat', type=int, default=5, help='每个输入的计时轮数')
+    parser.add_argument('--scale', type=int, default=1, help='合成语料的复制倍数')
+    parser.add_argument('--padding-kb', type=int, default=64, help='合成页面的填充大小（KB）')
+    parser.add_argument('--only', nargs='*', help='只运行名称包含这些字符串的基准项')
+    parser.add_argument('--output', help='结果JSON输出路径')
+    parser.add_argument('--save-baseline', nargs='?', const=str(DEFAULT_BASELINE), help='保存为基线')
+    parser.add_argument('--compare', nargs='?', const=str(DEFAULT_BASELINE), help='与基线比较')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的相对变化（默认25%%）')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help='低于该绝对变化的延迟差异视为噪声')
+    args = parser.parse_args()
+
+    # 被测函数本身的日志（例如转换完成的提示）不输出
+    logging.getLogger().setLevel(logging.WARNING)
+
+    kwargs = {"padding_kb": args.padding_kb, "scale": args.scale}
+    corpus = load_corpus(Path(args.fixtures), **kwargs) if args.fixtures else load_corpus(**kwargs)
+    print(f"语料: {corpus.describe()}")
+    mismatches = check_homepage_images(corpus, backend=args.backend)
+    if mismatches:
+        print(f"❌ 合成主页有 {len(mismatches)} 个游戏取到了错误的封面图：")
+        for line in mismatches[:10]:
+            print(f"   {line}")
+        sys.exit(1)
+    results = run_suite(corpus, backend=args.backend, repeat=args.repeat, only=args.only)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"❌ 与基线相比出现 {len(regressions)} 项性能回退（容差 {args.tolerance:.0%}）：")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✅ 与基线 {args.compare} 相比没有性能回退（容差 {args.tolerance:.0%}）")
+
+if __name__ == "__main__":
+    main()
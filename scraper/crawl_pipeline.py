@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线爬取：第一步每提取一个游戏就放入有界队列，第二步同时从队列取URL爬取详情页
+队列满时第一步阻塞等待（背压），内存占用保持平稳，总耗时接近 max(第一步, 第二步)
+"""
+
+import logging
+import queue
+import threading
+from typing import Callable, Iterable, List, Optional
+
+from metrics import metrics
+from step1_homepage_scraper import HomepageScraper, HomepageGameInfo
+from step2_detail_scraper import DetailScraper, DetailedGameInfo
+
+logger = logging.getLogger(__name__)
+
+# 第一步等待队列空位时检查停止标志的间隔（秒）
+PUT_POLL_INTERVAL = 0.5
+
+class CrawlPipeline:
+    """第一步 → 有界队列 → 第二步"""
+
+    def __init__(self, step1_scraper: HomepageScraper, step2_scraper: DetailScraper,
+                 queue_size: int = 100, skip_urls: Optional[Iterable[str]] = None):
+        self.step1_scraper = step1_scraper
+        self.step2_scraper = step2_scraper
+        self.queue_size = max(1, queue_size)
+        # 已完成的URL（断点续爬时）不再进入第二步队列
+        self.skip_urls = set(skip_urls or ())
+
+    def run(self, max_games: int,
+            on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+            on_failure: Optional[Callable[[str, str], None]] = None) -> List[HomepageGameInfo]:
+        """运行流水线，第二步结果交给回调，返回第一步发现的全部游戏"""
+        url_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        step1_games: List[HomepageGameInfo] = []
+        # 第二步异常退出时设置，第一步不再等待队列空位
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            """等待队列空位放入，第二步已停止时放弃并返回 False"""
+            while not stop.is_set():
+                try:
+                    url_queue.put(item, timeout=PUT_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            queued = set()
+            with metrics.stage(self.step1_scraper.stage) as stage:
+                try:
+                    for game in self.step1_scraper.iter_homepage_games(max_games):
+                        step1_games.append(game)
+                        if game.url in self.skip_urls or game.url in queued:
+                            continue
+                        if not put(game.url):
+                            logger.warning("第二步已停止，流水线第一步提前结束")
+                            break
+                        queued.add(game.url)
+                        metrics.record_queue_depth('pipeline', url_queue.qsize())
+                except Exception as e:
+                    logger.error(f"流水线第一步出错: {e}")
+                finally:
+                    # 结束标记：第二步取到后等待剩余请求完成即退出
+                    put(None)
+                    stage.items = len(step1_games)
+            logger.info(f"流水线第一步完成：发现 {len(step1_games)} 个游戏，"
+                        f"送入第二步 {len(queued)} 个")
+
+        logger.info(f"🔀 流水线模式：第一步与第二步同时进行（队列容量 {self.queue_size}）")
+        producer = threading.Thread(target=produce, name="step1-producer", daemon=True)
+        producer.start()
+        try:
+            self.step2_scraper.scrape_game_details_from_queue(url_queue, on_result, on_failure)
+        finally:
+            # 第二步出错时通知第一步停止并清空队列，保证生产线程能退出，异常再向上抛出
+            stop.set()
+            while True:
+                try:
+                    url_queue.get_nowait()
+                except queue.Empty:
+                    break
+            producer.join()
+        return step1_games
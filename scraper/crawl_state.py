@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取状态存储：用本地SQLite记录每个URL的状态（pending / in_flight / done / failed）、
+尝试次数和最后一次错误，支持中断后 --resume 从断点继续
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+class CrawlStateStore:
+    """基于SQLite的爬取状态存储"""
+
+    def __init__(self, path: str = "crawl_state.sqlite"):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        # WAL + NORMAL：每条结果提交一次也不会频繁全量fsync，崩溃时已提交的记录不丢
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS stages (
+                name TEXT PRIMARY KEY,
+                done INTEGER NOT NULL DEFAULT 0,
+                payload TEXT,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                result TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_status ON urls(status);
+        """)
+        self._conn.commit()
+
+    # ---- 阶段（step1）----
+
+    def stage_done(self, name: str) -> bool:
+        row = self._conn.execute("SELECT done FROM stages WHERE name = ?", (name,)).fetchone()
+        return bool(row and row[0])
+
+    def complete_stage(self, name: str, payload: Any = None):
+        """标记阶段完成，并保存阶段产出（例如第一步的游戏列表）"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO stages (name, done, payload, updated_at) VALUES (?, 1, ?, ?)",
+            (name, json.dumps(payload, ensure_ascii=False), time.time())
+        )
+        self._conn.commit()
+
+    def stage_payload(self, name: str) -> Any:
+        row = self._conn.execute("SELECT payload FROM stages WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def reset(self):
+        """开始一次全新的爬取，清空所有状态"""
+        self._conn.executescript("DELETE FROM stages; DELETE FROM urls;")
+        self._conn.commit()
+
+    # ---- URL（step2）----
+
+    def add_urls(self, urls: List[str]):
+        """登记发现的URL，已存在的保持原状态"""
+        start = self._conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM urls").fetchone()[0]
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO urls (url, position, status, updated_at) VALUES (?, ?, ?, ?)",
+            [(url, start + i, PENDING, now) for i, url in enumerate(urls)]
+        )
+        self._conn.commit()
+
+    def recover_in_flight(self) -> int:
+        """上次运行中断时仍在处理的URL重新置为 pending"""
+        cursor = self._conn.execute("UPDATE urls SET status = ? WHERE status = ?", (PENDING, IN_FLIGHT))
+        self._conn.commit()
+        return cursor.rowcount
+
+    def urls_to_fetch(self, failed_only: bool = False, max_attempts: Optional[int] = None) -> List[str]:
+        """待爬取的URL：pending 和 failed（或只取 failed），按发现顺序"""
+        statuses = (FAILED,) if failed_only else (PENDING, FAILED)
+        query = f"SELECT url FROM urls WHERE status IN ({','.join('?' * len(statuses))})"
+        params: list = list(statuses)
+        if max_attempts:
+            query += " AND attempts < ?"
+            params.append(max_attempts)
+        query += " ORDER BY position"
+        return [row[0] for row in self._conn.execute(query, params)]
+
+    def mark_in_flight(self, urls: List[str]):
+        now = time.time()
+        self._conn.executemany(
+            "UPDATE urls SET status = ?, attempts = attempts + 1, updated_at = ? WHERE url = ?",
+            [(IN_FLIGHT, now, url) for url in urls]
+        )
+        self._conn.commit()
+
+    def _register(self, url: str):
+        """流水线模式下URL未经 add_urls 登记，完成时补登记（视为一次尝试）"""
+        self._conn.execute(
+            "INSERT OR IGNORE INTO urls (url, position, status, attempts, updated_at) "
+            "SELECT ?, COALESCE(MAX(position), -1) + 1, ?, 1, ? FROM urls",
+            (url, IN_FLIGHT, time.time())
+        )
+
+    def mark_done(self, url: str, result: Dict[str, Any]):
+        self._register(url)
+        self._conn.execute(
+            "UPDATE urls SET status = ?, result = ?, last_error = NULL, updated_at = ? WHERE url = ?",
+            (DONE, json.dumps(result, ensure_ascii=False), time.time(), url)
+        )
+        self._conn.commit()
+
+    def mark_failed(self, url: str, error: str):
+        self._register(url)
+        self._conn.execute(
+            "UPDATE urls SET status = ?, last_error = ?, updated_at = ? WHERE url = ?",
+            (FAILED, error, time.time(), url)
+        )
+        self._conn.commit()
+
+    def done_urls(self) -> Set[str]:
+        """已完成的URL"""
+        return {row[0] for row in self._conn.execute("SELECT url FROM urls WHERE status = ?", (DONE,))}
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """按发现顺序逐条读取已完成的结果（不一次性载入内存）"""
+        cursor = self._conn.execute(
+            "SELECT result FROM urls WHERE status = ? ORDER BY position", (DONE,)
+        )
+        for (result,) in cursor:
+            yield json.loads(result)
+
+    def summary(self) -> Dict[str, int]:
+        """各状态的URL数量"""
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        for status, count in self._conn.execute("SELECT status, COUNT(*) FROM urls GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def log_summary(self):
+        counts = self.summary()
+        logger.info(f"🗂️ 爬取状态: 完成 {counts[DONE]}, 失败 {counts[FAILED]}, "
+                    f"待爬取 {counts[PENDING]}, 进行中 {counts[IN_FLIGHT]}")
+        for url, attempts, error in self._conn.execute(
+                "SELECT url, attempts, last_error FROM urls WHERE status = ? ORDER BY position LIMIT 10",
+                (FAILED,)):
+            logger.info(f"   失败: {url}（尝试 {attempts} 次）: {error}")
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全目录发现爬虫：从主页出发，沿分类（/c/）和标签（/t/）列表页及其分页抓取游戏链接
+游戏URL规范化后去重，分类取自发现该游戏的列表页，输出与第一步相同的 HomepageGameInfo
+"""
+
+import heapq
+import logging
+import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urljoin, urlparse
+
+from html_parsers import HtmlParserBackend
+from http_cache import HttpCache
+from rate_limiter import RateLimiter
+from scraper_config import DEFAULT_BASE_URL
+from step1_homepage_scraper import HomepageScraper, HomepageGameInfo
+
+logger = logging.getLogger(__name__)
+
+# 列表页路径：/c/<分类>、/t/<标签>，分页形如 /c/action/2 或 /c/action?page=2
+LISTING_PATH = re.compile(r'^/(c|t)/([a-z0-9-]+)(?:/(\d+))?$')
+
+# 分类页优先于标签页抓取，使游戏尽量以真实分类首次出现
+LISTING_PRIORITY = {'c': 0, 't': 1}
+
+def canonicalize_game_url(href: str, base_url: str) -> Optional[str]:
+    """规范化游戏URL（补全域名、去掉查询参数/锚点/末尾斜杠），非本站游戏页返回 None"""
+    parsed = urlparse(urljoin(base_url + '/', href))
+    if parsed.netloc.lower() != urlparse(base_url).netloc.lower():
+        return None
+    path = parsed.path.rstrip('/')
+    if not path.startswith('/game/') or path.count('/') != 2:
+        return None
+    return f"{urlparse(base_url).scheme}://{parsed.netloc.lower()}{path}"
+
+def parse_listing_url(href: str, base_url: str) -> Optional[Tuple[str, str, int]]:
+    """解析列表页URL，返回 (类型 c/t, slug, 页码)，不是列表页返回 None"""
+    parsed = urlparse(urljoin(base_url + '/', href))
+    if parsed.netloc.lower() != urlparse(base_url).netloc.lower():
+        return None
+    match = LISTING_PATH.match(parsed.path.rstrip('/').lower())
+    if not match:
+        return None
+    kind, slug, path_page = match.groups()
+    page = path_page or parse_qs(parsed.query).get('page', ['1'])[0]
+    try:
+        return kind, slug, max(1, int(page))
+    except ValueError:
+        return kind, slug, 1
+
+def listing_page_url(base_url: str, kind: str, slug: str, page: int) -> str:
+    """列表页的规范URL"""
+    url = f"{base_url}/{kind}/{slug}"
+    return url if page == 1 else f"{url}?page={page}"
+
+def listing_category(slug: str) -> str:
+    """列表页slug转换为分类名，例如 tower-defense -> Tower Defense"""
+    return slug.replace('-', ' ').title()
+
+class FrontierCrawler(HomepageScraper):
+    """基于抓取边界（frontier）的全目录游戏发现爬虫
+
+    - 主页只作为种子：发现列表页链接，主页上的游戏在列表页中找不到时才以URL猜测的分类输出
+    - 边界是按（分类优先、深度、发现顺序）排序的优先队列，去重集合只保存URL
+    - 游戏逐个产出，不在内存中累积；抓取页数、深度和单个列表的分页数都有上限
+    """
+
+    def __init__(self, cache: Optional[HttpCache] = None, parser: Optional[HtmlParserBackend] = None,
+                 limiter: Optional[RateLimiter] = None, max_depth: int = 2, max_pages: int = 500,
+                 max_pages_per_listing: int = 50, base_url: str = DEFAULT_BASE_URL):
+        super().__init__(cache=cache, parser=parser, limiter=limiter, base_url=base_url)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_pages_per_listing = max_pages_per_listing
+
+    @classmethod
+    def from_config(cls, config: dict, cache: Optional[HttpCache] = None,
+                    parser: Optional[HtmlParserBackend] = None,
+                    limiter: Optional[RateLimiter] = None) -> 'FrontierCrawler':
+        """根据 config.json 的 discovery 段创建爬虫"""
+        discovery_config = config.get('discovery', {})
+        return cls(cache=cache, parser=parser, limiter=limiter,
+                   max_depth=discovery_config.get('max_depth', 2),
+                   max_pages=discovery_config.get('max_pages', 500),
+                   max_pages_per_listing=discovery_config.get('max_pages_per_listing', 50),
+                   base_url=config.get('scraper', {}).get('base_url', DEFAULT_BASE_URL))
+
+    def iter_homepage_games(self, max_games: int = 0) -> Iterator[HomepageGameInfo]:
+        """沿列表页发现游戏并逐个产出，max_games <= 0 表示不限数量"""
+        logger.info(f"开始全目录发现：最大深度 {self.max_depth}，最多抓取 {self.max_pages} 个页面，"
+                    f"每个列表最多 {self.max_pages_per_listing} 页")
+
+        frontier: List[Tuple[int, int, int, str, str, str, int]] = []
+        queued: Set[str] = set()
+        seen_games: Set[str] = set()
+        listings: Set[Tuple[str, str]] = set()
+        counter = 0
+        emitted = 0
+        fetched = 0
+
+        def enqueue(kind: str, slug: str, page: int, depth: int):
+            nonlocal counter
+            url = listing_page_url(self.base_url, kind, slug, page)
+            if url in queued or depth > self.max_depth:
+                return
+            if page > self.max_pages_per_listing or len(queued) >= self.max_pages:
+                return
+            queued.add(url)
+            counter += 1
+            heapq.heappush(frontier, (LISTING_PRIORITY[kind], depth, counter, url, kind, slug, page))
+
+        # 种子：主页。主页上的游戏暂存，列表页中找到同一游戏时以列表页的分类为准
+        homepage_games: Dict[str, HomepageGameInfo] = {}
+        try:
+            soup = self._parse_page(self._fetch(self.base_url))
+            fetched += 1
+            for link in soup.find_all('a', href=True):
+                listing = parse_listing_url(link['href'], self.base_url)
+                if listing:
+                    enqueue(listing[0], listing[1], listing[2], 1)
+                    continue
+                url = canonicalize_game_url(link['href'], self.base_url)
+                if url and url not in homepage_games:
+                    game = self._extract_game_info(link, soup)
+                    if game:
+                        game.url = url
+                        homepage_games[url] = game
+            self._image_index = None
+            logger.info(f"主页发现 {len(queued)} 个列表页，{len(homepage_games)} 个游戏")
+        except Exception as e:
+            logger.error(f"爬取主页时出错: {e}")
+
+        def limit_reached() -> bool:
+            return max_games > 0 and emitted >= max_games
+
+        while frontier and fetched < self.max_pages and not limit_reached():
+            _, depth, _, page_url, kind, slug, page = heapq.heappop(frontier)
+            try:
+                soup = self._parse_page(self._fetch(page_url))
+            except Exception as e:
+                logger.warning(f"抓取列表页 {page_url} 失败: {e}")
+                continue
+            fetched += 1
+
+            category = listing_category(slug)
+            new_games = 0
+            for link in soup.find_all('a', href=True):
+                href = link['href']
+                url = canonicalize_game_url(href, self.base_url)
+                if url:
+                    if url in seen_games:
+                        continue
+                    seen_games.add(url)
+                    game = homepage_games.pop(url, None) or self._extract_game_info(link, soup)
+                    if not game:
+                        continue
+                    game.url = url
+                    game.category = category
+                    new_games += 1
+                    emitted += 1
+                    yield game
+                    if limit_reached():
+                        break
+                    continue
+
+                listing = parse_listing_url(href, self.base_url)
+                if listing:
+                    if listing[:2] == (kind, slug):
+                        # 同一列表的后续分页不增加深度
+                        if listing[2] > page:
+                            enqueue(kind, slug, listing[2], depth)
+                    else:
+                        enqueue(*listing, depth + 1)
+
+            self._image_index = None
+            listings.add((kind, slug))
+            logger.info(f"📄 {page_url}: 新发现 {new_games} 个游戏（累计 {emitted}），"
+                        f"待抓取 {len(frontier)} 个页面")
+
+        # 列表页中没有出现的主页游戏，按URL猜测分类补充输出
+        for url, game in homepage_games.items():
+            if limit_reached():
+                break
+            if url in seen_games:
+                continue
+            seen_games.add(url)
+            emitted += 1
+            yield game
+
+        logger.info(f"全目录发现完成：抓取 {fetched} 个页面（{len(listings)} 个列表），"
+                    f"共发现 {emitted} 个游戏")
+        if self.cache:
+            self.cache.log_stats()
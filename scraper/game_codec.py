@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游戏记录的紧凑编码（与 src/data/gameCodec.ts 的 decodeGames 对应）
+- iframe 只保存地址，地址就是由 slug 推出的默认地址时也不保存，前端解码时再生成HTML
+- controls 预设和 features 字符串放进共享表，记录中只保存下标
+- 标准封面图只保存 imgs.crazygames.com 下的路径（cover），不重复域名和裁剪参数
+- 等于默认值的字段省略（favorites 默认等于 likes）
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+DEFAULT_DESCRIPTION = 'A fun and exciting online game!'
+DEFAULT_DURATION = '5-10 分钟'
+BLANK_IFRAME_SRC = 'about:blank'
+COVER_PREFIX = 'https://imgs.crazygames.com/'
+COVER_SUFFIX = '?metadata=none&quality=85&width=273&fit=crop'
+
+# 解码时缺省字段的取值（与 gameCodec.ts 中的 DEFAULTS 一致）
+DEFAULTS: Dict[str, Any] = {
+    'image': '',
+    'description': DEFAULT_DESCRIPTION,
+    'isNew': True,
+    'category': 'other',
+    'playCount': 0,
+    'likes': 0,
+    'duration': DEFAULT_DURATION,
+}
+
+IFRAME_SRC = re.compile(r'<iframe src="([^"]*)"')
+
+def iframe_html(src: str) -> str:
+    """游戏 iframe 的HTML（about:blank 占位时不带 allow 属性）"""
+    if src == BLANK_IFRAME_SRC:
+        return f'<iframe src="{src}" style="width: 100%; height: 100%;" frameborder="0"></iframe>'
+    return f'<iframe src="{src}" style="width: 100%; height: 100%;" frameborder="0" allow="gamepad *;"></iframe>'
+
+def default_iframe_src(slug: Optional[str]) -> str:
+    """由 slug 推出的游戏地址，没有 slug 时为 about:blank"""
+    return f"https://games.crazygames.com/en_US/{slug}/index.html" if slug else BLANK_IFRAME_SRC
+
+class GameEncoder:
+    """逐条编码游戏记录，共享表随编码过程增长（所有记录编码完后再取 tables()）"""
+
+    def __init__(self):
+        self.features: Dict[str, int] = {}
+        self.controls: Dict[str, int] = {}
+        self.control_table: List[List[Dict[str, str]]] = []
+
+    def encode(self, game: Dict[str, Any]) -> Dict[str, Any]:
+        record: Dict[str, Any] = {'id': game.get('id', 0)}
+        if game.get('slug'):
+            record['slug'] = game['slug']
+        record['title'] = game.get('title', '')
+
+        image = game.get('image', DEFAULTS['image'])
+        if (image.startswith(COVER_PREFIX) and image.endswith(COVER_SUFFIX)
+                and len(image) > len(COVER_PREFIX) + len(COVER_SUFFIX)):
+            record['cover'] = image[len(COVER_PREFIX):-len(COVER_SUFFIX)]
+        elif image != DEFAULTS['image']:
+            record['image'] = image
+        if game.get('description', DEFAULTS['description']) != DEFAULTS['description']:
+            record['description'] = game['description']
+        if game.get('features'):
+            record['features'] = [self.features.setdefault(feature, len(self.features))
+                                  for feature in game['features']]
+        if game.get('isNew', True) is not True:
+            record['isNew'] = game['isNew']
+
+        # iframe：能由地址重新生成时只保存地址（默认地址也省略），否则原样保存
+        iframe = game.get('iframe', '')
+        match = IFRAME_SRC.match(iframe)
+        if match and iframe_html(match.group(1)) == iframe:
+            if match.group(1) != default_iframe_src(game.get('slug')):
+                record['src'] = match.group(1)
+        else:
+            record['iframe'] = iframe
+
+        if game.get('controls'):
+            key = repr(game['controls'])
+            if key not in self.controls:
+                self.controls[key] = len(self.control_table)
+                self.control_table.append(game['controls'])
+            record['controls'] = self.controls[key]
+
+        for key in ('category', 'playCount', 'likes', 'duration'):
+            if game.get(key, DEFAULTS[key]) != DEFAULTS[key]:
+                record[key] = game[key]
+        if game.get('favorites', 0) != game.get('likes', DEFAULTS['likes']):
+            record['favorites'] = game.get('favorites', 0)
+        if game.get('addedAt'):
+            record['addedAt'] = game['addedAt']
+        return record
+
+    def tables(self) -> Dict[str, Any]:
+        return {'features': list(self.features), 'controls': self.control_table}
+
+def encode_games(games: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """编码为 {"games": [...], "features": [...], "controls": [...]}，解码后与原记录完全相同"""
+    encoder = GameEncoder()
+    records = [encoder.encode(game) for game in games]
+    return {'games': records, **encoder.tables()}
+
+def decode_games(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """encode_games 的逆过程（与 gameCodec.ts 的 decodeGames 相同）"""
+    games = []
+    for record in data.get('games', []):
+        game: Dict[str, Any] = {'id': record['id']}
+        if record.get('slug'):
+            game['slug'] = record['slug']
+        game['title'] = record['title']
+        if 'cover' in record:
+            game['image'] = COVER_PREFIX + record['cover'] + COVER_SUFFIX
+        else:
+            game['image'] = record.get('image', DEFAULTS['image'])
+        game['description'] = record.get('description', DEFAULTS['description'])
+        game['features'] = [data['features'][i] for i in record.get('features', [])]
+        game['isNew'] = record.get('isNew', DEFAULTS['isNew'])
+        if 'iframe' in record:
+            game['iframe'] = record['iframe']
+        else:
+            game['iframe'] = iframe_html(record['src'] if 'src' in record else default_iframe_src(record.get('slug')))
+        game['controls'] = data['controls'][record['controls']] if 'controls' in record else []
+        for key in ('category', 'playCount', 'likes'):
+            game[key] = record.get(key, DEFAULTS[key])
+        game['favorites'] = record.get('favorites', game['likes'])
+        game['duration'] = record.get('duration', DEFAULTS['duration'])
+        if record.get('addedAt'):
+            game['addedAt'] = record['addedAt']
+        games.append(game)
+    return games
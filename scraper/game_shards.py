@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+游戏数据分片：按分类（超过大小上限时再拆分）写成 JSON 分片，文件名带内容哈希，可以永久缓存
+另外生成一个小的索引清单 gamesManifest.ts（id、标题、缩略图、分类和所在分片），由 gamesData.ts 导出，
+前端首屏只需要清单，详情按分类按需加载，首屏体积不随游戏总数增长
+更新时先写入新分片（现有清单不引用它们）并暂存清单，gamesData.ts 替换成功后才换上清单、删除旧分片
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from game_codec import decode_games, encode_games
+from streaming_output import stage_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_DIR = "../public/game-data"
+DEFAULT_MANIFEST_PATH = "../src/data/gamesManifest.ts"
+DEFAULT_MAX_SHARD_BYTES = 256 * 1024
+
+# <分类>-<序号>.<内容哈希>.json
+SHARD_NAME = re.compile(r'^[a-z0-9-]+-\d+\.[0-9a-f]{10}\.json$')
+# 清单中 gameShards 的一行（render_manifest 每个分片输出一行JSON）
+MANIFEST_SHARD_LINE = re.compile(r'^\s*(\{"file": .*\}),?$')
+
+@dataclass
+class GameShard:
+    """一个分片文件"""
+    file: str
+    category: str
+    payload: str
+    ids: List[int]
+
+def _category_key(category: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', (category or 'other').lower()).strip('-') or 'other'
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def shard_games(games: List[Dict[str, Any]], max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+                compact: bool = False) -> List[GameShard]:
+    """按分类分组（保持原顺序），每个分片的JSON不超过 max_shard_bytes（单个游戏超过上限时独占一个分片）
+
+    compact 为 True 时分片内容是 encode_games 的紧凑编码（按单条记录的编码大小估算分片大小，共享表另计）
+    """
+    by_category: Dict[str, List[Dict[str, Any]]] = {}
+    for game in games:
+        by_category.setdefault(_category_key(game.get('category', 'other')), []).append(game)
+
+    shards: List[GameShard] = []
+    for category, category_games in by_category.items():
+        part: List[Dict[str, Any]] = []
+        size = 2
+
+        def flush():
+            payload = _dumps(encode_games(part)) if compact else '[' + ','.join(_dumps(game) for game in part) + ']'
+            digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:10]
+            index = sum(1 for shard in shards if shard.category == category)
+            shards.append(GameShard(f"{category}-{index}.{digest}.json", category, payload,
+                                    [game.get('id', 0) for game in part]))
+
+        for game in category_games:
+            item = encode_games([game])['games'][0] if compact else game
+            item_size = len(_dumps(item).encode('utf-8')) + 1
+            if part and size + item_size > max_shard_bytes:
+                flush()
+                part, size = [], 2
+            part.append(game)
+            size += item_size
+        flush()
+    return shards
+
+def write_shards(shards: List[GameShard], shard_dir: str = DEFAULT_SHARD_DIR) -> int:
+    """写入还不存在的分片（同名即同内容），返回新写入的分片数；不删除任何文件，现有清单引用的分片仍然可用"""
+    target = Path(shard_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for shard in shards:
+        path = target / shard.file
+        if not path.exists():
+            tmp_path = stage_text(shard.payload, str(path))
+            os.replace(tmp_path, path)
+            written += 1
+    return written
+
+def remove_stale_shards(shards: List[GameShard], shard_dir: str = DEFAULT_SHARD_DIR) -> int:
+    """删除不在 shards 中的分片文件（旧清单引用的分片、以及失败的运行留下的分片），返回删除数"""
+    target = Path(shard_dir)
+    if not target.is_dir():
+        return 0
+    current = {shard.file for shard in shards}
+    stale = [path for path in target.iterdir() if SHARD_NAME.match(path.name) and path.name not in current]
+    for path in stale:
+        path.unlink()
+    return len(stale)
+
+def manifest_shard_files(manifest_path: str = DEFAULT_MANIFEST_PATH) -> List[str]:
+    """现有清单引用的分片文件名（没有清单时为空）"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+    files = []
+    for line in lines:
+        match = MANIFEST_SHARD_LINE.match(line)
+        if match:
+            files.append(json.loads(match.group(1))['file'])
+    return files
+
+def load_shard_games(shard_dir: str = DEFAULT_SHARD_DIR,
+                     manifest_path: str = DEFAULT_MANIFEST_PATH) -> List[Dict[str, Any]]:
+    """读取现有清单引用的分片里的全部游戏，按 id 排序（即收录顺序）
+
+    目录中可能还有失败的运行留下、没有被清单引用的分片，不能按目录读取
+    """
+    target = Path(shard_dir)
+    games: List[Dict[str, Any]] = []
+    for name in manifest_shard_files(manifest_path):
+        with open(target / name, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        games.extend(decode_games(data) if isinstance(data, dict) else data)
+    games.sort(key=lambda game: game.get('id', 0))
+    return games
+
+@dataclass
+class StagedShards:
+    """已写入新分片、清单暂存在临时文件中的一次分片更新：commit 后才生效，discard 放弃"""
+    shards: List[GameShard]
+    shard_dir: str
+    manifest_path: str
+    manifest_tmp: Optional[str]   # 清单没有变化时为 None
+
+    def commit(self):
+        """换上新清单，再删除不再引用的旧分片"""
+        if self.manifest_tmp:
+            os.replace(self.manifest_tmp, self.manifest_path)
+            self.manifest_tmp = None
+            logger.info(f"已写入索引清单: {self.manifest_path}")
+        else:
+            logger.info("索引清单未变化，跳过写入")
+        removed = remove_stale_shards(self.shards, self.shard_dir)
+        logger.info(f"📦 {len(self.shards)} 个数据分片生效，删除旧分片 {removed} 个")
+
+    def discard(self):
+        """删除暂存的清单；已写入的新分片不被任何清单引用，下次成功更新时作为旧分片删除"""
+        if self.manifest_tmp:
+            os.unlink(self.manifest_tmp)
+            self.manifest_tmp = None
+
+def stage_shards(games: List[Dict[str, Any]], shards: List[GameShard], shard_dir: str = DEFAULT_SHARD_DIR,
+                 manifest_path: str = DEFAULT_MANIFEST_PATH) -> StagedShards:
+    """写入新分片并暂存清单，现有的清单和分片保持可用"""
+    written = write_shards(shards, shard_dir)
+    manifest = render_manifest(games, shards)
+    path = Path(manifest_path)
+    unchanged = path.exists() and path.read_text(encoding='utf-8') == manifest
+    staged = StagedShards(shards, shard_dir, str(path), None if unchanged else stage_text(manifest, str(path)))
+    logger.info(f"📦 {len(shards)} 个数据分片：新写入 {written} 个，清单{'未变化' if unchanged else '已暂存'}")
+    return staged
+
+def render_manifest(games: List[Dict[str, Any]], shards: List[GameShard]) -> str:
+    """生成 gamesManifest.ts：分片列表和每个游戏的摘要（shard 是 gameShards 中的下标）"""
+    shard_of = {game_id: i for i, shard in enumerate(shards) for game_id in shard.ids}
+    shard_lines = ['  ' + json.dumps({'file': shard.file, 'category': shard.category, 'count': len(shard.ids)},
+                                     ensure_ascii=False)
+                   for shard in shards]
+
+    index_lines = []
+    for game in games:
+        summary = {
+            'id': game.get('id', 0),
+            'slug': game.get('slug', ''),
+            'title': game.get('title', ''),
+            'image': game.get('image', ''),
+            'category': game.get('category', 'other'),
+            'shard': shard_of[game.get('id', 0)]
+        }
+        index_lines.append('  ' + json.dumps(summary, ensure_ascii=False))
+
+    def array(lines: List[str]) -> str:
+        return "[\n" + ",\n".join(lines) + "\n]" if lines else "[]"
+
+    return (
+        "// 由 scraper/modular_data_updater.py --shards 生成，请勿手动修改\n"
+        "export interface GameShard {\n"
+        "  file: string;\n"
+        "  category: string;\n"
+        "  count: number;\n"
+        "}\n\n"
+        "export interface GameSummary {\n"
+        "  id: number;\n"
+        "  slug: string;\n"
+        "  title: string;\n"
+        "  image: string;\n"
+        "  category: string;\n"
+        "  shard: number;\n"
+        "}\n\n"
+        f"export const gameShards: GameShard[] = {array(shard_lines)};\n\n"
+        f"export const gameIndex: GameSummary[] = {array(index_lines)};\n"
+    )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析后端：统一封装 BeautifulSoup 的底层解析器选择
+支持 lxml（C加速）、html.parser（纯Python）以及只解析 a/img/script 标签的过滤模式（可选，默认解析完整DOM）
+"""
+
+import logging
+from typing import List, Optional, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# 可选的解析器，按速度从快到慢排列
+PARSER_BACKENDS = ['lxml', 'html.parser', 'html5lib']
+
+# 过滤模式保留的标签（链接、封面图、Next.js数据）
+# 注意：过滤后 div/li/article 等卡片容器都不存在，封面图与链接是兄弟节点的卡片会找错图片，
+# 所以默认不启用，只用于确认页面结构是"图片在链接内"时的提速
+HOMEPAGE_TAGS = ['a', 'img', 'script']
+
+def _backend_available(backend: str) -> bool:
+    """检查解析器依赖是否已安装"""
+    if backend == 'html.parser':
+        return True
+    try:
+        __import__(backend)
+        return True
+    except ImportError:
+        return False
+
+class HtmlParserBackend:
+    """HTML解析后端"""
+
+    def __init__(self, backend: str = 'lxml', only_tags: Optional[List[str]] = None):
+        if backend not in PARSER_BACKENDS:
+            raise ValueError(f"不支持的解析器: {backend}，可选: {', '.join(PARSER_BACKENDS)}")
+        if not _backend_available(backend):
+            logger.warning(f"解析器 {backend} 未安装，回退到 html.parser")
+            backend = 'html.parser'
+        self.backend = backend
+        self.only_tags = only_tags
+
+    def parse(self, markup: Union[str, bytes]) -> BeautifulSoup:
+        """解析HTML，设置 only_tags 时只保留这些标签及其子节点"""
+        if self.only_tags:
+            return BeautifulSoup(markup, self.backend, parse_only=SoupStrainer(self.only_tags))
+        return BeautifulSoup(markup, self.backend)
+
+    def __repr__(self) -> str:
+        only = f", only={self.only_tags}" if self.only_tags else ""
+        return f"HtmlParserBackend({self.backend}{only})"
+
+def homepage_parser(config: dict) -> HtmlParserBackend:
+    """根据 config.json 的 parser 段创建主页解析后端"""
+    parser_config = config.get('parser', {})
+    only_tags = HOMEPAGE_TAGS if parser_config.get('homepage_only_tags', False) else None
+    return HtmlParserBackend(parser_config.get('backend', 'lxml'), only_tags=only_tags)
+
+def detail_parser(config: dict) -> HtmlParserBackend:
+    """根据 config.json 的 parser 段创建详情页回退解析后端（需要完整DOM）"""
+    return HtmlParserBackend(config.get('parser', {}).get('backend', 'lxml'))
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化HTTP响应缓存：主页爬虫和详情页爬虫共用
+保存响应正文及 ETag/Last-Modified，TTL内直接命中，过期后用条件请求重新验证，按LRU和容量上限淘汰
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 淘汰时每批删除的条目数
+EVICT_BATCH = 64
+
+@dataclass
+class CacheEntry:
+    """缓存条目"""
+    url: str
+    body: bytes
+    encoding: str
+    etag: str
+    last_modified: str
+    stored_at: float
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+class HttpCache:
+    """基于SQLite的磁盘响应缓存"""
+
+    def __init__(self, path: str = ".http_cache/responses.sqlite", ttl: int = 3600,
+                 max_size_mb: int = 200):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_size = max_size_mb * 1024 * 1024
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._conn.commit()
+        # 缓存总字节数只在启动时统计一次，之后随写入和淘汰增减
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """查找缓存条目（不判断是否新鲜）"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, encoding, etag, last_modified, stored_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+        return CacheEntry(*row) if row else None
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """条目是否仍在TTL之内"""
+        return time.time() - entry.stored_at < self.ttl
+
+    def conditional_headers(self, entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """生成重新验证用的条件请求头"""
+        headers = {}
+        if entry:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, url: str, body: bytes, encoding: str, headers) -> CacheEntry:
+        """保存新的响应"""
+        now = time.time()
+        entry = CacheEntry(
+            url=url,
+            body=body,
+            encoding=encoding or 'utf-8',
+            etag=headers.get('ETag', '') or '',
+            last_modified=headers.get('Last-Modified', '') or '',
+            stored_at=now
+        )
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, entry.encoding, entry.etag, entry.last_modified, now, now, len(body))
+            )
+            self._total_size += len(body) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+        return entry
+
+    def refresh(self, entry: CacheEntry) -> CacheEntry:
+        """304 Not Modified：延长条目的有效期"""
+        now = time.time()
+        entry.stored_at = now
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, last_access = ? WHERE url = ?",
+                (now, now, entry.url)
+            )
+            self._conn.commit()
+        return entry
+
+    def touch(self, entry: CacheEntry):
+        """记录访问时间，用于LRU淘汰"""
+        with self._lock:
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?",
+                               (time.time(), entry.url))
+            self._conn.commit()
+
+    def _evict(self):
+        """超过容量上限时按最久未访问分批淘汰"""
+        if self._total_size <= self.max_size:
+            return
+
+        evicted = 0
+        while self._total_size > self.max_size:
+            rows = self._conn.execute(
+                "SELECT url, size FROM responses ORDER BY last_access LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                self._total_size = 0
+                break
+            for url, size in rows:
+                if self._total_size <= self.max_size:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._total_size -= size
+                evicted += 1
+        logger.info(f"缓存超过容量上限，已淘汰 {evicted} 个条目")
+
+    def get(self, url: str, send: Callable[[str, Dict[str, str]], Any]) -> CacheEntry:
+        """通过缓存获取页面：新鲜命中直接返回，否则发送条件请求
+
+        send(url, headers) 负责真正发出请求（限速、重试），返回 requests 响应
+        """
+        entry = self.lookup(url)
+        if entry and self.is_fresh(entry):
+            self.record('hit')
+            self.touch(entry)
+            return entry
+
+        response = send(url, self.conditional_headers(entry))
+        if entry and response.status_code == 304:
+            self.record('revalidated')
+            return self.refresh(entry)
+        if response.status_code == 304:
+            # 没有缓存条目却收到304：不能把空正文当作有效响应，去掉条件请求头重新获取
+            response = send(url, {})
+            if response.status_code == 304:
+                raise requests.HTTPError(f"304 Error for url: {url}", response=response)
+
+        response.raise_for_status()
+        self.record('miss')
+        return self.store(url, response.content, response.encoding, response.headers)
+
+    def record(self, key: str):
+        """记录一次命中/重新验证/未命中"""
+        with self._lock:
+            self.stats[key] += 1
+
+    def log_stats(self):
+        """输出缓存命中统计到日志"""
+        total = sum(self.stats.values())
+        hit_rate = (self.stats['hit'] + self.stats['revalidated']) / total * 100 if total else 0
+        logger.info(f"📦 HTTP缓存统计: 命中 {self.stats['hit']}, 304重新验证 {self.stats['revalidated']}, "
+                    f"未命中 {self.stats['miss']}, 命中率 {hit_rate:.1f}%")
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量爬取：对比第一步URL集合与已有的第二步结果，只重新爬取新增或过期的游戏
+"""
+
+import json
+import logging
+from dataclasses import fields
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Tuple
+
+from step2_detail_scraper import DetailedGameInfo
+
+logger = logging.getLogger(__name__)
+
+def load_step2_records(filename: str = "step2_detailed_games.json") -> Dict[str, Dict[str, Any]]:
+    """加载上一次的第二步结果，按URL建立索引"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        logger.info(f"未找到已有的第二步结果 {filename}，将全量爬取")
+        return {}
+    except Exception as e:
+        logger.error(f"读取已有的第二步结果失败: {e}")
+        return {}
+
+    return {game['url']: game for game in data.get('games', []) if game.get('url')}
+
+def _is_stale(record: Dict[str, Any], max_age: timedelta, now: datetime) -> bool:
+    """记录是否超过新鲜期"""
+    try:
+        collected_at = datetime.fromisoformat(record.get('collected_at', ''))
+    except (TypeError, ValueError):
+        return True
+    return now - collected_at > max_age
+
+def plan_incremental_crawl(game_urls: List[str], existing: Dict[str, Dict[str, Any]],
+                           max_age: timedelta) -> Tuple[List[str], List[str]]:
+    """计算需要爬取的URL，返回 (新增URL, 过期URL)"""
+    now = datetime.now()
+    new_urls = []
+    stale_urls = []
+
+    for url in dict.fromkeys(game_urls):
+        record = existing.get(url)
+        if record is None:
+            new_urls.append(url)
+        elif _is_stale(record, max_age, now):
+            stale_urls.append(url)
+
+    return new_urls, stale_urls
+
+def merge_step2_records(game_urls: List[str], existing: Dict[str, Dict[str, Any]],
+                        fresh_games: List[DetailedGameInfo], prune: bool = False) -> List[DetailedGameInfo]:
+    """把新爬取的结果合并回已有记录，未变动的记录保持原样"""
+    known_fields = {f.name for f in fields(DetailedGameInfo)}
+    merged: Dict[str, DetailedGameInfo] = {}
+
+    for url, record in existing.items():
+        try:
+            merged[url] = DetailedGameInfo(**{k: v for k, v in record.items() if k in known_fields})
+        except TypeError as e:
+            logger.warning(f"跳过格式不完整的旧记录 {url}: {e}")
+
+    for game in fresh_games:
+        merged[game.url] = game
+
+    # 按第一步的顺序输出，仍在列表中的游戏在前
+    listed = list(dict.fromkeys(game_urls))
+    result = [merged.pop(url) for url in listed if url in merged]
+
+    if prune:
+        if merged:
+            logger.info(f"移除 {len(merged)} 个已不在第一步列表中的游戏")
+    else:
+        result.extend(merged.values())
+
+    return result
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫指标：请求延迟/首字节时间直方图、下载字节数、解析耗时、按状态码的重试和错误计数、队列深度、各阶段耗时
+运行结束时导出 Prometheus 文本格式（node_exporter textfile collector 可直接读取）和 JSON 运行摘要
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from streaming_output import atomic_write_json, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶上限（秒/个），最后隐含 +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PARSE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+DEPTH_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+FETCH_SECONDS = 'scraper_fetch_seconds'
+TTFB_SECONDS = 'scraper_ttfb_seconds'
+RESPONSE_BYTES = 'scraper_response_bytes_total'
+RESPONSES = 'scraper_responses_total'
+RETRIES = 'scraper_retries_total'
+ERRORS = 'scraper_errors_total'
+PARSE_SECONDS = 'scraper_parse_seconds'
+QUEUE_DEPTH = 'scraper_queue_depth'
+QUEUE_DEPTH_SAMPLES = 'scraper_queue_depth_samples'
+ITEMS = 'scraper_items_total'
+FETCH_TIERS = 'scraper_fetch_tier_total'
+STAGE_SECONDS = 'scraper_stage_duration_seconds'
+STAGE_ITEMS_PER_SECOND = 'scraper_stage_items_per_second'
+RUN_SECONDS = 'scraper_run_duration_seconds'
+LAST_RUN = 'scraper_last_run_timestamp_seconds'
+
+# 指标名 -> (类型, 说明, 直方图桶)
+METRICS: Dict[str, Tuple[str, str, Optional[Tuple[float, ...]]]] = {
+    FETCH_SECONDS: ('histogram', '单次HTTP请求耗时（发出请求到读完响应体，秒）', LATENCY_BUCKETS),
+    TTFB_SECONDS: ('histogram', '首字节时间（发出请求到收到响应头，秒）', LATENCY_BUCKETS),
+    RESPONSE_BYTES: ('counter', '下载的响应体字节数', None),
+    RESPONSES: ('counter', '收到的HTTP响应数（按状态码）', None),
+    RETRIES: ('counter', '重试次数（按触发重试的状态码，connection 表示连接错误/超时）', None),
+    ERRORS: ('counter', '重试后仍然失败的请求数（按状态码）', None),
+    PARSE_SECONDS: ('histogram', '页面解析耗时（秒）', PARSE_BUCKETS),
+    QUEUE_DEPTH: ('gauge', '队列当前深度', None),
+    QUEUE_DEPTH_SAMPLES: ('histogram', '每次入队后的队列深度分布', DEPTH_BUCKETS),
+    ITEMS: ('counter', '处理的游戏数（按结果）', None),
+    FETCH_TIERS: ('counter', '分级抓取各级别的页面数（http/browser，按结果 ok/escalated/fallback/error）', None),
+    STAGE_SECONDS: ('gauge', '各阶段耗时（秒）', None),
+    STAGE_ITEMS_PER_SECOND: ('gauge', '各阶段吞吐（游戏/秒）', None),
+    RUN_SECONDS: ('gauge', '本次运行总耗时（秒）', None),
+    LAST_RUN: ('gauge', '本次运行结束时间（Unix时间戳）', None),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Histogram:
+    """固定桶直方图（与 Prometheus 的累积桶语义一致）"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """按桶线性插值估算分位数（q 取 0~1），超出最后一个桶时返回最大值"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.max
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = min(self.buckets[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "max": round(self.max, 6)
+        }
+
+class StageTimer:
+    """阶段计时：退出时记录耗时和吞吐
+
+    处理的游戏数取调用方设置的 items；未设置时取阶段内 scraper_items_total{stage=..., result="ok"} 的增量
+    """
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.items = 0
+        self._items_at_start = registry.get(ITEMS, stage=stage, result='ok')
+        self.started = time.perf_counter()
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.started
+        items = self.items or self.registry.get(ITEMS, stage=self.stage, result='ok') - self._items_at_start
+        self.registry.set(STAGE_SECONDS, elapsed, stage=self.stage)
+        self.registry.set(STAGE_ITEMS_PER_SECOND, items / elapsed if elapsed > 0 else 0.0, stage=self.stage)
+        logger.info(f"⏱️ 阶段 {self.stage} 用时 {elapsed:.2f} 秒"
+                    + (f"，{items:g} 个游戏（{items / elapsed:.1f} 个/秒）" if items and elapsed else ""))
+
+class MetricsRegistry:
+    """线程安全的指标注册表：计数器、仪表和直方图，按标签区分"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._values: Dict[str, Dict[LabelKey, Any]] = {name: {} for name in METRICS}
+            self.started_at = datetime.now()
+            self._started = time.perf_counter()
+
+    def _check(self, name: str, kind: str):
+        if METRICS[name][0] != kind:
+            raise ValueError(f"指标 {name} 的类型是 {METRICS[name][0]}，不是 {kind}")
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器增加 value"""
+        self._check(name, 'counter')
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """设置仪表的当前值"""
+        self._check(name, 'gauge')
+        with self._lock:
+            self._values[name][_label_key(labels)] = value
+
+    def get(self, name: str, **labels) -> float:
+        """计数器或仪表的当前值（不存在时为0）"""
+        with self._lock:
+            value = self._values[name].get(_label_key(labels), 0)
+        return value.count if isinstance(value, Histogram) else value
+
+    def observe(self, name: str, value: float, **labels):
+        """向直方图记录一次观测值"""
+        self._check(name, 'histogram')
+        key = _label_key(labels)
+        with self._lock:
+            histogram = self._values[name].get(key)
+            if histogram is None:
+                histogram = self._values[name][key] = Histogram(METRICS[name][2])
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """把代码块的耗时记录到直方图"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[StageTimer]:
+        """记录一个阶段的耗时和吞吐：with metrics.stage('step1') as timer: ...; timer.items = n"""
+        timer = StageTimer(self, stage)
+        try:
+            yield timer
+        finally:
+            timer.finish()
+
+    def record_queue_depth(self, queue_name: str, depth: int):
+        """记录队列深度（当前值 + 分布）"""
+        self.set(QUEUE_DEPTH, depth, queue=queue_name)
+        self.observe(QUEUE_DEPTH_SAMPLES, depth, queue=queue_name)
+
+    def _finish_run(self):
+        self.set(RUN_SECONDS, time.perf_counter() - self._started)
+        self.set(LAST_RUN, time.time())
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, _) in METRICS.items():
+                series = self._values[name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if kind != 'histogram':
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                        continue
+                    for bound, count in value.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(value.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, job: str) -> Dict[str, Any]:
+        """JSON运行摘要：直方图给出 count/mean/p50/p90/p99/max，计数器和仪表给出各标签的值"""
+        metrics: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for name, (kind, _, _) in METRICS.items():
+                series = self._values[name]
+                if series:
+                    metrics[name] = [
+                        {"labels": dict(key),
+                         **(value.summary() if kind == 'histogram' else {"value": value})}
+                        for key, value in sorted(series.items())
+                    ]
+        return {
+            "job": job,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "metrics": metrics
+        }
+
+    def write(self, job: str, directory: str = '') -> Tuple[str, str]:
+        """原子写入 <job>_metrics.prom 和 <job>_metrics.json，返回两个文件路径"""
+        self._finish_run()
+        target = Path(directory or '.')
+        target.mkdir(parents=True, exist_ok=True)
+        prom_path = str(target / f"{job}_metrics.prom")
+        json_path = str(target / f"{job}_metrics.json")
+        try:
+            atomic_write_text(self.to_prometheus(), prom_path)
+            atomic_write_json(self.summary(job), json_path)
+            logger.info(f"📊 指标已导出到 {prom_path} 和 {json_path}")
+        except Exception as e:
+            logger.error(f"导出指标失败: {e}")
+        return prom_path, json_path
+
+# 进程内共享的默认注册表（各爬虫、合并和更新脚本都写入这里）
+metrics = MetricsRegistry()
@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟源站：提供合成的主页、分类/标签列表页、站点地图、N 个带 __NEXT_DATA__ 的详情页及其 Next.js 数据路由
+可配置响应延迟分布、错误率、429比例和gzip，用于在不访问真实站点的情况下对完整爬虫流程做负载测试
+
+用法：
+    python mock_origin_server.py serve --games 10000 --latency lognormal:80:0.5 --error-rate 0.01
+    python mock_origin_server.py loadtest --games 10000 --engine async --concurrency 200
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from benchmarks.fixtures import next_data_game, synthesize_detail_page
+from rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+SCRAPER_DIR = Path(__file__).resolve().parent
+
+CATEGORIES = ['Action', 'Racing', 'Puzzle', 'Adventure', 'Sports', 'Strategy']
+ADJECTIVES = ['Super', 'Mega', 'Tiny', 'Crazy', 'Space', 'Pixel', 'Turbo', 'Ninja', 'Zombie', 'Royal', 'Neon', 'Epic']
+NOUNS = ['Racer', 'Runner', 'Tower', 'Blocks', 'Drift', 'Jump', 'Defense', 'Quest', 'Battle', 'Farm', 'Parking', 'Shooter']
+FEATURES = ['WASD 或方向键移动', '鼠标点击操作', '空格键跳跃', '支持多人对战', '自动保存进度',
+            '全屏模式', '排行榜', '每日挑战']
+TAGS = ['3D', 'Multiplayer', 'Car', 'Io', 'Shooting', 'Casual', 'Physics', 'Pixel', 'Mouse', 'Keyboard']
+
+# 每个子站点地图包含的URL数
+SITEMAP_CHUNK = 5000
+# 故障注入时返回的服务器错误
+ERROR_STATUSES = [500, 502, 503]
+
+def tag_slug(name: str) -> str:
+    return name.lower().replace(' ', '-')
+
+def mock_game(index: int, base_url: str = "") -> Dict[str, Any]:
+    """第 index 个模拟游戏（确定性生成，字段与第二步结果记录一致）"""
+    rng = random.Random(index)
+    title = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index + 1}"
+    slug = tag_slug(title)
+    category = CATEGORIES[index % len(CATEGORIES)]
+    return {
+        "title": title,
+        "url": f"{base_url}/game/{slug}",
+        "iframe_url": f"https://games.crazygames.com/en_US/{slug}/index.html",
+        "description": f"{title} is a free online {category.lower()} game. "
+                       f"Play it in your browser on desktop and mobile without downloads.",
+        "features": rng.sample(FEATURES, 3),
+        "favorites": rng.randint(0, 5000),
+        "likes": rng.randint(0, 50000),
+        "duration": "5-10 分钟",
+        "tags": [category] + rng.sample(TAGS, 2),
+        "category": category,
+        "collected_at": ""
+    }
+
+@dataclass
+class LatencyDistribution:
+    """响应延迟分布（毫秒）：fixed:50、uniform:20:200、normal:100:30、lognormal:80:0.6、exponential:100"""
+    kind: str = 'fixed'
+    params: Tuple[float, ...] = (0.0,)
+
+    ARITY = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyDistribution':
+        kind, *values = spec.strip().split(':')
+        if not values:
+            # 只写数字时视为固定延迟
+            kind, values = 'fixed', [kind]
+        if cls.ARITY.get(kind) != len(values):
+            raise ValueError(f"无效的延迟分布: {spec}")
+        return cls(kind, tuple(float(value) for value in values))
+
+    def sample(self, rng: random.Random) -> float:
+        """采样一次延迟，返回秒数"""
+        if self.kind == 'uniform':
+            ms = rng.uniform(*self.params)
+        elif self.kind == 'normal':
+            ms = rng.gauss(*self.params)
+        elif self.kind == 'lognormal':
+            median, sigma = self.params
+            ms = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        elif self.kind == 'exponential':
+            ms = rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        else:
+            ms = self.params[0]
+        return max(0.0, ms) / 1000
+
+    def __str__(self) -> str:
+        return ':'.join([self.kind] + [f"{value:g}" for value in self.params])
+
+@dataclass
+class MockOriginConfig:
+    """模拟源站配置"""
+    games: int = 1000
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    error_rate: float = 0.0          # 返回 5xx 的请求比例
+    throttle_rate: float = 0.0       # 返回 429 的请求比例
+    retry_after: int = 1             # 429 响应的 Retry-After 秒数
+    gzip: bool = True                # 客户端接受时压缩响应
+    fallback_rate: float = 0.0       # 不带 __NEXT_DATA__ 的详情页比例（走选择器回退路径）
+    padding_kb: int = 32             # 详情页填充大小，使页面接近真实大小
+    homepage_games: int = 0          # 主页列出的游戏数，0 表示全部
+    page_size: int = 60              # 列表页每页游戏数
+    build_id: str = "mock-build"     # 主页 __NEXT_DATA__ 中的 buildId
+    rotate_build_every: int = 0      # 每处理多少个数据路由请求换一次 buildId（模拟重新部署），0 表示不换
+    seed: int = 0
+
+class MockCatalog:
+    """模拟站点内容：按需生成页面并缓存最近使用的结果"""
+
+    def __init__(self, config: MockOriginConfig):
+        self.config = config
+        self.games = [mock_game(i) for i in range(config.games)]
+        self.by_slug = {game['url'].rsplit('/', 1)[-1]: i for i, game in enumerate(self.games)}
+        self.by_category: Dict[str, List[int]] = {}
+        self.by_tag: Dict[str, List[int]] = {}
+        for i, game in enumerate(self.games):
+            self.by_category.setdefault(tag_slug(game['category']), []).append(i)
+            for tag in game['tags']:
+                self.by_tag.setdefault(tag_slug(tag), []).append(i)
+        # 各子站点地图的 lastmod：越靠后的游戏越新
+        self.updated_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def lastmod(self, index: int) -> str:
+        return (self.updated_at + timedelta(hours=index)).isoformat()
+
+    def _card(self, index: int) -> str:
+        game = self.games[index]
+        slug = game['url'].rsplit('/', 1)[-1]
+        return (f'<div class="game-card"><a href="/game/{slug}">'
+                f'<img src="https://imgs.crazygames.com/{slug}/cover.png?width=273" alt="{game["title"]}">'
+                f'<span class="title">{game["title"]}</span></a></div>')
+
+    def _page(self, title: str, body: str) -> bytes:
+        nav = "".join(f'<a href="/c/{tag_slug(category)}">{category}</a>' for category in CATEGORIES)
+        return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{title}</title></head>'
+                f'<body><nav>{nav}</nav><main>{body}</main></body></html>').encode('utf-8')
+
+    @lru_cache(maxsize=16)
+    def homepage(self, build_id: str) -> bytes:
+        count = self.config.homepage_games or len(self.games)
+        next_data = json.dumps({"props": {"pageProps": {}}, "page": "/", "query": {}, "buildId": build_id})
+        return self._page('Free Online Games',
+                          "".join(self._card(i) for i in range(min(count, len(self.games))))
+                          + f'<script id="__NEXT_DATA__" type="application/json">{next_data}</script>')
+
+    @lru_cache(maxsize=4096)
+    def listing(self, kind: str, slug: str, page: int) -> Optional[bytes]:
+        """分类（c）或标签（t）列表页，带下一页链接"""
+        indexes = (self.by_category if kind == 'c' else self.by_tag).get(slug)
+        if not indexes:
+            return None
+        size = self.config.page_size
+        start = (page - 1) * size
+        if start >= len(indexes) and page > 1:
+            return None
+        cards = "".join(self._card(i) for i in indexes[start:start + size])
+        if start + size < len(indexes):
+            cards += f'<a class="next-page" href="/{kind}/{slug}?page={page + 1}">Next</a>'
+        return self._page(f'{slug} games - page {page}', cards)
+
+    @lru_cache(maxsize=2048)
+    def detail(self, slug: str) -> Optional[bytes]:
+        index = self.by_slug.get(slug)
+        if index is None:
+            return None
+        next_data = random.Random(f"{self.config.seed}:{index}").random() >= self.config.fallback_rate
+        return synthesize_detail_page(self.games[index], next_data, self.config.padding_kb)
+
+    @lru_cache(maxsize=2048)
+    def data_route(self, slug: str) -> Optional[bytes]:
+        """详情页的 Next.js 数据路由JSON（getServerSideProps 的返回值）"""
+        index = self.by_slug.get(slug)
+        if index is None:
+            return None
+        return json.dumps({"pageProps": {"game": next_data_game(self.games[index])}, "__N_SSP": True},
+                          ensure_ascii=False).encode('utf-8')
+
+    def robots(self, origin: str) -> bytes:
+        return f"User-agent: *\nAllow: /\nSitemap: {origin}/sitemap.xml\n".encode('utf-8')
+
+    def sitemap_index(self, origin: str) -> bytes:
+        chunks = range(0, len(self.games), SITEMAP_CHUNK)
+        entries = "".join(
+            f"<sitemap><loc>{origin}/sitemaps/games-{n}.xml.gz</loc>"
+            f"<lastmod>{self.lastmod(min(start + SITEMAP_CHUNK, len(self.games)) - 1)}</lastmod></sitemap>"
+            for n, start in enumerate(chunks))
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f'{entries}</sitemapindex>').encode('utf-8')
+
+    def sitemap_chunk(self, origin: str, n: int) -> Optional[bytes]:
+        start = n * SITEMAP_CHUNK
+        if n < 0 or start >= len(self.games):
+            return None
+        entries = []
+        for i in range(start, min(start + SITEMAP_CHUNK, len(self.games))):
+            game = self.games[i]
+            slug = game['url'].rsplit('/', 1)[-1]
+            entries.append(f"<url><loc>{origin}/game/{slug}</loc><lastmod>{self.lastmod(i)}</lastmod>"
+                           f"<image:image><image:loc>https://imgs.crazygames.com/{slug}/cover.png</image:loc>"
+                           f"<image:title>{game['title']}</image:title></image:image></url>")
+        xml = ('<?xml version="1.0" encoding="UTF-8"?>'
+               '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+               'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">'
+               + "".join(entries) + '</urlset>')
+        return gzip.compress(xml.encode('utf-8'))
+
+class MockOriginHandler(BaseHTTPRequestHandler):
+    """请求处理：先注入延迟和故障，再按路径返回页面"""
+
+    protocol_version = 'HTTP/1.1'
+    server: 'MockOriginServer'
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/__stats':
+            self._send(200, json.dumps(self.server.snapshot()).encode('utf-8'), 'application/json')
+            return
+
+        config = self.server.config
+        time.sleep(config.latency.sample(self.server.rng))
+        roll = self.server.rng.random()
+        if roll < config.throttle_rate:
+            self._send(429, b'Too Many Requests', 'text/plain', {'Retry-After': str(config.retry_after)})
+            return
+        if roll < config.throttle_rate + config.error_rate:
+            self._send(self.server.rng.choice(ERROR_STATUSES), b'Server Error', 'text/plain')
+            return
+
+        body, content_type = self._route(parsed.path.rstrip('/') or '/', parse_qs(parsed.query))
+        if body is None:
+            self._send(404, b'Not Found', 'text/plain')
+        else:
+            self._send(200, body, content_type)
+
+    def _route(self, path: str, query: Dict[str, List[str]]) -> Tuple[Optional[bytes], str]:
+        catalog = self.server.catalog
+        origin = f"http://{self.headers.get('Host', '%s:%s' % self.server.server_address[:2])}"
+        parts = path.strip('/').split('/')
+        if path == '/':
+            return catalog.homepage(self.server.build_id()), 'text/html; charset=utf-8'
+        if len(parts) == 5 and parts[:2] == ['_next', 'data'] and parts[3] == 'game' and parts[4].endswith('.json'):
+            # 旧 buildId 的数据路由返回404，与真实站点重新部署后一致
+            if parts[2] != self.server.build_id(data_request=True):
+                return None, ''
+            return catalog.data_route(parts[4][:-len('.json')]), 'application/json'
+        if path == '/robots.txt':
+            return catalog.robots(origin), 'text/plain'
+        if path == '/sitemap.xml':
+            return catalog.sitemap_index(origin), 'application/xml'
+        if len(parts) == 2 and parts[0] == 'game':
+            return catalog.detail(parts[1]), 'text/html; charset=utf-8'
+        if len(parts) in (2, 3) and parts[0] in ('c', 't'):
+            try:
+                page = int(parts[2] if len(parts) == 3 else query.get('page', ['1'])[0])
+            except ValueError:
+                return None, ''
+            return catalog.listing(parts[0], parts[1], max(1, page)), 'text/html; charset=utf-8'
+        if len(parts) == 2 and parts[0] == 'sitemaps' and parts[1].startswith('games-'):
+            try:
+                n = int(parts[1][len('games-'):].split('.')[0])
+            except ValueError:
+                return None, ''
+            return catalog.sitemap_chunk(origin, n), 'application/gzip'
+        return None, ''
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        encoded = (self.server.config.gzip
+                   and content_type.startswith(('text/html', 'application/xml', 'application/json'))
+                   and 'gzip' in self.headers.get('Accept-Encoding', ''))
+        if encoded:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoded:
+            self.send_header('Content-Encoding', 'gzip')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record(status, len(body))
+
+    def log_message(self, format, *args):
+        # 高并发下逐条访问日志会拖慢源站，只保留统计
+        pass
+
+class MockOriginServer(ThreadingHTTPServer):
+    """多线程模拟源站，每个连接一个线程，支持keep-alive"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address: Tuple[str, int], config: MockOriginConfig):
+        super().__init__(address, MockOriginHandler)
+        self.config = config
+        self.catalog = MockCatalog(config)
+        self.rng = random.Random(config.seed)
+        self.started = time.monotonic()
+        self.statuses: Counter = Counter()
+        self.bytes_sent = 0
+        self.data_requests = 0
+        self._lock = threading.Lock()
+
+    def build_id(self, data_request: bool = False) -> str:
+        """当前 buildId；配置了 rotate_build_every 时每处理这么多个数据路由请求换一次"""
+        with self._lock:
+            count = self.data_requests
+            if data_request:
+                self.data_requests += 1
+        if self.config.rotate_build_every <= 0:
+            return self.config.build_id
+        return f"{self.config.build_id}-{count // self.config.rotate_build_every}"
+
+    def record(self, status: int, size: int):
+        with self._lock:
+            self.statuses[status] += 1
+            self.bytes_sent += size
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": sum(self.statuses.values()),
+                "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+                "bytes_sent": self.bytes_sent,
+                "uptime": round(time.monotonic() - self.started, 3)
+            }
+
+class TimedRateLimiter(RateLimiter):
+    """记录每个页面请求的客户端耗时（含限速等待与重试），供负载测试统计尾延迟"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    def request(self, session, url: str, headers: Optional[Dict[str, str]] = None, stage: str = 'http'):
+        started = time.perf_counter()
+        try:
+            return super().request(session, url, headers, stage)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    async def fetch_async(self, session, url: str, headers: Optional[Dict[str, str]] = None,
+                          stage: str = 'http'):
+        started = time.perf_counter()
+        try:
+            return await super().fetch_async(session, url, headers, stage)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+def add_origin_arguments(parser: argparse.ArgumentParser):
+    """serve 和 loadtest 共用的源站参数"""
+    parser.add_argument('--games', type=int, default=1000, help='模拟目录中的游戏数')
+    parser.add_argument('--latency', type=LatencyDistribution.parse, default=LatencyDistribution(),
+                        help='响应延迟分布（毫秒），例如 fixed:50、uniform:20:200、lognormal:80:0.6、exponential:100')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 5xx 的请求比例')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='返回 429 的请求比例')
+    parser.add_argument('--retry-after', type=int, default=1, help='429 响应的 Retry-After 秒数')
+    parser.add_argument('--no-gzip', action='store_true', help='不压缩响应')
+    parser.add_argument('--fallback-rate', type=float, default=0.0,
+                        help='不带 __NEXT_DATA__ 的详情页比例（走选择器回退解析）')
+    parser.add_argument('--padding-kb', type=int, default=32, help='详情页填充大小（KB）')
+    parser.add_argument('--homepage-games', type=int, default=0, help='主页列出的游戏数，0 表示全部')
+    parser.add_argument('--rotate-build-every', type=int, default=0,
+                        help='每处理多少个数据路由请求换一次 Next.js buildId（模拟重新部署），0 表示不换')
+    parser.add_argument('--seed', type=int, default=0, help='故障注入的随机种子')
+
+def origin_config(args: argparse.Namespace) -> MockOriginConfig:
+    return MockOriginConfig(games=args.games, latency=args.latency, error_rate=args.error_rate,
+                            throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+                            gzip=not args.no_gzip, fallback_rate=args.fallback_rate,
+                            padding_kb=args.padding_kb, homepage_games=args.homepage_games,
+                            rotate_build_every=args.rotate_build_every, seed=args.seed)
+
+def origin_argv(args: argparse.Namespace) -> List[str]:
+    """把源站参数转换回命令行，用于在子进程中启动源站"""
+    return ['--games', str(args.games), '--latency', str(args.latency),
+            '--error-rate', str(args.error_rate), '--throttle-rate', str(args.throttle_rate),
+            '--retry-after', str(args.retry_after), '--fallback-rate', str(args.fallback_rate),
+            '--padding-kb', str(args.padding_kb), '--homepage-games', str(args.homepage_games),
+            '--rotate-build-every', str(args.rotate_build_every), '--seed', str(args.seed)] + (['--no-gzip'] if args.no_gzip else [])
+
+def serve(args: argparse.Namespace):
+    config = origin_config(args)
+    server = MockOriginServer((args.host, args.port), config)
+    host, port = server.server_address[:2]
+    logger.info(f"🧪 模拟源站已启动: http://{host}:{port}（{config.games} 个游戏，延迟 {config.latency}，"
+                f"错误率 {config.error_rate:.1%}，429比例 {config.throttle_rate:.1%}，"
+                f"gzip {'开' if config.gzip else '关'}）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            if requests.get(f"{base_url}/__stats", timeout=1).ok:
+                return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩分位数"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+def _cpu_seconds() -> float:
+    """本进程及已回收子进程（解析进程池）的CPU时间"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def _redirect_file_logs(path: Path) -> Tuple[List[logging.Handler], logging.Handler]:
+    """把根日志器的文件handler换成写入 path 的handler，返回 (原来的handler, 新handler) 供恢复"""
+    root = logging.getLogger()
+    originals = [handler for handler in root.handlers if isinstance(handler, logging.FileHandler)]
+    replacement = logging.FileHandler(path, encoding='utf-8')
+    if originals:
+        replacement.setFormatter(originals[0].formatter)
+        replacement.setLevel(originals[0].level)
+    for handler in originals:
+        root.removeHandler(handler)
+    root.addHandler(replacement)
+    return originals, replacement
+
+def _restore_file_logs(originals: List[logging.Handler], replacement: logging.Handler):
+    root = logging.getLogger()
+    root.removeHandler(replacement)
+    replacement.close()
+    for handler in originals:
+        root.addHandler(handler)
+
+def load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    """在子进程中启动模拟源站，对其运行完整的两步流程，返回负载测试报告"""
+    from crawl_state import DONE, FAILED
+    from run_scraper import ScraperRunner
+    from scraper_config import load_config
+
+    if not args.verbose:
+        # 逐条的爬取日志在上万个页面时本身就是瓶颈（须在爬虫模块配置日志之后设置）
+        logging.getLogger().setLevel(logging.WARNING)
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen([sys.executable, str(SCRAPER_DIR / 'mock_origin_server.py'), 'serve',
+                               '--host', '127.0.0.1', '--port', str(port)] + origin_argv(args),
+                              cwd=str(SCRAPER_DIR))
+    workdir = tempfile.TemporaryDirectory(prefix='scraper-loadtest-') if not args.workdir else None
+    original_cwd = os.getcwd()
+    log_handlers = None
+    try:
+        if not _wait_ready(base_url, server):
+            raise RuntimeError("模拟源站启动失败")
+
+        config = load_config(args.config)
+        config['scraper'].update({
+            "base_url": base_url,
+            "rate_per_host": args.rate,
+            "burst": args.burst,
+            "max_workers": args.workers,
+            "backoff_base": args.backoff_base
+        })
+        limiter = TimedRateLimiter.from_config(config)
+
+        # 输出文件、状态库和调试HTML都写到工作目录，不覆盖真实数据
+        run_dir = Path(args.workdir or workdir.name).resolve()
+        run_dir.mkdir(parents=True, exist_ok=True)
+        os.chdir(run_dir)
+        # run_scraper 导入时已把日志文件绑定到 scraper/scraper.log（纳入版本控制），改为写到工作目录
+        log_handlers = _redirect_file_logs(run_dir / 'scraper.log')
+        runner = ScraperRunner(engine=args.engine, concurrency=args.concurrency, per_host_limit=args.per_host,
+                               pipeline=args.pipeline, discover=args.discover,
+                               parse_processes=args.parse_processes, limiter=limiter,
+                               data_route=args.data_route, config=config)
+
+        cpu_started = _cpu_seconds()
+        started = time.perf_counter()
+        success = runner.run_real_mode(args.games)
+        elapsed = time.perf_counter() - started
+        cpu = _cpu_seconds() - cpu_started
+        origin = requests.get(f"{base_url}/__stats", timeout=5).json()
+        counts = runner.state_store().summary()
+        runner.write_metrics()
+
+        latencies = sorted(limiter.latencies)
+        pages = counts[DONE]
+        return {
+            "success": success,
+            "games": args.games,
+            "engine": args.engine,
+            "pipeline": args.pipeline,
+            "discover": args.discover,
+            "data_route": args.data_route,
+            "concurrency": args.concurrency if args.engine == 'async' else args.workers,
+            "parse_processes": runner.step2_scraper.parse_processes,
+            "origin": str(origin_config(args).latency),
+            "elapsed_s": round(elapsed, 3),
+            "pages_done": pages,
+            "pages_failed": counts[FAILED],
+            "requests": origin['requests'],
+            "requests_per_s": round(origin['requests'] / elapsed, 1) if elapsed else 0.0,
+            "pages_per_s": round(pages / elapsed, 1) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 1),
+                "p90": round(percentile(latencies, 90) * 1000, 1),
+                "p99": round(percentile(latencies, 99) * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1) if latencies else 0.0
+            },
+            "cpu_s": round(cpu, 3),
+            "cpu_ms_per_page": round(cpu * 1000 / pages, 3) if pages else 0.0,
+            "retries": limiter.stats['retries'],
+            "throttled": limiter.stats['throttled'],
+            "origin_statuses": origin['statuses'],
+            "origin_mb_sent": round(origin['bytes_sent'] / 1024 / 1024, 2)
+        }
+    finally:
+        if log_handlers:
+            _restore_file_logs(*log_handlers)
+        os.chdir(original_cwd)
+        server.terminate()
+        server.wait()
+        if workdir:
+            workdir.cleanup()
+
+def load_test_main(args: argparse.Namespace) -> Dict[str, Any]:
+    """运行负载测试并打印报告"""
+    report = load_test(args)
+    latency = report['latency_ms']
+    print("📈 负载测试结果")
+    print("=" * 50)
+    print(f"   游戏数: {report['games']}（完成 {report['pages_done']}，失败 {report['pages_failed']}）")
+    print(f"   引擎: {report['engine']}，并发 {report['concurrency']}，解析进程 {report['parse_processes']}，"
+          f"流水线 {'开' if report['pipeline'] else '关'}，发现方式 {report['discover']}，"
+          f"数据路由 {'开' if report['data_route'] else '关'}")
+    print(f"   总耗时: {report['elapsed_s']} 秒")
+    print(f"   吞吐: {report['requests_per_s']} 请求/秒，{report['pages_per_s']} 页面/秒")
+    print(f"   请求耗时: p50 {latency['p50']} ms，p90 {latency['p90']} ms，p99 {latency['p99']} ms，"
+          f"最大 {latency['max']} ms")
+    print(f"   CPU: 共 {report['cpu_s']} 秒，每页 {report['cpu_ms_per_page']} ms")
+    print(f"   源站发送: {report['origin_mb_sent']} MB")
+    print(f"   重试 {report['retries']} 次，被限流 {report['throttled']} 次，源站状态码 {report['origin_statuses']}")
+    return report
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地模拟源站与负载测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='启动模拟源站')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8800)
+    add_origin_arguments(serve_parser)
+
+    test_parser = subparsers.add_parser('loadtest', help='启动模拟源站并对其运行完整的两步流程')
+    add_origin_arguments(test_parser)
+    test_parser.add_argument('--engine', choices=['thread', 'async'], default='thread', help='第二步爬取引擎')
+    test_parser.add_argument('--workers', type=int, default=20, help='线程引擎的工作线程数')
+    test_parser.add_argument('--concurrency', type=int, default=200, help='异步引擎的总并发请求数')
+    test_parser.add_argument('--per-host', type=int, default=50, help='异步引擎的单主机并发上限')
+    test_parser.add_argument('--parse-processes', type=int, default=0, help='第二步解析进程数')
+    test_parser.add_argument('--pipeline', action='store_true', help='第一步与第二步流水线运行')
+    test_parser.add_argument('--discover', choices=['homepage', 'frontier', 'sitemap'], default='homepage',
+                             help='第一步发现方式')
+    test_parser.add_argument('--data-route', action='store_true', help='第二步请求 Next.js 数据路由而不是HTML')
+    test_parser.add_argument('--rate', type=float, default=10000.0, help='单主机限速（请求/秒）')
+    test_parser.add_argument('--burst', type=int, default=1000, help='令牌桶容量')
+    test_parser.add_argument('--backoff-base', type=float, default=0.1, help='重试退避基数（秒）')
+    test_parser.add_argument('--config', default='config.json', help='配置文件路径')
+    test_parser.add_argument('--workdir', help='输出文件目录（默认临时目录，结束后删除）')
+    test_parser.add_argument('--report', help='负载测试报告JSON输出路径')
+    test_parser.add_argument('--verbose', action='store_true', help='输出爬虫的INFO日志')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        serve(args)
+        return
+
+    report = load_test_main(args)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not report['success']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
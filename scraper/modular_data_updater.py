@@ -4,13 +4,23 @@
 模块化数据更新器：只更新 gamesData.ts 文件，不修改页面结构
 """
 
+import argparse
+import hashlib
 import json
 import logging
 import re
+import shutil
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Set
 from datetime import datetime
 
+from game_codec import BLANK_IFRAME_SRC, GameEncoder, default_iframe_src, iframe_html
+from game_shards import (DEFAULT_MANIFEST_PATH, DEFAULT_MAX_SHARD_BYTES, DEFAULT_SHARD_DIR, StagedShards,
+                         load_shard_games, shard_games, stage_shards)
+from metrics import metrics
+from streaming_output import atomic_write_chunks, iter_jsonl
+from ts_scanner import GamesDataScan, scan_games_data
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -18,16 +28,83 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# gamesData 字段 -> 爬虫记录中的来源字段，增量更新时只合并这些字段
+# id、playCount、addedAt 是站内编号、统计和首次收录时间，不来自爬虫数据，始终保留；
+# controls 以及来源缺失时的值都由转换器生成，不能覆盖现有记录
+SCRAPED_FIELDS = {
+    'title': ('title',),
+    'image': ('cover_image', 'image'),
+    'description': ('description',),
+    'features': ('features',),
+    'isNew': ('is_new',),
+    'iframe': ('iframe_url',),
+    'category': ('category',),
+    'likes': ('likes',),
+    'favorites': ('favorites',),
+    'duration': ('duration',),
+}
+
+# 分片模式下仍然打包进 gamesData.ts 的游戏数（首屏），其余游戏只在分片中
+BUNDLED_GAMES = 50
+
+GAME_URL_SLUG = re.compile(r'/game/([^/?#]+)')
+IFRAME_SLUG = re.compile(r'/en_US/([^/?#"\\]+)/')
+
+def game_slug(game: Dict[str, Any]) -> str:
+    """游戏的稳定标识：slug 字段，旧记录没有时从 iframe 地址中取，都没有时由标题生成"""
+    if game.get('slug'):
+        return game['slug']
+    match = IFRAME_SLUG.search(game.get('iframe', ''))
+    if match:
+        return match.group(1)
+    return re.sub(r'[^a-z0-9]+', '-', game.get('title', '').lower()).strip('-')
+
+def scraped_fields(record: Dict[str, Any]) -> Set[str]:
+    """爬虫记录中真正给出（存在且非空）的 gamesData 字段"""
+    return {field for field, keys in SCRAPED_FIELDS.items()
+            if any(record.get(key) not in (None, '', [], {}) for key in keys)}
+
+def parse_games_array(content: str) -> Optional[List[Dict[str, Any]]]:
+    """读取 gamesData.ts 中现有的 games 记录（普通数组或紧凑编码），找不到声明或无法解码时返回 None"""
+    scan = scan_games_data(content)
+    if scan.span is None:
+        logger.error("未找到 games 数组声明")
+    for error in scan.errors:
+        logger.error(error)
+    return scan.games if scan.span is not None and not scan.errors else None
+
+def _ts_string(value: Any) -> str:
+    """双引号字符串字面量（JSON 字符串同时也是合法的 TS 字符串）"""
+    return json.dumps(str(value), ensure_ascii=False)
+
+def _ts_template(value: str) -> str:
+    """模板字符串的内容：转义反斜杠、反引号和 ${，双引号照旧写成 \\" """
+    return (value.replace('\\', '\\\\').replace('`', '\\`').replace('${', '\\${')
+            .replace('"', '\\"'))
+
 class ModularDataUpdater:
     """模块化数据更新器 - 只更新 gamesData.ts 文件"""
     
-    def __init__(self, games_data_path: str = "../src/data/gamesData.ts"):
+    def __init__(self, games_data_path: str = "../src/data/gamesData.ts", shard_dir: str = DEFAULT_SHARD_DIR,
+                 manifest_path: str = DEFAULT_MANIFEST_PATH, max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+                 bundled_games: int = BUNDLED_GAMES, compact: bool = False):
         self.games_data_path = Path(games_data_path)
         self.backup_path = self.games_data_path.with_suffix('.ts.backup')
+        self.shard_dir = shard_dir
+        self.manifest_path = Path(manifest_path)
+        self.max_shard_bytes = max_shard_bytes
+        self.bundled_games = bundled_games
+        self.compact = compact
     
     def load_scraped_data(self, filename: str) -> List[Dict[str, Any]]:
         """加载爬虫数据"""
         try:
+            # 流式输出的JSONL：每行一个游戏
+            if filename.endswith('.jsonl'):
+                games = list(iter_jsonl(filename))
+                logger.info(f"成功加载爬虫数据: {len(games)} 个游戏")
+                return games
+            
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
@@ -76,17 +153,14 @@ class ModularDataUpdater:
                 if '?' not in image:
                     image += '?metadata=none&quality=85&width=273&fit=crop'
             
-            # 生成iframe HTML
-            if iframe_url:
-                iframe_html = f'<iframe src="{iframe_url}" style="width: 100%; height: 100%;" frameborder="0" allow="gamepad *;"></iframe>'
-            else:
-                # 从URL生成默认iframe
-                if 'crazygames.com/game/' in url:
-                    game_slug = url.split('/game/')[-1].split('?')[0].split('#')[0]
-                    iframe_url = f"https://games.crazygames.com/en_US/{game_slug}/index.html"
-                    iframe_html = f'<iframe src="{iframe_url}" style="width: 100%; height: 100%;" frameborder="0" allow="gamepad *;"></iframe>'
-                else:
-                    iframe_html = '<iframe src="about:blank" style="width: 100%; height: 100%;" frameborder="0"></iframe>'
+            # 稳定标识：增量更新时按它匹配现有记录
+            slug_match = GAME_URL_SLUG.search(url) or IFRAME_SLUG.search(iframe_url)
+            slug = slug_match.group(1) if slug_match else game_slug({'title': title})
+            
+            # 生成iframe HTML（游戏页没有给出地址时由 slug 推出，都没有时用 about:blank 占位）
+            if not iframe_url and 'crazygames.com/game/' in url:
+                iframe_url = default_iframe_src(slug)
+            iframe_markup = iframe_html(iframe_url or BLANK_IFRAME_SRC)
             
             # 生成控制说明
             controls = self._generate_controls(category, title)
@@ -99,12 +173,13 @@ class ModularDataUpdater:
             # 创建 gamesData.ts 格式的游戏对象
             game_data = {
                 'id': i + 1,
+                'slug': slug,
                 'title': title,
                 'image': image,
                 'description': self._truncate_description(description),
                 'features': features,
                 'isNew': game.get('is_new', True),
-                'iframe': iframe_html,
+                'iframe': iframe_markup,
                 'controls': controls,
                 'category': self._map_category(category),
                 'likes': game.get('likes', 0),
@@ -206,6 +281,55 @@ class ModularDataUpdater:
         
         return truncated + '...'
     
+    def upsert_games(self, existing: List[Dict[str, Any]], games: List[Dict[str, Any]],
+                     scraped_games: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按 slug 把新数据合并进现有记录（games 是 scraped_games 逐条转换的结果）
+        
+        已有游戏保留 id、playCount、addedAt 和原来的位置，只更新爬虫记录中真正给出且有变化的字段，
+        转换器生成的默认值（空图片、默认特性和控制说明等）不会覆盖现有值；
+        新游戏追加到末尾，id 从现有最大值往后编号，addedAt 记为今天；爬虫数据中没有的游戏保持不变
+        """
+        merged = [dict(game) for game in existing]
+        index = {game_slug(game): i for i, game in enumerate(merged)}
+        next_id = max((game.get('id', 0) for game in merged), default=0) + 1
+        today = datetime.now().date().isoformat()
+        added = updated = 0
+        
+        for game, source in zip(games, scraped_games):
+            slug = game_slug(game)
+            position = index.get(slug)
+            if position is None:
+                new_game = dict(game, slug=slug, id=next_id, playCount=0, addedAt=today)
+                next_id += 1
+                index[slug] = len(merged)
+                merged.append(new_game)
+                added += 1
+                continue
+            
+            current = merged[position]
+            sourced = scraped_fields(source)
+            changes = {key: value for key, value in game.items()
+                       if key in sourced and current.get(key) != value}
+            if changes:
+                current.update(changes)
+                updated += 1
+        
+        logger.info(f"增量更新: 新增 {added} 个游戏，更新 {updated} 个，"
+                    f"未变化 {len(merged) - added - updated} 个")
+        return merged
+    
+    def stage_sharded_output(self, games: List[Dict[str, Any]]) -> Optional[StagedShards]:
+        """写入按分类的数据分片并暂存索引清单 gamesManifest.ts，失败时返回 None
+
+        现有清单和它引用的分片保持不变，gamesData.ts 保存成功后再 commit()
+        """
+        try:
+            shards = shard_games(games, self.max_shard_bytes, compact=self.compact)
+            return stage_shards(games, shards, self.shard_dir, str(self.manifest_path))
+        except Exception as e:
+            logger.error(f"写入数据分片失败: {e}")
+            return None
+    
     def load_games_data_file(self) -> str:
         """加载 gamesData.ts 文件内容"""
         try:
@@ -217,161 +341,220 @@ class ModularDataUpdater:
             logger.error(f"加载 gamesData.ts 文件失败: {e}")
             return ""
     
-    def create_backup(self, content: str) -> bool:
-        """创建备份文件"""
+    def create_backup(self) -> bool:
+        """创建备份文件（复制现有的 gamesData.ts）"""
         try:
-            with open(self.backup_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            shutil.copyfile(self.games_data_path, self.backup_path)
             logger.info(f"已创建备份文件: {self.backup_path}")
             return True
         except Exception as e:
             logger.error(f"创建备份文件失败: {e}")
             return False
     
+    def iter_games_data(self, content: str, games: List[Dict[str, Any]],
+                        scan: Optional[GamesDataScan] = None) -> Iterator[str]:
+        """逐块生成新的 gamesData.ts：原文件 games 声明之前的部分、逐个游戏生成的数组代码、声明之后的部分
+        
+        scan 是同一内容的 scan_games_data 结果（已经扫描过时传入，避免再扫描一遍）
+        """
+        scan = scan or scan_games_data(content)
+        if scan.span is None:
+            raise ValueError("未找到 games 数组声明")
+        start, end = scan.span
+        yield content[:start]
+        yield 'export const games: Game[] = '
+        yield from self._iter_compact_games_code(games) if self.compact else self._iter_games_code(games)
+        yield ';'
+        yield content[end:]
+    
     def update_games_array(self, content: str, games: List[Dict[str, Any]]) -> str:
-        """更新 gamesData.ts 中的 games 数组"""
+        """更新 gamesData.ts 中的 games 数组（返回完整内容；写文件时用 save_games_data_file 流式写入）"""
         try:
-            # 生成新的 games 数组代码
-            games_code = self._generate_games_code(games)
-            
-            # 查找并替换 games 数组
-            # 匹配 export const games: Game[] = [...] 模式
-            pattern = r'export\s+const\s+games:\s*Game\[\]\s*=\s*\[.*?\];'
-            
-            # 查找匹配
-            match = re.search(pattern, content, re.DOTALL)
-            if match:
-                # 替换匹配的内容
-                new_content = content[:match.start()] + f'export const games: Game[] = {games_code};' + content[match.end():]
-                logger.info("成功更新 games 数组")
-                return new_content
-            else:
-                logger.error("未找到 games 数组声明")
-                return content
-                
+            new_content = ''.join(self.iter_games_data(content, games))
+            logger.info("成功更新 games 数组")
+            return new_content
         except Exception as e:
             logger.error(f"更新 games 数组失败: {e}")
             return content
     
-    def _generate_games_code(self, games: List[Dict[str, Any]]) -> str:
-        """生成 games 数组的 TypeScript 代码"""
-        games_items = []
-        
-        for game in games:
-            # 处理字符串转义
-            title = game.get('title', '').replace("'", "\\'").replace('"', '\\"')
-            description = game.get('description', '').replace("'", "\\'").replace('"', '\\"')
-            image = game.get('image', '').replace("'", "\\'").replace('"', '\\"')
-            iframe = game.get('iframe', '').replace("'", "\\'").replace('"', '\\"')
-            
+    def _iter_games_code(self, games: List[Dict[str, Any]]) -> Iterator[str]:
+        """逐个游戏生成 games 数组的 TypeScript 代码"""
+        yield "[\n"
+        for i, game in enumerate(games):
             # 处理数组
             features = json.dumps(game.get('features', []), ensure_ascii=False)
             controls = json.dumps(game.get('controls', []), ensure_ascii=False)
             
-            game_item = f"""  {{
-    id: {game.get('id', 0)},
-    title: "{title}",
-    image: "{image}",
-    description: "{description}",
+            # 可选字段
+            slug_line = f'\n    slug: {_ts_string(game["slug"])},' if game.get('slug') else ''
+            added_at_line = f',\n    addedAt: {_ts_string(game["addedAt"])}' if game.get('addedAt') else ''
+            
+            yield (',\n' if i else '') + f"""  {{
+    id: {game.get('id', 0)},{slug_line}
+    title: {_ts_string(game.get('title', ''))},
+    image: {_ts_string(game.get('image', ''))},
+    description: {_ts_string(game.get('description', ''))},
     features: {features},
     isNew: {str(game.get('isNew', False)).lower()},
-    iframe: `{iframe}`,
+    iframe: `{_ts_template(game.get('iframe', ''))}`,
     controls: {controls},
-    category: "{game.get('category', 'other')}",
+    category: {_ts_string(game.get('category', 'other'))},
     playCount: {game.get('playCount', 0)},
     likes: {game.get('likes', 0)},
     favorites: {game.get('favorites', 0)},
-    duration: "{game.get('duration', '5-10 分钟')}"
+    duration: {_ts_string(game.get('duration', '5-10 分钟'))}{added_at_line}
   }}"""
-            
-            games_items.append(game_item)
+        yield "\n]"
+    
+    def _iter_compact_games_code(self, games: List[Dict[str, Any]]) -> Iterator[str]:
+        """逐个游戏生成紧凑编码的 decodeGames({...}) 调用（参数是合法的JSON，每个游戏一行，共享表在最后）"""
+        encoder = GameEncoder()
         
-        return f"[\n{',\n'.join(games_items)}\n]"
+        def dumps(value: Any) -> str:
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        
+        yield 'decodeGames({\n  "games": [\n'
+        for i, game in enumerate(games):
+            yield (',\n' if i else '') + '    ' + dumps(encoder.encode(game))
+        tables = encoder.tables()
+        yield (
+            "\n  ],\n"
+            f'  "features": {dumps(tables["features"])},\n'
+            f'  "controls": {dumps(tables["controls"])}\n'
+            "})"
+        )
+    
+    def _check_and_backup(self, games: List[Dict[str, Any]], tmp_path: str):
+        """替换前的检查：扫描写好的临时文件，结构有问题或游戏数不对时抛出异常（放弃替换），通过后备份旧文件"""
+        with open(tmp_path, 'r', encoding='utf-8') as f:
+            scan = scan_games_data(f.read())
+        if not self.validate_scan(scan):
+            raise ValueError("新生成的 gamesData.ts 验证失败")
+        found = len(scan.games) if scan.games is not None else 0
+        if found != len(games):
+            raise ValueError(f"新生成的 gamesData.ts 中读出 {found} 个游戏，应为 {len(games)} 个")
+        if not self.create_backup():
+            raise OSError(f"无法创建备份文件: {self.backup_path}")
     
-    def save_games_data_file(self, content: str) -> bool:
-        """保存更新后的 gamesData.ts 文件"""
+    def save_games_data_file(self, content: str, games: List[Dict[str, Any]],
+                             scan: Optional[GamesDataScan] = None) -> str:
+        """流式写入新的 gamesData.ts：先写临时文件，复制原文件中 games 声明前后的部分，再原子地重命名
+        
+        生成时内存占用不随游戏数增长，中途崩溃不会留下写了一半的文件；内容与现有文件相同时不备份也不替换。
+        替换前重新扫描临时文件（见 _check_and_backup），验证不通过时保留原文件。
+        返回新内容的 sha256，失败时返回空字符串
+        """
         try:
-            with open(self.games_data_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            logger.info("成功保存 gamesData.ts 文件")
-            return True
+            content_hash = atomic_write_chunks(
+                self.iter_games_data(content, games, scan), str(self.games_data_path),
+                unchanged_sha256=hashlib.sha256(content.encode('utf-8')).hexdigest(),
+                before_replace=lambda tmp_path: self._check_and_backup(games, tmp_path))
+            return content_hash
         except Exception as e:
             logger.error(f"保存 gamesData.ts 文件失败: {e}")
-            return False
+            return ''
     
     def validate_content(self, content: str) -> bool:
-        """验证更新后的内容是否有效"""
-        try:
-            # 检查是否有重复的 games 声明
-            games_declarations = re.findall(r'export\s+const\s+games\s*[:=]', content)
-            if len(games_declarations) > 1:
-                logger.error(f"发现 {len(games_declarations)} 个 games 声明，应该只有1个")
-                return False
-            
-            # 检查是否有语法错误（基本的括号匹配）
-            open_braces = content.count('{')
-            close_braces = content.count('}')
-            if open_braces != close_braces:
-                logger.warning(f"括号不匹配: 开括号 {open_braces}, 闭括号 {close_braces}")
-                # 不将其视为致命错误，因为可能是模板字符串中的括号
-            
-            # 检查是否有重复的 interface 声明
-            interface_declarations = re.findall(r'export\s+interface\s+Game', content)
-            if len(interface_declarations) > 1:
-                logger.error(f"发现 {len(interface_declarations)} 个 Game 接口声明，应该只有1个")
-                return False
-            
-            logger.info("内容验证通过")
-            return True
-            
-        except Exception as e:
-            logger.error(f"内容验证失败: {e}")
+        """验证内容是否有效"""
+        return self.validate_scan(scan_games_data(content))
+    
+    def validate_scan(self, scan: GamesDataScan) -> bool:
+        """根据 scan_games_data 的结果验证文件结构（与定位、读取 games 是同一遍扫描）"""
+        # 字符串/模板字符串/注释未闭合、括号不匹配、games 无法解码
+        for error in scan.errors:
+            logger.error(f"内容验证失败: {error}")
+        if scan.errors:
+            return False
+        
+        # 检查 games 声明（必须恰好1个）
+        if scan.games_declarations != 1:
+            logger.error(f"发现 {scan.games_declarations} 个 games 声明，应该只有1个")
             return False
+        
+        # 检查是否有重复的 interface 声明
+        if scan.game_interfaces > 1:
+            logger.error(f"发现 {scan.game_interfaces} 个 Game 接口声明，应该只有1个")
+            return False
+        
+        logger.info("内容验证通过")
+        return True
     
-    def update_games_data_with_scraped_data(self, scraped_data_file: str) -> bool:
-        """使用爬虫数据更新 gamesData.ts - 模块化版本"""
+    def update_games_data_with_scraped_data(self, scraped_data_file: str, upsert: bool = False,
+                                            sharded: bool = False) -> bool:
+        """使用爬虫数据更新 gamesData.ts - 模块化版本
+        
+        upsert 为 True 时按 slug 增量合并进现有数组（见 upsert_games），否则整体替换；
+        sharded 为 True 时全部游戏写入数据分片和索引清单，gamesData.ts 只保留前 bundled_games 个；
+        生成的内容与现有文件相同时不写文件也不备份
+        """
         try:
             logger.info("开始使用爬虫数据更新 gamesData.ts（模块化版本）...")
             
             # 1. 加载爬虫数据
-            scraped_games = self.load_scraped_data(scraped_data_file)
+            with metrics.stage('updater_load') as stage:
+                scraped_games = self.load_scraped_data(scraped_data_file)
+                stage.items = len(scraped_games)
             if not scraped_games:
                 logger.error("无法加载爬虫数据")
                 return False
             
             # 2. 转换为 gamesData.ts 格式
-            games_data = self.convert_to_games_data_format(scraped_games)
+            with metrics.stage('updater_convert') as stage:
+                games_data = self.convert_to_games_data_format(scraped_games)
+                stage.items = len(games_data)
             if not games_data:
                 logger.error("数据转换失败")
                 return False
             
-            # 3. 加载 gamesData.ts
+            # 3. 加载 gamesData.ts，一遍扫描完成定位 games 声明、读取现有记录和结构验证
             games_data_content = self.load_games_data_file()
             if not games_data_content:
                 logger.error("无法加载 gamesData.ts 文件")
                 return False
+            scan = scan_games_data(games_data_content)
             
-            # 4. 创建备份
-            if not self.create_backup(games_data_content):
-                logger.warning("备份创建失败，但继续执行")
+            # 4. 验证内容（games 声明之外的部分原样保留，只需检查原文件结构）
+            if not self.validate_scan(scan):
+                logger.error("内容验证失败，保留原文件")
+                return False
             
-            # 5. 更新 games 数组
-            updated_content = self.update_games_array(games_data_content, games_data)
+            # 5. 增量模式：与现有记录合并（分片模式下完整的游戏列表在分片中）
+            if upsert:
+                existing_games = load_shard_games(self.shard_dir, str(self.manifest_path)) if sharded else []
+                games_data = self.upsert_games(existing_games or scan.games, games_data, scraped_games)
             
-            # 6. 验证内容
-            if not self.validate_content(updated_content):
-                logger.error("内容验证失败，使用备份恢复")
-                return False
+            # 分片模式：全部游戏写入新分片并暂存清单，gamesData.ts 只打包首屏的游戏
+            staged = None
+            if sharded:
+                with metrics.stage('updater_shards') as stage:
+                    staged = self.stage_sharded_output(games_data)
+                    if not staged:
+                        return False
+                    stage.items = len(games_data)
+                games_data = games_data[:self.bundled_games]
             
-            # 7. 保存文件
-            if self.save_games_data_file(updated_content):
-                logger.info("✅ gamesData.ts 更新完成（模块化版本）！")
-                logger.info(f"📊 更新了 {len(games_data)} 个游戏")
-                logger.info("🔒 页面结构完全未受影响")
+            # 6. 流式生成并原子地替换文件；内容没有变化时不写文件也不备份，避免触发前端重新构建
+            #    gamesData.ts 保存成功（或无需改动）后才换上新清单、删除旧分片，失败时旧文件组合保持一致
+            try:
+                with metrics.stage('updater_save') as stage:
+                    content_hash = self.save_games_data_file(games_data_content, games_data, scan)
+                    stage.items = len(games_data)
+                if not content_hash:
+                    logger.error("❌ gamesData.ts 更新失败！")
+                    return False
+                if staged:
+                    staged.commit()
+            finally:
+                if staged:
+                    staged.discard()
+            if content_hash == hashlib.sha256(games_data_content.encode('utf-8')).hexdigest():
+                logger.info(f"✅ gamesData.ts 内容未变化（sha256 {content_hash[:12]}），跳过备份和写入")
                 return True
-            else:
-                logger.error("❌ gamesData.ts 更新失败！")
-                return False
+            
+            logger.info("✅ gamesData.ts 更新完成（模块化版本）！")
+            logger.info(f"📊 更新了 {len(games_data)} 个游戏（sha256 {content_hash[:12]}）")
+            logger.info("🔒 页面结构完全未受影响")
+            return True
                 
         except Exception as e:
             logger.error(f"更新 gamesData.ts 过程中出错: {e}")
@@ -379,18 +562,34 @@ class ModularDataUpdater:
 
 def main():
     """主函数"""
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("用法: python modular_data_updater.py <scraped_data_file>")
-        print("示例: python modular_data_updater.py merged_scraped_data.json")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='用爬虫数据更新 gamesData.ts',
+        epilog='示例: python modular_data_updater.py merged_scraped_data.json --upsert')
+    parser.add_argument('scraped_data_file', help='爬虫数据文件（.json 或 .jsonl）')
+    parser.add_argument('--games-data', default='../src/data/gamesData.ts', help='gamesData.ts 路径')
+    parser.add_argument('--upsert', action='store_true',
+                        help='增量更新：按 slug 合并进现有数组，保留已有游戏的 id、playCount 和 addedAt')
+    parser.add_argument('--shards', action='store_true',
+                        help='分片输出：全部游戏按分类写入带内容哈希的JSON分片并生成索引清单，gamesData.ts 只保留首屏游戏')
+    parser.add_argument('--shard-dir', default=DEFAULT_SHARD_DIR, help='分片目录（部署后的 /game-data/）')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST_PATH, help='索引清单 gamesManifest.ts 路径')
+    parser.add_argument('--max-shard-kb', type=int, default=DEFAULT_MAX_SHARD_BYTES // 1024,
+                        help='单个分片的大小上限（KB）')
+    parser.add_argument('--bundled', type=int, default=BUNDLED_GAMES,
+                        help='分片模式下仍打包进 gamesData.ts 的游戏数')
+    parser.add_argument('--compact', action='store_true',
+                        help='紧凑编码：只保存iframe地址，controls/features 放进共享表，省略默认值（gamesData.ts 和分片都适用）')
+    args = parser.parse_args()
     
-    scraped_data_file = sys.argv[1]
-    updater = ModularDataUpdater()
+    scraped_data_file = args.scraped_data_file
+    updater = ModularDataUpdater(args.games_data, shard_dir=args.shard_dir, manifest_path=args.manifest,
+                                 max_shard_bytes=args.max_shard_kb * 1024, bundled_games=args.bundled,
+                                 compact=args.compact)
     
     # 执行更新
-    success = updater.update_games_data_with_scraped_data(scraped_data_file)
+    success = updater.update_games_data_with_scraped_data(scraped_data_file, upsert=args.upsert,
+                                                          sharded=args.shards)
+    metrics.write('updater', str(Path(scraped_data_file).parent))
     
     if success:
         print("🎉 gamesData.ts 更新成功完成（模块化版本）！")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Next.js 数据路由详情页爬虫：不下载详情页HTML，直接请求 /_next/data/<buildId>/game/<slug>.json
+详情数据（name、desktopUrl、descriptionFirst、controls、tags、category、upvotes）都在其中的 pageProps.game，
+字节数约为完整HTML的十分之一，也不需要任何HTML解析
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from html_parsers import HtmlParserBackend
+from http_cache import HttpCache
+from rate_limiter import RateLimiter
+from scraper_config import DEFAULT_BASE_URL
+from sitemap_discovery import title_from_url
+from step2_detail_scraper import DetailScraper, DetailedGameInfo, extract_next_data
+
+logger = logging.getLogger(__name__)
+
+# 刷新后 buildId 没有变化时，这段时间（秒）内的404不再刷新：游戏本身不存在时数据路由同样返回404，
+# 避免每个这样的404都重新请求主页
+BUILD_ID_RECHECK_INTERVAL = 30
+
+class NextDataDetailScraper(DetailScraper):
+    """通过 Next.js 数据路由获取详情，输出与 DetailScraper 完全相同的 DetailedGameInfo
+
+    buildId 第一次使用时从主页的 __NEXT_DATA__ 读取；站点重新部署后旧 buildId 的数据路由返回404，
+    此时刷新 buildId 并重试一次。buildId 没有变化仍然404（例如页面没有预渲染的数据路由）、
+    或者数据路由中没有游戏数据（例如页面改为重定向、返回的不是JSON）时，该游戏回退到请求HTML
+    """
+
+    def __init__(self, max_workers: int = 5, cache: Optional[HttpCache] = None,
+                 parser: Optional[HtmlParserBackend] = None, limiter: Optional[RateLimiter] = None,
+                 parse_processes: int = 0, base_url: str = DEFAULT_BASE_URL):
+        if parse_processes > 0:
+            # 数据路由只需解码一小段JSON，不值得交给进程池
+            logger.warning("数据路由模式不解析HTML，忽略 parse_processes 设置")
+        super().__init__(max_workers=max_workers, cache=cache, parser=parser, limiter=limiter,
+                         parse_processes=0, base_url=base_url)
+        self._build_id: Optional[str] = None
+        self._locale: Optional[str] = None
+        self._recheck_after = 0.0
+        self._build_lock = threading.Lock()
+
+    def build_id(self, stale: Optional[str] = None) -> str:
+        """当前的 buildId；stale 是刚刚返回404的 buildId，与当前值相同时重新从主页读取"""
+        with self._build_lock:
+            if self._build_id is None or (self._build_id == stale and time.monotonic() >= self._recheck_after):
+                previous = self._build_id
+                self._build_id, self._locale = self._read_build_id()
+                if previous == self._build_id:
+                    # buildId 没变，404 是游戏本身不存在
+                    self._recheck_after = time.monotonic() + BUILD_ID_RECHECK_INTERVAL
+                elif previous:
+                    logger.info(f"🧱 Next.js buildId 已更新: {previous} -> {self._build_id}")
+                else:
+                    logger.info(f"🧱 Next.js buildId: {self._build_id}")
+            return self._build_id
+
+    def _read_build_id(self) -> Tuple[str, Optional[str]]:
+        """从主页的 __NEXT_DATA__ 读取 buildId 和语言（不走缓存，缓存中的主页可能还是旧构建）"""
+        response = self._send(self.base_url + '/')
+        response.raise_for_status()
+        data = extract_next_data(response.content)
+        build_id = data.get('buildId') if isinstance(data, dict) else None
+        if not build_id:
+            raise ValueError(f"{self.base_url} 主页中没有找到 Next.js buildId")
+        # 启用了国际化的站点，数据路由路径中带语言前缀
+        return build_id, data.get('locale') or None
+
+    def data_url(self, url: str, build_id: str) -> str:
+        """详情页URL对应的数据路由，例如 /game/moto-x3m -> /_next/data/<buildId>/game/moto-x3m.json"""
+        path = urlparse(url).path.strip('/')
+        locale = f"{self._locale}/" if self._locale else ""
+        return f"{self.base_url}/_next/data/{build_id}/{locale}{path}.json"
+
+    def _fetch_and_parse(self, url: str) -> DetailedGameInfo:
+        """请求数据路由并解析；buildId 过期时刷新后重试一次，数据路由不可用或没有游戏数据时回退到HTML"""
+        build_id = self.build_id()
+        content = self._fetch_data_route(url, build_id)
+        if content is None:
+            fresh_id = self.build_id(stale=build_id)
+            if fresh_id != build_id:
+                content = self._fetch_data_route(url, fresh_id)
+            if content is None:
+                # 游戏本身不存在时HTML同样404，由HTML路径报告失败
+                logger.warning(f"{url} 的数据路由返回404（buildId {fresh_id}），改为请求HTML")
+                return super()._fetch_and_parse(url)
+
+        started = time.perf_counter()
+        game_data = self._extract_data_route_game(content)
+        if game_data is None:
+            logger.warning(f"{url} 的数据路由中没有游戏数据，改为请求HTML")
+            return super()._fetch_and_parse(url)
+        game_info = self._game_info_from_data(game_data, url, game_data.get('name') or title_from_url(url))
+        self._record_parse('data_route', time.perf_counter() - started)
+        return game_info
+
+    def _fetch_data_route(self, url: str, build_id: str) -> Optional[bytes]:
+        """请求数据路由，404时返回 None（buildId 过期或该页面没有数据路由），其他错误照常抛出"""
+        try:
+            return self._fetch_content(self.data_url(url, build_id))
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
+    def _extract_data_route_game(self, content: bytes) -> Optional[Dict[str, Any]]:
+        """数据路由JSON的 pageProps.game（getServerSideProps 的返回值）"""
+        try:
+            data = json.loads(content)
+            game = data['pageProps']['game']
+        except (ValueError, KeyError, TypeError):
+            return None
+        return game if isinstance(game, dict) else None
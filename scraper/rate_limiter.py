@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享限速器：主页爬虫和详情页爬虫共用
+每个主机一个令牌桶，429/5xx时指数退避加随机抖动并遵守 Retry-After，
+被限流时自动降低该主机速率，请求成功后逐步恢复
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from metrics import metrics, ERRORS, FETCH_SECONDS, RESPONSE_BYTES, RESPONSES, RETRIES, TTFB_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# 需要重试的状态码
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# 表示源站在限流的状态码
+THROTTLE_STATUSES = {429, 503}
+
+class TokenBucket:
+    """令牌桶：允许短时突发，长期速率不超过 rate"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.throttled_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """预定一个令牌，返回需要等待的秒数（令牌可以透支，后来者依次排队）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds: float):
+        """暂停发放令牌（用于 Retry-After）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            # 取最长的暂停时间，多个并发的429不叠加
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+class RateLimiter:
+    """按主机限速、带自适应退避的请求器"""
+
+    def __init__(self, rate_per_host: float = 2.0, burst: int = 5, min_rate_per_host: float = 0.2,
+                 retry_attempts: int = 3, backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 timeout: int = 30):
+        self.max_rate = rate_per_host
+        self.min_rate = min(min_rate_per_host, rate_per_host)
+        self.burst = burst
+        self.retry_attempts = max(1, retry_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.stats = {'retries': 0, 'throttled': 0}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'RateLimiter':
+        """根据 config.json 的 scraper 段创建限速器"""
+        scraper_config = config.get('scraper', {})
+        return cls(
+            rate_per_host=scraper_config.get('rate_per_host', 2.0),
+            burst=scraper_config.get('burst', 5),
+            min_rate_per_host=scraper_config.get('min_rate_per_host', 0.2),
+            retry_attempts=scraper_config.get('retry_attempts', 3),
+            backoff_base=scraper_config.get('backoff_base', 1.0),
+            backoff_max=scraper_config.get('backoff_max', 60.0),
+            timeout=scraper_config.get('timeout', 30)
+        )
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.max_rate, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def wait(self, url: str):
+        """阻塞直到该主机有可用令牌"""
+        delay = self._bucket(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str):
+        """异步等待该主机有可用令牌，不阻塞事件循环"""
+        delay = self._bucket(url).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """指数退避 + 全抖动；Retry-After 给出的等待时间作为下限"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            delay = max(delay, min(server_delay, self.backoff_max))
+        return delay
+
+    def _record(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def on_throttled(self, url: str, pause: float):
+        """源站限流：该主机速率减半并暂停发放令牌
+
+        同一波突发请求收到的多个429只算一次限流，避免速率被连续减半
+        """
+        bucket = self._bucket(url)
+        now = time.monotonic()
+        if now - bucket.throttled_at >= max(1.0, 1.0 / bucket.rate):
+            bucket.throttled_at = now
+            new_rate = max(self.min_rate, bucket.rate / 2)
+            if new_rate < bucket.rate:
+                logger.warning(f"⏬ {urlparse(url).netloc} 被限流，速率降至 {new_rate:.2f} 请求/秒")
+            bucket.set_rate(new_rate)
+        bucket.pause(pause)
+        self._record('throttled')
+
+    def on_success(self, url: str):
+        """请求成功：速率逐步恢复到配置上限"""
+        bucket = self._bucket(url)
+        if bucket.rate < self.max_rate:
+            bucket.set_rate(min(self.max_rate, bucket.rate + self.max_rate * 0.05))
+
+    def _retry_delay(self, url: str, attempt: int, status: int, retry_after: Optional[str],
+                     stage: str) -> float:
+        """计算一次重试前的等待时间并更新主机速率"""
+        delay = self.backoff_delay(attempt, retry_after)
+        if status in THROTTLE_STATUSES:
+            self.on_throttled(url, delay)
+        self._record('retries')
+        metrics.inc(RETRIES, stage=stage, status=status or 'connection')
+        logger.warning(f"🔁 {url} 返回 {status or '连接错误'}，{delay:.1f} 秒后重试 "
+                       f"({attempt + 1}/{self.retry_attempts - 1})")
+        return delay
+
+    def _record_response(self, stage: str, status: int, seconds: float, ttfb: float, size: int):
+        """记录一次响应的耗时、首字节时间、字节数和状态码"""
+        metrics.observe(FETCH_SECONDS, seconds, stage=stage)
+        metrics.observe(TTFB_SECONDS, ttfb, stage=stage)
+        metrics.inc(RESPONSE_BYTES, size, stage=stage)
+        metrics.inc(RESPONSES, stage=stage, status=status)
+
+    def request(self, session, url: str, headers: Optional[Dict[str, str]] = None,
+                stage: str = 'http') -> requests.Response:
+        """限速并带重试地发送GET请求，返回最后一次响应；stage 用于区分指标（step1/step2）"""
+        for attempt in range(self.retry_attempts):
+            last_attempt = attempt == self.retry_attempts - 1
+            self.wait(url)
+            started = time.perf_counter()
+            try:
+                response = session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    metrics.inc(ERRORS, stage=stage, status='connection')
+                    raise
+                time.sleep(self._retry_delay(url, attempt, 0, None, stage))
+                continue
+            # requests 的 elapsed 是发出请求到解析完响应头的时间
+            self._record_response(stage, response.status_code, time.perf_counter() - started,
+                                  response.elapsed.total_seconds(), len(response.content))
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                time.sleep(self._retry_delay(url, attempt, response.status_code,
+                                             response.headers.get('Retry-After'), stage))
+                continue
+
+            if response.status_code < 400:
+                self.on_success(url)
+            else:
+                metrics.inc(ERRORS, stage=stage, status=response.status_code)
+            return response
+
+    async def fetch_async(self, session, url: str, headers: Optional[Dict[str, str]] = None,
+                          stage: str = 'http') -> Tuple[int, dict, bytes, Optional[str]]:
+        """异步版本（aiohttp），返回 (状态码, 响应头, 正文, 字符集)"""
+        import aiohttp
+
+        for attempt in range(self.retry_attempts):
+            last_attempt = attempt == self.retry_attempts - 1
+            await self.wait_async(url)
+            started = time.perf_counter()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    ttfb = time.perf_counter() - started
+                    status = response.status
+                    response_headers = response.headers
+                    body = await response.read()
+                    charset = response.charset
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt:
+                    metrics.inc(ERRORS, stage=stage, status='connection')
+                    raise
+                await asyncio.sleep(self._retry_delay(url, attempt, 0, None, stage))
+                continue
+            self._record_response(stage, status, time.perf_counter() - started, ttfb, len(body))
+
+            if status in RETRY_STATUSES and not last_attempt:
+                await asyncio.sleep(self._retry_delay(url, attempt, status,
+                                                      response_headers.get('Retry-After'), stage))
+                continue
+
+            if status < 400:
+                self.on_success(url)
+            else:
+                metrics.inc(ERRORS, stage=stage, status=status)
+            return status, response_headers, body, charset
+
+    def log_stats(self):
+        """输出限速统计到日志"""
+        rates = ", ".join(f"{host}={bucket.rate:.2f}/s" for host, bucket in self._buckets.items())
+        logger.info(f"🚦 限速统计: 重试 {self.stats['retries']} 次, 被限流 {self.stats['throttled']} 次, "
+                    f"当前速率 {rates or '无'}")
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或HTTP日期）"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
@@ -4,15 +4,30 @@
 一键运行脚本：执行完整的两步式爬虫流程
 """
 
+import os
 import sys
 import logging
 import argparse
+from dataclasses import asdict
+from datetime import timedelta
 from pathlib import Path
+from typing import Any, Callable
 
 # 导入各个模块
-from step1_homepage_scraper import HomepageScraper
-from step2_detail_scraper import DetailScraper
+from step1_homepage_scraper import HomepageScraper, HomepageGameInfo
+from step2_detail_scraper import DetailScraper, DetailedGameInfo
 from demo_data_generator import DemoDataGenerator
+from html_parsers import homepage_parser, detail_parser
+from http_cache import HttpCache
+from rate_limiter import RateLimiter
+from scraper_config import load_config
+from streaming_output import JsonlWriter, compact_jsonl, iter_jsonl
+from crawl_state import CrawlStateStore, FAILED, IN_FLIGHT
+from crawl_pipeline import CrawlPipeline
+from frontier_crawler import FrontierCrawler
+from sitemap_discovery import SitemapDiscovery
+from metrics import metrics
+from incremental_crawl import load_step2_records, plan_incremental_crawl, merge_step2_records
 
 # 配置日志
 logging.basicConfig(
@@ -28,9 +43,80 @@ logger = logging.getLogger(__name__)
 class ScraperRunner:
     """爬虫运行器"""
     
-    def __init__(self):
-        self.step1_scraper = HomepageScraper()
-        self.step2_scraper = DetailScraper(max_workers=5)
+    def __init__(self, engine: str = 'thread', concurrency: int = 200, per_host_limit: int = 8,
+                 cache: HttpCache = None, incremental: bool = False,
+                 max_age_hours: float = 24, prune: bool = False, stream: bool = False,
+                 resume: bool = False, retry_failed: bool = False, pipeline: bool = False,
+                 discover: str = 'homepage', changed_only: bool = False,
+                 parse_processes: int = None, limiter: RateLimiter = None, tiered: bool = False,
+                 data_route: bool = False, config: dict = None):
+        self.config = config or load_config()
+        # 站点根地址：默认真实站点，负载测试时指向本地模拟源站
+        base_url = self.config['scraper']['base_url']
+        # 两步爬虫共用同一个磁盘响应缓存
+        self.cache = cache
+        # 增量模式：只爬取新增或超过新鲜期的游戏
+        self.incremental = incremental
+        self.max_age = timedelta(hours=max_age_hours)
+        self.prune = prune
+        # 只取有变化的游戏（站点地图发现）：第二步强制重新爬取这些游戏并合并回已有结果
+        self.changed_only = changed_only and discover == 'sitemap'
+        # 本次第二步未成功的URL数，有失败时不推进站点地图的上次运行时间
+        self._step2_failed = 0
+        # 流式输出：第二步结果逐条写入JSONL，结束后压缩为 step2 JSON
+        self.stream = stream
+        self.step2_file = self.config['output']['step2_file']
+        self.step2_jsonl = Path(self.step2_file).with_suffix('.jsonl')
+        # 断点续爬：状态存储记录每个URL的进度，--resume 时跳过已完成的部分
+        self.resume = resume or retry_failed
+        self.retry_failed = retry_failed
+        self._state = None
+        # 流水线模式：第一步与第二步通过有界队列同时进行
+        self.pipeline = pipeline
+        # 解析进程数：>0 时第二步的下载与解析分离，解析在进程池中进行
+        if parse_processes is None:
+            parse_processes = parse_process_count(str(self.config['scraper']['parse_processes']))
+        # 两步爬虫共用同一个限速器（按主机令牌桶 + 退避重试）
+        self.limiter = limiter or RateLimiter.from_config(self.config)
+        if discover == 'frontier':
+            # 全目录发现：沿分类/标签列表页及分页发现游戏，输出格式与主页爬虫相同
+            self.step1_scraper = FrontierCrawler.from_config(self.config, cache=cache,
+                                                             parser=homepage_parser(self.config),
+                                                             limiter=self.limiter)
+        elif discover == 'sitemap':
+            # 站点地图发现：不解析任何列表页HTML，可按 <lastmod> 只取有变化的游戏
+            self.step1_scraper = SitemapDiscovery.from_config(self.config, cache=cache,
+                                                              parser=homepage_parser(self.config),
+                                                              limiter=self.limiter,
+                                                              changed_only=changed_only)
+        else:
+            self.step1_scraper = HomepageScraper(cache=cache, parser=homepage_parser(self.config),
+                                                 limiter=self.limiter, base_url=base_url)
+        if engine == 'async':
+            # 异步引擎：共享连接池 + 单主机并发上限
+            from async_detail_scraper import AsyncDetailScraper
+            self.step2_scraper = AsyncDetailScraper(max_concurrency=concurrency,
+                                                    per_host_limit=per_host_limit,
+                                                    cache=cache, parser=detail_parser(self.config),
+                                                    limiter=self.limiter, parse_processes=parse_processes,
+                                                    base_url=base_url)
+        elif data_route:
+            # 数据路由：请求 /_next/data/<buildId>/game/<slug>.json，不下载也不解析详情页HTML
+            from next_data_fetcher import NextDataDetailScraper
+            self.step2_scraper = NextDataDetailScraper(max_workers=self.config['scraper']['max_workers'],
+                                                       cache=cache, parser=detail_parser(self.config),
+                                                       limiter=self.limiter, base_url=base_url)
+        elif tiered:
+            # 分级抓取：先走HTTP，HTML里没有游戏数据时才升级到无头浏览器
+            from tiered_fetcher import TieredDetailScraper
+            self.step2_scraper = TieredDetailScraper.from_config(self.config, cache=cache,
+                                                                 parser=detail_parser(self.config),
+                                                                 limiter=self.limiter)
+        else:
+            self.step2_scraper = DetailScraper(max_workers=self.config['scraper']['max_workers'],
+                                               cache=cache, parser=detail_parser(self.config),
+                                               limiter=self.limiter, parse_processes=parse_processes,
+                                               base_url=base_url)
         self.demo_generator = DemoDataGenerator()
     
     def run_demo_mode(self, count: int = 20) -> bool:
@@ -57,13 +143,33 @@ class ScraperRunner:
         logger.info("🚀 运行真实爬虫模式...")
         
         try:
-            # 第一步：爬取主页
-            logger.info("第一步：爬取主页游戏信息...")
-            step1_games = self.step1_scraper.scrape_homepage(max_games)
+            state = self.state_store()
             
-            if not step1_games:
-                logger.error("第一步爬取失败，未获取到任何游戏")
-                return False
+            if self.resume and state.stage_done('step1'):
+                # 第一步已在上次运行中完成，直接沿用发现的游戏
+                step1_games = [HomepageGameInfo(**game) for game in state.stage_payload('step1')]
+                logger.info(f"♻️ 从断点恢复：跳过第一步，沿用已发现的 {len(step1_games)} 个游戏")
+            else:
+                if not self.resume:
+                    state.reset()
+                
+                if self.pipeline:
+                    if not self._run_pipelined(max_games):
+                        return False
+                    self._log_next_steps()
+                    return True
+                
+                # 第一步：爬取主页
+                logger.info("第一步：爬取主页游戏信息...")
+                with metrics.stage('step1') as stage:
+                    step1_games = self.step1_scraper.scrape_homepage(max_games)
+                    stage.items = len(step1_games)
+                
+                if not step1_games:
+                    logger.error("第一步爬取失败，未获取到任何游戏")
+                    return False
+                
+                state.complete_stage('step1', [asdict(game) for game in step1_games])
             
             # 保存第一步数据
             if not self.step1_scraper.save_to_json(step1_games):
@@ -75,34 +181,39 @@ class ScraperRunner:
             # 第二步：爬取详情页
             logger.info("第二步：爬取游戏详细信息...")
             game_urls = [game.url for game in step1_games]
-            step2_games = self.step2_scraper.scrape_game_details(game_urls)
-            
-            if not step2_games:
-                logger.error("第二步爬取失败，未获取到任何详细信息")
+            if not self._scrape_and_save_details(game_urls):
                 return False
             
-            # 保存第二步数据
-            if not self.step2_scraper.save_to_json(step2_games):
-                logger.error("第二步数据保存失败")
-                return False
-            
-            logger.info(f"✅ 第二步完成：获取 {len(step2_games)} 个游戏的详细信息")
-            
-            logger.info("✅ 爬虫数据获取完成！")
-            logger.info("📝 请使用以下命令更新数据：")
-            logger.info("   python modular_data_updater.py step2_detailed_games.json")
+            self._commit_discovery()
+            self._log_next_steps()
             return True
                 
         except Exception as e:
             logger.error(f"真实爬虫模式运行失败: {e}")
             return False
     
+    def _commit_discovery(self):
+        """第二步全部成功后才推进站点地图的上次运行时间，失败或未爬取的游戏下次 --changed-only 仍会被发现"""
+        if not isinstance(self.step1_scraper, SitemapDiscovery):
+            return
+        if self._step2_failed:
+            logger.warning(f"第二步有 {self._step2_failed} 个游戏未成功，站点地图的上次运行时间保持不变")
+            return
+        self.step1_scraper.commit_last_run()
+    
+    def _log_next_steps(self):
+        logger.info("✅ 爬虫数据获取完成！")
+        logger.info("📝 请使用以下命令更新数据：")
+        logger.info("   python modular_data_updater.py step2_detailed_games.json")
+    
     def run_step1_only(self, max_games: int = 20) -> bool:
         """只运行第一步"""
         logger.info("第一步：爬取主页游戏信息...")
         
         try:
-            games = self.step1_scraper.scrape_homepage(max_games)
+            with metrics.stage('step1') as stage:
+                games = self.step1_scraper.scrape_homepage(max_games)
+                stage.items = len(games)
             
             if games:
                 if self.step1_scraper.save_to_json(games):
@@ -135,28 +246,230 @@ class ScraperRunner:
                 logger.error("未找到第一步的结果文件或游戏URL")
                 return False
             
+            # 只取有变化的游戏：第一步结果是合并后的完整列表，只爬取发现时记录的有变化的URL
+            if self.changed_only:
+                changed = self.step1_scraper.changed_urls()
+                if changed is None:
+                    logger.warning("没有找到站点地图发现记录的有变化的URL，爬取第一步结果中的全部游戏")
+                elif not changed:
+                    logger.info("站点地图发现没有有变化的游戏，第二步无需爬取")
+                    self._commit_discovery()
+                    return True
+                else:
+                    game_urls = changed
+            
             # 如果指定了最大游戏数量，则限制URL数量
             if max_games and max_games > 0:
                 game_urls = game_urls[:max_games]
                 logger.info(f"限制爬取数量为 {max_games} 个游戏")
             
-            games = self.step2_scraper.scrape_game_details(game_urls)
+            if not self.resume and not self.incremental:
+                self.state_store().reset()
             
-            if games:
-                if self.step2_scraper.save_to_json(games):
-                    logger.info(f"✅ 第二步完成：获取 {len(games)} 个游戏的详细信息")
-                    return True
-                else:
-                    logger.error("数据保存失败")
-                    return False
-            else:
-                logger.error("未获取到任何详细信息")
+            if not self._scrape_and_save_details(game_urls):
                 return False
+            
+            self._commit_discovery()
+            return True
                 
         except Exception as e:
             logger.error(f"第二步运行失败: {e}")
             return False
     
+    def state_store(self) -> CrawlStateStore:
+        """爬取状态存储（首次使用时创建）"""
+        if self._state is None:
+            self._state = CrawlStateStore(self.config['output']['state_file'])
+        return self._state
+    
+    def write_metrics(self):
+        """把本次运行的指标导出到输出文件旁（scraper_metrics.prom / scraper_metrics.json）"""
+        metrics.write('scraper', self.config['output']['metrics_dir'] or str(Path(self.step2_file).parent))
+    
+    def _scrape_and_save_details(self, game_urls) -> bool:
+        """爬取并保存第二步数据，增量模式下只爬取新增或过期的游戏"""
+        with metrics.stage('step2'):
+            if self.changed_only:
+                return self._scrape_changed_details(game_urls)
+            if self.incremental:
+                return self._scrape_details_incremental(game_urls)
+            return self._scrape_all_details(game_urls)
+    
+    def _scrape_all_details(self, game_urls) -> bool:
+        """登记URL并爬取第二步，结果写入状态存储"""
+        # 登记所有URL；断点续爬时只取未完成或失败的URL
+        state = self.state_store()
+        state.add_urls(game_urls)
+        if self.resume:
+            recovered = state.recover_in_flight()
+            to_fetch = state.urls_to_fetch(failed_only=self.retry_failed)
+            logger.info(f"♻️ 从断点恢复：待爬取 {len(to_fetch)} 个（其中 {recovered} 个上次中断时正在处理），"
+                        f"已完成的游戏不再请求")
+        else:
+            to_fetch = list(dict.fromkeys(game_urls))
+        
+        state.mark_in_flight(to_fetch)
+        return self._collect_details(
+            lambda on_result, on_failure: self.step2_scraper.scrape_game_details(
+                to_fetch, on_result=on_result, on_failure=on_failure)
+        )
+    
+    def _collect_details(self, scrape: Callable[[Callable, Callable], Any]) -> bool:
+        """运行第二步爬取并保存结果
+        
+        scrape(on_result, on_failure) 负责实际爬取；每条结果写入状态存储（流式模式同时追加JSONL），
+        结束后从状态存储生成第二步结果文件
+        """
+        state = self.state_store()
+        
+        def record(game: DetailedGameInfo):
+            state.mark_done(game.url, asdict(game))
+        
+        if self.stream:
+            ok = self._scrape_details_streaming(scrape, record, state.mark_failed)
+        else:
+            scrape(record, state.mark_failed)
+            games = [DetailedGameInfo(**result) for result in state.iter_results()]
+            ok = bool(games)
+            if not games:
+                logger.error("第二步爬取失败，未获取到任何详细信息")
+            elif not self.step2_scraper.save_to_json(games, self.step2_file):
+                logger.error("第二步数据保存失败")
+                ok = False
+            else:
+                logger.info(f"✅ 第二步完成：获取 {len(games)} 个游戏的详细信息")
+        
+        counts = state.summary()
+        self._step2_failed = counts[FAILED] + counts[IN_FLIGHT]
+        state.log_summary()
+        return ok
+    
+    def _run_pipelined(self, max_games: int) -> bool:
+        """流水线模式：第一步边发现游戏边送入有界队列，第二步同时爬取"""
+        state = self.state_store()
+        pipeline = CrawlPipeline(self.step1_scraper, self.step2_scraper,
+                                 queue_size=self.config['scraper']['pipeline_queue_size'],
+                                 skip_urls=state.done_urls() if self.resume else None)
+        step1_games = []
+        
+        def scrape(on_result, on_failure):
+            step1_games.extend(pipeline.run(max_games, on_result, on_failure))
+        
+        with metrics.stage('step2'):
+            details_ok = self._collect_details(scrape)
+        
+        if not step1_games:
+            logger.error("第一步爬取失败，未获取到任何游戏")
+            return False
+        
+        state.complete_stage('step1', [asdict(game) for game in step1_games])
+        if not self.step1_scraper.save_to_json(step1_games):
+            logger.error("第一步数据保存失败")
+            return False
+        
+        logger.info(f"✅ 第一步完成：获取 {len(step1_games)} 个游戏")
+        if details_ok:
+            self._commit_discovery()
+        return details_ok
+    
+    def _scrape_details_incremental(self, game_urls) -> bool:
+        """增量爬取：只爬取新增或超过新鲜期的游戏，合并回第二步结果文件"""
+        existing = load_step2_records(self.step2_file)
+        new_urls, stale_urls = plan_incremental_crawl(game_urls, existing, self.max_age)
+        to_fetch = new_urls + stale_urls
+        logger.info(f"增量模式：新增 {len(new_urls)} 个，过期 {len(stale_urls)} 个，"
+                    f"跳过 {len(set(game_urls)) - len(to_fetch)} 个未变动的游戏")
+        
+        fresh_games = self._scrape_fresh_details(to_fetch) if to_fetch else []
+        self._step2_failed = len(to_fetch) - len({game.url for game in fresh_games})
+        if to_fetch and not fresh_games:
+            logger.warning("增量爬取未获取到任何详细信息，保留已有记录")
+        
+        games = merge_step2_records(game_urls, existing, fresh_games, prune=self.prune)
+        if not games:
+            logger.error("第二步爬取失败，未获取到任何详细信息")
+            return False
+        
+        if not self.step2_scraper.save_to_json(games, self.step2_file):
+            logger.error("第二步数据保存失败")
+            return False
+        
+        if self.stream and self.step2_jsonl.exists():
+            self.step2_jsonl.unlink()
+        
+        logger.info(f"✅ 第二步完成（增量）：更新 {len(fresh_games)} 个，共 {len(games)} 个游戏的详细信息")
+        return True
+    
+    def _scrape_changed_details(self, game_urls) -> bool:
+        """只取有变化的游戏：不论是否在新鲜期内都重新爬取，合并回已有的第二步结果（不覆盖未变化的游戏）"""
+        existing = load_step2_records(self.step2_file)
+        to_fetch = list(dict.fromkeys(game_urls))
+        logger.info(f"只爬取有变化的游戏：{len(to_fetch)} 个，保留已有的 {len(existing)} 个记录")
+        
+        fresh_games = self._scrape_fresh_details(to_fetch) if to_fetch else []
+        self._step2_failed = len(to_fetch) - len({game.url for game in fresh_games})
+        
+        # 已有记录保持原顺序，新游戏追加在后；未成功的游戏保留旧记录
+        games = merge_step2_records(list(existing) + to_fetch, existing, fresh_games)
+        if not games:
+            logger.error("第二步爬取失败，未获取到任何详细信息")
+            return False
+        
+        if not self.step2_scraper.save_to_json(games, self.step2_file):
+            logger.error("第二步数据保存失败")
+            return False
+        
+        if self.stream and self.step2_jsonl.exists():
+            self.step2_jsonl.unlink()
+        
+        logger.info(f"✅ 第二步完成（只取有变化的游戏）：更新 {len(fresh_games)} 个，"
+                    f"失败 {self._step2_failed} 个，共 {len(games)} 个游戏的详细信息")
+        return True
+    
+    def _scrape_fresh_details(self, game_urls) -> list:
+        """增量模式下爬取需要更新的游戏；流式模式先落盘到JSONL再读回"""
+        if not self.stream:
+            return self.step2_scraper.scrape_game_details(game_urls)
+        
+        self.step2_scraper.scrape_game_details_to_jsonl(game_urls, str(self.step2_jsonl))
+        return [DetailedGameInfo(**record) for record in iter_jsonl(str(self.step2_jsonl))]
+    
+    def _scrape_details_streaming(self, scrape, on_result, on_failure) -> bool:
+        """流式爬取第二步：边爬边写JSONL，结束后原子地压缩为JSON信封"""
+        if self.resume:
+            # 先用状态存储中已完成的结果重建JSONL，再追加本次爬取的结果
+            with JsonlWriter(str(self.step2_jsonl)) as writer:
+                for record in self.state_store().iter_results():
+                    writer.write(record)
+            logger.info(f"已从状态存储恢复 {writer.count} 条已完成的记录到 {self.step2_jsonl}")
+        
+        with JsonlWriter(str(self.step2_jsonl), append=self.resume) as writer:
+            def write(game: DetailedGameInfo):
+                writer.write(asdict(game))
+                on_result(game)
+            
+            scrape(write, on_failure)
+        count = sum(1 for _ in iter_jsonl(str(self.step2_jsonl)))
+        if not count:
+            logger.error("第二步爬取失败，未获取到任何详细信息")
+            return False
+        
+        try:
+            compact_jsonl(str(self.step2_jsonl), self.step2_file, 'detailed_games')
+        except Exception as e:
+            logger.error(f"第二步数据压缩失败，JSONL已保留在 {self.step2_jsonl}: {e}")
+            return False
+        
+        self.step2_jsonl.unlink()
+        logger.info(f"✅ 第二步完成（流式）：获取 {count} 个游戏的详细信息")
+        return True
+    
+
+def parse_process_count(value: str) -> int:
+    """解析 --parse-processes 参数，auto 表示CPU核数"""
+    if value == 'auto':
+        return os.cpu_count() or 1
+    return int(value)
 
 def main():
     """主函数"""
@@ -164,10 +477,72 @@ def main():
     parser.add_argument('--mode', choices=['demo', 'real', 'step1', 'step2'], 
                        default='demo', help='运行模式')
     parser.add_argument('--count', type=int, default=20, help='游戏数量（对demo、real、step1、step2模式有效）')
+    parser.add_argument('--discover', choices=['homepage', 'frontier', 'sitemap'], default='homepage',
+                       help='第一步发现方式：homepage(只解析主页)、frontier(沿分类/标签列表页及分页发现全目录) '
+                            '或 sitemap(读取站点地图)')
+    parser.add_argument('--changed-only', action='store_true',
+                       help='站点地图发现时只取 <lastmod> 晚于上次第二步成功的运行的游戏，'
+                            '强制重新爬取并合并回已有的第一步、第二步结果')
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                       help='第二步爬取引擎：thread(线程池) 或 async(asyncio + aiohttp)')
+    parser.add_argument('--concurrency', type=int, default=200, help='异步引擎的总并发请求数')
+    parser.add_argument('--parse-processes', type=parse_process_count, default=None,
+                       help='第二步解析进程数：0 表示在下载线程中解析，auto 表示CPU核数（默认取 config.json）')
+    parser.add_argument('--per-host', type=int, default=8, help='异步引擎的单主机并发上限')
+    parser.add_argument('--tiered', action='store_true',
+                       help='分级抓取（线程池引擎）：第二步先用HTTP，HTML里没有游戏数据时才改用无头浏览器')
+    parser.add_argument('--data-route', action='store_true',
+                       help='数据路由（线程池引擎）：第二步请求 Next.js 的 /_next/data/<buildId>/... JSON，不下载详情页HTML')
+    parser.add_argument('--incremental', action='store_true',
+                       help='增量模式：只爬取新增或超过新鲜期的游戏，并合并回第二步结果文件')
+    parser.add_argument('--max-age-hours', type=float, default=24, help='增量模式下记录的新鲜期（小时）')
+    parser.add_argument('--prune', action='store_true', help='增量模式下移除已不在第一步列表中的游戏')
+    parser.add_argument('--stream', action='store_true',
+                       help='流式输出：第二步每完成一个游戏就追加到JSONL，结束后原子地压缩为JSON')
+    parser.add_argument('--resume', action='store_true',
+                       help='断点续爬：沿用上次已完成的第一步，第二步只爬取未完成和失败的URL')
+    parser.add_argument('--retry-failed', action='store_true',
+                       help='只重新爬取上次失败的URL，已完成的不受影响（隐含 --resume）')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='流水线模式（real模式）：第一步每发现一个游戏就送入队列，第二步同时爬取')
+    parser.add_argument('--config', default='config.json', help='配置文件路径')
+    parser.add_argument('--base-url', help='站点根地址（覆盖 config.json 的 scraper.base_url，例如本地模拟源站）')
+    parser.add_argument('--no-cache', action='store_true', help='禁用磁盘HTTP响应缓存')
+    parser.add_argument('--cache-path', default='.http_cache/responses.sqlite', help='HTTP缓存文件路径')
+    parser.add_argument('--cache-ttl', type=int, default=3600, help='缓存新鲜期（秒），期内不发请求')
+    parser.add_argument('--cache-max-mb', type=int, default=200, help='缓存容量上限（MB），超出按LRU淘汰')
     
     args = parser.parse_args()
     
-    runner = ScraperRunner()
+    if args.incremental and (args.resume or args.retry_failed):
+        parser.error("--incremental 不能与 --resume/--retry-failed 同时使用")
+    if args.incremental and args.pipeline:
+        parser.error("--incremental 不能与 --pipeline 同时使用")
+    if args.changed_only and (args.pipeline or args.resume or args.retry_failed or args.prune):
+        parser.error("--changed-only 只发现有变化的游戏并合并回已有结果，不能与 --pipeline/--resume/--retry-failed/--prune 同时使用")
+    if args.tiered and args.engine == 'async':
+        parser.error("--tiered 只支持线程池引擎，不能与 --engine async 同时使用")
+    if args.data_route and args.engine == 'async':
+        parser.error("--data-route 只支持线程池引擎，不能与 --engine async 同时使用")
+    if args.data_route and args.tiered:
+        parser.error("--data-route 不能与 --tiered 同时使用")
+    
+    cache = None
+    if not args.no_cache and args.mode != 'demo':
+        cache = HttpCache(args.cache_path, ttl=args.cache_ttl, max_size_mb=args.cache_max_mb)
+    
+    config = load_config(args.config)
+    if args.base_url:
+        config['scraper']['base_url'] = args.base_url
+    
+    runner = ScraperRunner(engine=args.engine, concurrency=args.concurrency,
+                           per_host_limit=args.per_host, cache=cache,
+                           incremental=args.incremental, max_age_hours=args.max_age_hours,
+                           prune=args.prune, stream=args.stream, resume=args.resume,
+                           retry_failed=args.retry_failed, pipeline=args.pipeline,
+                           discover=args.discover, changed_only=args.changed_only,
+                           parse_processes=args.parse_processes, tiered=args.tiered,
+                           data_route=args.data_route, config=config)
     
     print("🎮 两步式爬虫系统")
     print("=" * 50)
@@ -183,6 +558,9 @@ def main():
     elif args.mode == 'step2':
         success = runner.run_step2_only(args.count)
     
+    if args.mode != 'demo':
+        runner.write_metrics()
+    
     if success:
         print("\n🎉 运行成功！")
         print("📁 检查生成的文件：")
@@ -195,6 +573,8 @@ def main():
             print("   - step1_homepage_games.json (第一步数据)")
         elif args.mode == 'step2':
             print("   - step2_detailed_games.json (第二步数据)")
+        if args.mode != 'demo':
+            print("   - scraper_metrics.prom / scraper_metrics.json (运行指标)")
         print("   - scraper.log (运行日志)")
         print("\n📝 使用模块化更新器更新数据：")
         if args.mode == 'demo':
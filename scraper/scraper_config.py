@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬虫配置加载：读取 config.json，缺失的字段使用默认值
+"""
+
+import copy
+import json
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://www.crazygames.com"
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "scraper": {
+        "base_url": DEFAULT_BASE_URL,
+        "max_games": 20,
+        "max_workers": 5,
+        "timeout": 30,
+        "rate_per_host": 2.0,
+        "burst": 5,
+        "min_rate_per_host": 0.2,
+        "retry_attempts": 3,
+        "backoff_base": 1.0,
+        "backoff_max": 60,
+        "pipeline_queue_size": 100,
+        "parse_processes": 0
+    },
+    "discovery": {
+        "max_depth": 2,
+        "max_pages": 500,
+        "max_pages_per_listing": 50,
+        "sitemap_url": "",
+        "sitemap_state_file": "sitemap_state.json"
+    },
+    "browser": {
+        "pages": 2,
+        "timeout": 30,
+        "recycle_after": 200,
+        "escalate_after": 3,
+        "probe_every": 25,
+        "tier_state_file": "tier_state.json"
+    },
+    "parser": {
+        "backend": "lxml",
+        "homepage_only_tags": False
+    },
+    "output": {
+        "step1_file": "step1_homepage_games.json",
+        "step2_file": "step2_detailed_games.json",
+        "merged_file": "merged_demo_data.json",
+        "log_file": "scraper.log",
+        "state_file": "crawl_state.sqlite",
+        "metrics_dir": ""
+    }
+}
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """递归合并配置，override 中的值优先"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def load_config(path: str = "config.json") -> Dict[str, Any]:
+    """加载配置文件"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            user_config = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"未找到配置文件 {path}，使用默认配置")
+        return copy.deepcopy(DEFAULT_CONFIG)
+    except Exception as e:
+        logger.error(f"读取配置文件 {path} 失败: {e}，使用默认配置")
+        return copy.deepcopy(DEFAULT_CONFIG)
+
+    return _deep_merge(DEFAULT_CONFIG, user_config)
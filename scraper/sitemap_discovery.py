@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+站点地图发现：读取 sitemap.xml 索引及其子站点地图（支持 .xml.gz），流式解析出 /game/ URL
+可按 <lastmod> 只取上次运行之后有变化的游戏，输出与第一步相同的 HomepageGameInfo
+发现完成时只记录"待确认"的运行时间，第二步全部成功后由 commit_last_run 推进上次运行时间
+changed_only 时另外记录本次发现的有变化的URL（pending_changed），单独运行第二步时只爬取这些URL
+"""
+
+import gzip
+import io
+import json
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from html_parsers import HtmlParserBackend
+from http_cache import HttpCache
+from rate_limiter import RateLimiter
+from scraper_config import DEFAULT_BASE_URL
+from step1_homepage_scraper import HomepageScraper, HomepageGameInfo
+from streaming_output import atomic_write_json, load_games
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def _local_name(tag: str) -> str:
+    """去掉XML命名空间，例如 {http://www.sitemaps.org/...}loc -> loc"""
+    return tag.rsplit('}', 1)[-1]
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """解析 W3C 日期时间（2025-09-01 / 2025-09-01T10:00:00+00:00 / ...Z），统一为UTC"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+def iter_sitemap(content: bytes) -> Iterator[Tuple[str, str, Optional[str], str, str]]:
+    """流式解析站点地图，逐条产出 (类型 sitemap/url, loc, lastmod, 图片, 图片标题)
+
+    content 是 _fetch_bytes 整体读入的响应正文（启用缓存时也整体存入缓存），内存占用与正文大小成正比
+    （.xml.gz 是压缩后的大小，普通 .xml 是传输解压后的大小）；解析本身是流式的：.xml.gz 边解压边解析，
+    每条记录处理完即清除，元素树不会整体留在内存中
+    """
+    source = io.BytesIO(content)
+    if content[:2] == GZIP_MAGIC:
+        source = gzip.GzipFile(fileobj=source)
+
+    root = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+
+        kind = _local_name(elem.tag)
+        if kind not in ('url', 'sitemap'):
+            continue
+
+        loc = lastmod = None
+        image = image_title = ''
+        for child in elem:
+            name = _local_name(child.tag)
+            if name == 'loc':
+                loc = (child.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = (child.text or '').strip()
+            elif name == 'image' and not image:
+                # 图片扩展 <image:image><image:loc/><image:title/></image:image>
+                for image_child in child:
+                    image_name = _local_name(image_child.tag)
+                    if image_name == 'loc':
+                        image = (image_child.text or '').strip()
+                    elif image_name == 'title':
+                        image_title = (image_child.text or '').strip()
+
+        elem.clear()
+        root.clear()
+        if loc:
+            yield kind, loc, lastmod, image, image_title
+
+def is_game_url(url: str) -> bool:
+    """是否是游戏详情页URL（/game/<slug>）"""
+    path = urlparse(url).path.rstrip('/')
+    return path.startswith('/game/') and path.count('/') == 2
+
+def title_from_url(url: str) -> str:
+    """站点地图没有标题时，从URL的slug生成标题，例如 /game/moto-x3m -> Moto X3M"""
+    return urlparse(url).path.rstrip('/').rsplit('/', 1)[-1].replace('-', ' ').title()
+
+class SitemapDiscovery(HomepageScraper):
+    """基于站点地图的游戏发现：不渲染、不解析任何列表页HTML"""
+
+    def __init__(self, cache: Optional[HttpCache] = None, parser: Optional[HtmlParserBackend] = None,
+                 limiter: Optional[RateLimiter] = None, sitemap_url: str = "",
+                 state_file: str = "sitemap_state.json", changed_only: bool = False,
+                 base_url: str = DEFAULT_BASE_URL):
+        super().__init__(cache=cache, parser=parser, limiter=limiter, base_url=base_url)
+        # 未配置时先查 robots.txt 中的 Sitemap: 声明，再回退到 /sitemap.xml
+        self.sitemap_url = sitemap_url
+        self.state_file = Path(state_file)
+        self.changed_only = changed_only
+
+    @classmethod
+    def from_config(cls, config: dict, cache: Optional[HttpCache] = None,
+                    parser: Optional[HtmlParserBackend] = None, limiter: Optional[RateLimiter] = None,
+                    changed_only: bool = False) -> 'SitemapDiscovery':
+        """根据 config.json 的 discovery 段创建"""
+        discovery_config = config.get('discovery', {})
+        return cls(cache=cache, parser=parser, limiter=limiter,
+                   sitemap_url=discovery_config.get('sitemap_url', ''),
+                   state_file=discovery_config.get('sitemap_state_file', 'sitemap_state.json'),
+                   changed_only=changed_only,
+                   base_url=config.get('scraper', {}).get('base_url', DEFAULT_BASE_URL))
+
+    def iter_homepage_games(self, max_games: int = 0) -> Iterator[HomepageGameInfo]:
+        """逐个产出站点地图中的游戏，max_games <= 0 表示不限数量
+
+        changed_only 时只产出 <lastmod> 晚于上次完整运行的游戏（没有 lastmod 的一律产出）
+        完整读完站点地图后只记录待确认的运行时间，见 commit_last_run；产出的URL记录为 pending_changed
+        """
+        started_at = datetime.now(timezone.utc)
+        since = self._last_run() if self.changed_only else None
+        if self.changed_only:
+            logger.info(f"只发现 {since.isoformat() if since else '（首次运行，全部）'} 之后有变化的游戏")
+
+        root_url = self.sitemap_url or self._find_sitemap_url()
+        pending = [root_url]
+        visited = set()
+        seen = set()
+        emitted = skipped = sitemaps = errors = 0
+        changed: List[str] = []
+
+        while pending:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                content = self._fetch_bytes(sitemap_url)
+            except Exception as e:
+                logger.error(f"获取站点地图 {sitemap_url} 失败: {e}")
+                errors += 1
+                continue
+            sitemaps += 1
+
+            try:
+                for kind, loc, lastmod, image, image_title in iter_sitemap(content):
+                    modified = parse_lastmod(lastmod)
+                    if kind == 'sitemap':
+                        # 子站点地图本身未变化时，其中的游戏也不会变化
+                        if since and modified and modified <= since:
+                            continue
+                        pending.append(urljoin(sitemap_url, loc))
+                        continue
+
+                    if not is_game_url(loc) or loc in seen:
+                        continue
+                    seen.add(loc)
+                    if since and modified and modified <= since:
+                        skipped += 1
+                        continue
+
+                    emitted += 1
+                    changed.append(loc)
+                    yield HomepageGameInfo(
+                        category=self._extract_category(loc),
+                        collected_at=datetime.now().isoformat(),
+                        image=image,
+                        title=image_title or title_from_url(loc),
+                        url=loc
+                    )
+                    if 0 < max_games <= emitted:
+                        logger.info(f"站点地图发现达到数量上限 {max_games}，本次不更新上次运行时间")
+                        self._save_pending_run(None, changed)
+                        return
+            except (ET.ParseError, OSError, EOFError) as e:
+                logger.error(f"解析站点地图 {sitemap_url} 失败: {e}")
+                errors += 1
+
+        logger.info(f"站点地图发现完成：读取 {sitemaps} 个站点地图，发现 {emitted} 个游戏"
+                    + (f"，跳过 {skipped} 个未变化的游戏" if since else ""))
+        if self.cache:
+            self.cache.log_stats()
+        if errors:
+            # 没有读到的站点地图中的变化不能被跳过
+            logger.warning(f"有 {errors} 个站点地图读取失败，本次不更新上次运行时间")
+        self._save_pending_run(None if errors else started_at, changed)
+
+    def _fetch_bytes(self, url: str) -> bytes:
+        """请求原始字节（.xml.gz 需要自行解压），正文整体读入内存
+
+        未压缩的 .xml 经 Content-Encoding 传输时由 requests 解压，得到的是解压后的正文
+        """
+        if self.cache:
+            return self.cache.get(url, self._send).body
+
+        response = self._send(url)
+        response.raise_for_status()
+        return response.content
+
+    def _find_sitemap_url(self) -> str:
+        """从 robots.txt 的 Sitemap: 声明中查找站点地图地址"""
+        try:
+            robots = self._fetch(urljoin(self.base_url + '/', 'robots.txt'))
+            for line in robots.splitlines():
+                if line.lower().startswith('sitemap:'):
+                    return line.split(':', 1)[1].strip()
+        except Exception as e:
+            logger.warning(f"读取 robots.txt 失败: {e}")
+        return urljoin(self.base_url + '/', 'sitemap.xml')
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取 {self.state_file} 失败，视为首次运行: {e}")
+            return {}
+
+    def _last_run(self) -> Optional[datetime]:
+        return parse_lastmod(self._load_state().get('last_run'))
+
+    def _save_state(self, state: Dict[str, Any]):
+        try:
+            atomic_write_json(state, str(self.state_file))
+        except Exception as e:
+            logger.error(f"保存 {self.state_file} 失败: {e}")
+
+    def _save_pending_run(self, started_at: Optional[datetime], changed: List[str]):
+        """记录本次发现的开始时间，等第二步成功后再生效（运行期间发生的变化下次仍会被发现）
+
+        started_at 为 None 表示没有读完站点地图，不能推进上次运行时间；
+        changed_only 时同时记录有变化的URL，否则清除（第二步应爬取第一步的全部结果）
+        """
+        state = self._load_state()
+        if started_at:
+            state['pending_run'] = started_at.isoformat()
+        else:
+            state.pop('pending_run', None)
+        if self.changed_only:
+            state['pending_changed'] = changed
+        else:
+            state.pop('pending_changed', None)
+        self._save_state(state)
+
+    def changed_urls(self) -> Optional[List[str]]:
+        """最近一次 changed_only 发现的有变化的URL，尚未被第二步成功爬取；没有记录时为 None"""
+        return self._load_state().get('pending_changed')
+
+    def commit_last_run(self) -> bool:
+        """第二步全部成功后调用：把待确认的运行时间设为上次运行时间
+
+        第二步崩溃或有游戏失败时不调用，下次 changed_only 仍会发现这些游戏
+        """
+        state = self._load_state()
+        changed = state.pop('pending_changed', None)
+        pending = state.pop('pending_run', None)
+        if not pending:
+            if changed is not None:
+                self._save_state(state)
+            return False
+        state['last_run'] = pending
+        self._save_state(state)
+        logger.info(f"站点地图上次运行时间已更新为 {pending}")
+        return True
+
+    def save_to_json(self, games: List[HomepageGameInfo], filename: str = "step1_homepage_games.json"):
+        """保存第一步结果；changed_only 时只发现了有变化的游戏，合并进已有的结果文件而不是覆盖"""
+        if self.changed_only:
+            games = self._merge_existing(games, filename)
+        return super().save_to_json(games, filename)
+
+    @staticmethod
+    def _merge_existing(games: List[HomepageGameInfo], filename: str) -> List[HomepageGameInfo]:
+        """已有记录保持原顺序，有变化的游戏原位替换，新游戏追加在后"""
+        try:
+            records = load_games(filename)
+        except FileNotFoundError:
+            return games
+        except Exception as e:
+            logger.warning(f"读取已有的第一步结果 {filename} 失败，只保存本次发现的游戏: {e}")
+            return games
+
+        known_fields = {f.name for f in fields(HomepageGameInfo)}
+        merged: Dict[str, HomepageGameInfo] = {}
+        for record in records:
+            if record.get('url'):
+                merged[record['url']] = HomepageGameInfo(**{k: v for k, v in record.items() if k in known_fields})
+        for game in games:
+            merged[game.url] = game
+        logger.info(f"合并进已有的第一步结果：有变化 {len(games)} 个，共 {len(merged)} 个游戏")
+        return list(merged.values())
+
+def main():
+    """主函数：从站点地图生成第一步结果文件"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='站点地图游戏发现')
+    parser.add_argument('--sitemap-url', default='', help='站点地图地址（默认从 robots.txt 查找）')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='只发现上次运行之后有变化的游戏，合并进已有的输出文件并记录这些URL')
+    parser.add_argument('--output', default='step1_homepage_games.json', help='输出文件')
+    args = parser.parse_args()
+
+    # 这里只生成第一步结果，上次运行时间要等第二步成功后由 run_scraper.py 推进
+    discovery = SitemapDiscovery(sitemap_url=args.sitemap_url, changed_only=args.changed_only)
+    games = discovery.scrape_homepage(0)
+    if games:
+        discovery.save_to_json(games, args.output)
+    else:
+        logger.warning("站点地图中未发现需要更新的游戏")
+
+if __name__ == "__main__":
+    main()
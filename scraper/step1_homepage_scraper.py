@@ -6,14 +6,17 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import logging
 from datetime import datetime
 from dataclasses import dataclass, asdict
-from typing import List, Optional
-import time
-import random
+from typing import Iterator, List, Optional
+
+from html_parsers import HtmlParserBackend
+from http_cache import HttpCache
+from metrics import metrics, PARSE_SECONDS
+from rate_limiter import RateLimiter
+from scraper_config import DEFAULT_BASE_URL
 
 # 配置日志
 logging.basicConfig(
@@ -35,11 +38,128 @@ class HomepageGameInfo:
     title: str
     url: str
 
+# 游戏卡片容器中查找封面图片的选择器（按优先级）
+CARD_IMAGE_SELECTORS = [
+    'img[src*="crazygames"]',
+    'img[src*="imgs.crazygames"]',
+    'img[data-src*="crazygames"]',
+    'img[data-lazy*="crazygames"]',
+    '.game-image img',
+    '.game-cover img',
+    '.game-thumbnail img',
+    'img[alt*="game"]',
+    'img[alt*="Game"]'
+]
+
+# 整个页面中查找游戏图片的选择器（按优先级）
+PAGE_IMAGE_SELECTORS = [
+    'img[src*="imgs.crazygames.com"]',
+    'img[src*="crazygames.com/images"]',
+    'img[data-src*="imgs.crazygames.com"]',
+    'img[data-lazy*="imgs.crazygames.com"]'
+]
+
+class LinkImageIndex:
+    """链接-卡片-图片索引：每个页面遍历一次，之后按字典查找每个链接的封面图
+    
+    查找顺序与逐个链接搜索时完全一致：
+    1. 链接内的第一张图片  2. 父元素  3. 祖父元素
+    4. 最近的 div/article/section 卡片容器（按 CARD_IMAGE_SELECTORS 优先级）
+    5. 整个页面的游戏图片（按 PAGE_IMAGE_SELECTORS 优先级）
+    """
+    
+    def __init__(self, soup, scraper: 'HomepageScraper'):
+        self.soup = soup
+        self.scraper = scraper
+        self._src_cache = {}
+        
+        # 每个节点下的第一张图片：id(节点) -> img
+        self.first_image = {}
+        for img in soup.find_all('img'):
+            self._register(img, self.first_image, lambda node: id(node))
+        
+        # 卡片容器中每个选择器命中的第一张图片：(id(节点), 选择器序号) -> img
+        self.card_image = {}
+        for index, selector in enumerate(CARD_IMAGE_SELECTORS):
+            for img in soup.select(selector):
+                self._register(img, self.card_image, lambda node, i=index: (id(node), i))
+        
+        # 页面级候选图片：第一张有效图片，以及第一张URL含游戏关键词的图片
+        self.page_first = ""
+        self.page_first_keyword = ""
+        for selector in PAGE_IMAGE_SELECTORS:
+            for img in soup.select(selector):
+                src = self._src(img)
+                if not src:
+                    continue
+                if not self.page_first:
+                    self.page_first = src
+                if not self.page_first_keyword and scraper._has_game_keyword(src):
+                    self.page_first_keyword = src
+            if self.page_first_keyword:
+                break
+    
+    @staticmethod
+    def _register(img, table: dict, make_key):
+        """把图片登记到所有祖先节点上，遇到已登记的祖先即停止（其更上层祖先也已登记）"""
+        for ancestor in img.parents:
+            key = make_key(ancestor)
+            if key in table:
+                break
+            table[key] = img
+    
+    def _src(self, img) -> str:
+        """带缓存的图片URL提取"""
+        key = id(img)
+        if key not in self._src_cache:
+            self._src_cache[key] = self.scraper._get_image_src(img)
+        return self._src_cache[key]
+    
+    def resolve(self, link) -> str:
+        """查找链接对应的封面图片"""
+        # 1-3. 链接本身、父元素、祖父元素中的第一张图片
+        parent = link.parent
+        grandparent = parent.parent if parent else None
+        for node in (link, parent, grandparent):
+            if node is not None:
+                img = self.first_image.get(id(node))
+                if img:
+                    src = self._src(img)
+                    if src:
+                        return src
+        
+        # 4. 游戏卡片容器
+        game_card = link.find_parent(['div', 'article', 'section'])
+        if game_card:
+            card_key = id(game_card)
+            for index in range(len(CARD_IMAGE_SELECTORS)):
+                img = self.card_image.get((card_key, index))
+                if img:
+                    src = self._src(img)
+                    if src:
+                        return src
+        
+        # 5. 页面级游戏图片
+        if self.page_first and self.scraper._is_game_image(self.page_first, link):
+            return self.page_first
+        if self.page_first_keyword and self.scraper._is_game_image(self.page_first_keyword, link):
+            return self.page_first_keyword
+        
+        return ""
+
 class HomepageScraper:
     """主页爬虫类"""
     
-    def __init__(self):
-        self.base_url = "https://www.crazygames.com"
+    # 指标中的阶段标签（全目录发现和站点地图发现同属第一步）
+    stage = 'step1'
+    
+    def __init__(self, cache: Optional[HttpCache] = None, parser: Optional[HtmlParserBackend] = None,
+                 limiter: Optional[RateLimiter] = None, base_url: str = DEFAULT_BASE_URL):
+        # 站点根地址（负载测试时指向本地模拟源站）
+        self.base_url = base_url.rstrip('/')
+        # 默认使用lxml解析完整DOM（卡片容器用于查找封面图）
+        self.parser = parser or HtmlParserBackend('lxml')
+        self._image_index = None
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -47,29 +167,34 @@ class HomepageScraper:
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache'
+            'Upgrade-Insecure-Requests': '1'
         })
+        # 可选的磁盘响应缓存（条件请求重新验证）
+        self.cache = cache
+        # 按主机限速、失败重试
+        self.limiter = limiter or RateLimiter()
     
     def scrape_homepage(self, max_games: int = 20) -> List[HomepageGameInfo]:
         """爬取主页游戏信息"""
+        return list(self.iter_homepage_games(max_games))
+    
+    def iter_homepage_games(self, max_games: int = 20) -> Iterator[HomepageGameInfo]:
+        """逐个产出主页游戏信息，每提取一个就立即交给调用方（流水线模式下直接进入第二步队列）"""
         logger.info(f"开始爬取主页，目标游戏数量: {max_games}")
         
         try:
             # 请求主页
-            response = self.session.get(self.base_url, timeout=30)
-            response.raise_for_status()
+            html = self._fetch(self.base_url)
             
             # 保存调试HTML
             with open('debug_homepage.html', 'w', encoding='utf-8') as f:
-                f.write(response.text)
+                f.write(html)
             logger.info("已保存调试HTML到 debug_homepage.html")
             
             # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_page(html)
             
-            games = []
+            count = 0
             
             # 尝试多种选择器来找到游戏链接
             game_selectors = [
@@ -100,23 +225,39 @@ class HomepageScraper:
             for i, link in enumerate(game_links[:max_games]):
                 try:
                     game_info = self._extract_game_info(link, soup)
-                    if game_info:
-                        games.append(game_info)
-                        logger.info(f"成功提取游戏 {i+1}: {game_info.title}")
-                    
-                    # 添加随机延迟
-                    time.sleep(random.uniform(0.5, 1.5))
-                    
                 except Exception as e:
                     logger.error(f"处理游戏链接 {i+1} 时出错: {e}")
                     continue
+                
+                if game_info:
+                    count += 1
+                    logger.info(f"成功提取游戏 {i+1}: {game_info.title}")
+                    yield game_info
             
-            logger.info(f"主页爬取完成，共获取 {len(games)} 个游戏")
-            return games
+            logger.info(f"主页爬取完成，共获取 {count} 个游戏")
+            if self.cache:
+                self.cache.log_stats()
             
         except Exception as e:
             logger.error(f"爬取主页时出错: {e}")
-            return []
+    
+    def _fetch(self, url: str) -> str:
+        """请求页面，启用缓存时走条件请求"""
+        if self.cache:
+            return self.cache.get(url, self._send).text
+        
+        response = self._send(url)
+        response.raise_for_status()
+        return response.text
+    
+    def _send(self, url: str, headers: Optional[dict] = None):
+        """经过限速器发送请求"""
+        return self.limiter.request(self.session, url, headers=headers, stage=self.stage)
+    
+    def _parse_page(self, html):
+        """解析列表页HTML并记录解析耗时"""
+        with metrics.timer(PARSE_SECONDS, stage=self.stage, path='listing'):
+            return self.parser.parse(html)
     
     def _extract_game_info(self, link, soup) -> Optional[HomepageGameInfo]:
         """从游戏链接中提取信息"""
@@ -179,73 +320,14 @@ class HomepageScraper:
         return "未知游戏"
     
     def _extract_image(self, link, soup) -> str:
-        """提取游戏图片"""
-        # 尝试多种方式获取游戏封面图片
-        
-        # 1. 从链接中找图片
-        img = link.find('img')
-        if img:
-            src = self._get_image_src(img)
-            if src:
-                return src
-        
-        # 2. 从父元素找图片
-        parent = link.parent
-        if parent:
-            img = parent.find('img')
-            if img:
-                src = self._get_image_src(img)
-                if src:
-                    return src
-        
-        # 3. 从祖父元素找图片
-        grandparent = parent.parent if parent else None
-        if grandparent:
-            img = grandparent.find('img')
-            if img:
-                src = self._get_image_src(img)
-                if src:
-                    return src
-        
-        # 4. 尝试从游戏卡片容器中找图片
-        game_card = link.find_parent(['div', 'article', 'section'])
-        if game_card:
-            # 查找游戏封面图片的常见选择器
-            img_selectors = [
-                'img[src*="crazygames"]',
-                'img[src*="imgs.crazygames"]',
-                'img[data-src*="crazygames"]',
-                'img[data-lazy*="crazygames"]',
-                '.game-image img',
-                '.game-cover img',
-                '.game-thumbnail img',
-                'img[alt*="game"]',
-                'img[alt*="Game"]'
-            ]
-            
-            for selector in img_selectors:
-                img = game_card.select_one(selector)
-                if img:
-                    src = self._get_image_src(img)
-                    if src:
-                        return src
-        
-        # 5. 尝试从整个页面中查找相关的游戏图片
-        page_img_selectors = [
-            'img[src*="imgs.crazygames.com"]',
-            'img[src*="crazygames.com/images"]',
-            'img[data-src*="imgs.crazygames.com"]',
-            'img[data-lazy*="imgs.crazygames.com"]'
-        ]
-        
-        for selector in page_img_selectors:
-            imgs = soup.select(selector)
-            for img in imgs:
-                src = self._get_image_src(img)
-                if src and self._is_game_image(src, link):
-                    return src
-        
-        return ""
+        """提取游戏图片（通过预先建立的链接-图片索引查找）"""
+        return self._get_image_index(soup).resolve(link)
+    
+    def _get_image_index(self, soup) -> 'LinkImageIndex':
+        """获取当前页面的图片索引，每个页面只建立一次"""
+        if self._image_index is None or self._image_index.soup is not soup:
+            self._image_index = LinkImageIndex(soup, self)
+        return self._image_index
     
     def _get_image_src(self, img) -> str:
         """从img元素中获取图片URL"""
@@ -297,18 +379,20 @@ class HomepageScraper:
         # 获取链接的文本内容
         link_text = link.get_text(strip=True).lower()
         
-        # 检查图片URL是否与游戏相关
-        src_lower = src.lower()
-        
         # 如果图片URL包含游戏相关关键词
-        game_keywords = ['game', 'racing', 'car', 'sport', 'action', 'puzzle']
-        has_game_keyword = any(keyword in src_lower for keyword in game_keywords)
+        has_game_keyword = self._has_game_keyword(src)
         
         # 如果链接文本与图片相关
         has_link_text = link_text and len(link_text) > 2
         
         return has_game_keyword or has_link_text
     
+    def _has_game_keyword(self, src: str) -> bool:
+        """图片URL是否包含游戏相关关键词"""
+        src_lower = src.lower()
+        game_keywords = ['game', 'racing', 'car', 'sport', 'action', 'puzzle']
+        return any(keyword in src_lower for keyword in game_keywords)
+    
     def _extract_category(self, url: str) -> str:
         """从URL中提取分类"""
         try:
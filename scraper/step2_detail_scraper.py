@@ -6,16 +6,25 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import logging
 from datetime import datetime
 from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict, Any
-import time
-import random
+from typing import Callable, List, Optional, Dict, Any, Tuple, Union
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from html_parsers import HtmlParserBackend
+from http_cache import HttpCache
+from metrics import metrics, ITEMS, PARSE_SECONDS
+from rate_limiter import RateLimiter
+from scraper_config import DEFAULT_BASE_URL
+from streaming_output import JsonlWriter, atomic_write_json
 
 # 配置日志
 logging.basicConfig(
@@ -28,6 +37,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+NEXT_DATA_ID = b'__NEXT_DATA__'
+
+def extract_next_data(content: bytes) -> Optional[Dict[str, Any]]:
+    """在原始HTML字节中定位 <script id="__NEXT_DATA__"> 并只解码这一段JSON"""
+    marker = content.find(NEXT_DATA_ID)
+    while marker != -1:
+        tag_start = content.rfind(b'<script', 0, marker)
+        tag_end = content.find(b'>', marker)
+        # 标记必须位于script开始标签内部
+        if tag_start != -1 and tag_end != -1 and content.find(b'>', tag_start, marker) == -1:
+            body_end = content.find(b'</script>', tag_end)
+            if body_end == -1:
+                return None
+            try:
+                return json.loads(content[tag_end + 1:body_end])
+            except ValueError:
+                return None
+        marker = content.find(NEXT_DATA_ID, marker + len(NEXT_DATA_ID))
+    return None
+
 @dataclass
 class DetailedGameInfo:
     """详细游戏信息数据结构"""
@@ -46,8 +75,15 @@ class DetailedGameInfo:
 class DetailScraper:
     """详情页爬虫类"""
     
-    def __init__(self, max_workers: int = 5):
-        self.base_url = "https://www.crazygames.com"
+    # 指标中的阶段标签
+    stage = 'step2'
+    
+    def __init__(self, max_workers: int = 5, cache: Optional[HttpCache] = None,
+                 parser: Optional[HtmlParserBackend] = None, limiter: Optional[RateLimiter] = None,
+                 parse_processes: int = 0, base_url: str = DEFAULT_BASE_URL):
+        self.base_url = base_url.rstrip('/')
+        # 回退提取需要完整DOM，不做标签过滤
+        self.parser = parser or HtmlParserBackend('lxml')
         self.max_workers = max_workers
         self.session = requests.Session()
         self.session.headers.update({
@@ -56,97 +92,323 @@ class DetailScraper:
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache'
+            'Upgrade-Insecure-Requests': '1'
         })
+        # 可选的磁盘响应缓存（条件请求重新验证）
+        self.cache = cache
+        # 按主机限速、失败重试（取代固定的随机延迟）
+        self.limiter = limiter or RateLimiter()
+        # 解析进程数：>0 时I/O线程只下载字节，解析交给进程池，不再争抢GIL
+        self.parse_processes = parse_processes
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
     
-    def scrape_game_details(self, game_urls: List[str]) -> List[DetailedGameInfo]:
-        """并发爬取多个游戏的详细信息"""
+    def scrape_game_details(self, game_urls: List[str],
+                            on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+                            on_failure: Optional[Callable[[str, str], None]] = None) -> List[DetailedGameInfo]:
+        """并发爬取多个游戏的详细信息
+        
+        指定 on_result 时每条结果完成后立即交给回调，不再保存在返回的列表中；
+        on_failure(url, 错误信息) 在单个游戏爬取失败时调用
+        """
         logger.info(f"开始爬取 {len(game_urls)} 个游戏的详细信息")
         
         detailed_games = []
+        success_count = 0
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交所有任务
-            future_to_url = {
-                executor.submit(self._scrape_single_game, url): url 
-                for url in game_urls
-            }
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor, self._parse_stage() as parse_pool:
+            if parse_pool:
+                outcomes = self._iter_two_stage(executor, game_urls)
+            else:
+                outcomes = self._iter_single_stage(executor, game_urls)
             
-            # 处理完成的任务
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    game_info = future.result()
-                    if game_info:
-                        detailed_games.append(game_info)
-                        logger.info(f"✅ 成功爬取: {game_info.title}")
-                    else:
-                        logger.warning(f"❌ 爬取失败: {url}")
-                except Exception as e:
-                    logger.error(f"❌ 爬取 {url} 时出错: {e}")
-        
-        logger.info(f"详情页爬取完成，共获取 {len(detailed_games)} 个游戏的详细信息")
+            # 按完成顺序处理结果
+            for url, game_info, error in outcomes:
+                if self._report(url, game_info, error, detailed_games, on_result, on_failure):
+                    success_count += 1
+        
+        logger.info(f"详情页爬取完成，共获取 {success_count} 个游戏的详细信息")
+        self.limiter.log_stats()
+        if self.cache:
+            self.cache.log_stats()
         return detailed_games
     
-    def _scrape_single_game(self, url: str) -> Optional[DetailedGameInfo]:
-        """爬取单个游戏的详细信息"""
-        try:
-            # 添加随机延迟
-            time.sleep(random.uniform(1, 3))
-            
-            # 请求游戏详情页
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 从Next.js数据中提取游戏信息
-            game_data = self._extract_game_data_from_script(soup)
+    def scrape_game_details_from_queue(self, url_queue: queue.Queue,
+                                       on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+                                       on_failure: Optional[Callable[[str, str], None]] = None
+                                       ) -> List[DetailedGameInfo]:
+        """流水线模式：工作线程持续从 url_queue 取URL爬取，取到 None 结束标记后退出
+        
+        回调都在调用线程中执行，与 scrape_game_details 相同
+        """
+        logger.info(f"开始从队列爬取游戏详细信息 (工作线程 {self.max_workers})")
+        
+        results: queue.Queue = queue.Queue()
+        # 已取出的URL数：每个URL恰好产生一条结果（启用解析进程池时结果可能晚于工作线程退出）
+        taken = [0]
+        taken_lock = threading.Lock()
+        
+        def worker():
+            try:
+                while True:
+                    url = url_queue.get()
+                    if url is None:
+                        # 放回结束标记，让其他工作线程也能退出
+                        url_queue.put(None)
+                        break
+                    with taken_lock:
+                        taken[0] += 1
+                    try:
+                        if parse_pool:
+                            self._submit_parse(url, self._fetch_content(url), results)
+                        else:
+                            results.put((url, self._fetch_and_parse(url), None))
+                    except Exception as e:
+                        results.put((url, None, e))
+            finally:
+                results.put(None)
+        
+        detailed_games = []
+        success_count = 0
+        
+        with self._parse_stage() as parse_pool:
+            workers = [threading.Thread(target=worker, name=f"step2-worker-{i}", daemon=True)
+                       for i in range(self.max_workers)]
+            for thread in workers:
+                thread.start()
             
-            if game_data:
-                # 使用提取的游戏数据
-                title = game_data.get('name', self._extract_title(soup))
-                iframe_url = self._extract_iframe_url_from_data(game_data, url)
-                description = self._extract_description_from_data(game_data)
-                features = self._extract_features_from_data(game_data)
-                favorites = game_data.get('upvotes', 0)
-                likes = game_data.get('upvotes', 0)  # CrazyGames使用upvotes作为likes
-                duration = "5-10 分钟"  # 默认值
-                tags = self._extract_tags_from_data(game_data)
-                category = self._extract_category_from_data(game_data)
+            running = len(workers)
+            handled = 0
+            while running or handled < taken[0]:
+                item = results.get()
+                if item is None:
+                    running -= 1
+                    continue
+                handled += 1
+                if self._report(*item, detailed_games, on_result, on_failure):
+                    success_count += 1
+        
+        logger.info(f"详情页爬取完成，共获取 {success_count} 个游戏的详细信息")
+        self.limiter.log_stats()
+        if self.cache:
+            self.cache.log_stats()
+        return detailed_games
+    
+    def _iter_single_stage(self, executor: ThreadPoolExecutor, game_urls: List[str]):
+        """单阶段：每个I/O线程下载并解析，按完成顺序产出 (url, 游戏信息, 错误)"""
+        future_to_url = {
+            executor.submit(self._fetch_and_parse, url): url 
+            for url in game_urls
+        }
+        
+        for future in as_completed(future_to_url):
+            url = future_to_url.pop(future)
+            try:
+                game_info = future.result()
+            except Exception as e:
+                yield url, None, e
             else:
-                # 回退到原始方法
-                title = self._extract_title(soup)
-                iframe_url = self._extract_iframe_url(soup, url)
-                description = self._extract_description(soup)
-                features = self._extract_features(soup)
-                favorites = self._extract_favorites(soup)
-                likes = self._extract_likes(soup)
-                duration = self._extract_duration(soup)
-                tags = self._extract_tags(soup)
-                category = "其他"  # 默认分类
+                yield url, game_info, None
+    
+    def _iter_two_stage(self, executor: ThreadPoolExecutor, game_urls: List[str]):
+        """两阶段：I/O线程只下载字节，下载完成即交给解析进程池，按完成顺序产出 (url, 游戏信息, 错误)"""
+        results: queue.Queue = queue.Queue()
+        for url in game_urls:
+            fetch = executor.submit(self._fetch_content, url)
+            fetch.add_done_callback(lambda future, url=url: self._on_fetched(url, future, results))
+        
+        for _ in range(len(game_urls)):
+            yield results.get()
+    
+    @contextmanager
+    def _parse_stage(self):
+        """爬取期间按需启动解析进程池（parse_processes <= 0 时不启用）"""
+        if self.parse_processes <= 0:
+            yield None
+            return
+        
+        # 使用 spawn 启动：I/O线程已在运行，fork 可能复制到被其他线程持有的锁
+        pool = ProcessPoolExecutor(max_workers=self.parse_processes,
+                                   mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_parse_worker,
+                                   initargs=(self.parser.backend, self.base_url))
+        logger.info(f"启用解析进程池：{self.parse_processes} 个进程")
+        self._parse_pool = pool
+        try:
+            yield pool
+        finally:
+            self._parse_pool = None
+            pool.shutdown()
+    
+    def _on_fetched(self, url: str, fetch: Future, results: queue.Queue):
+        """下载完成回调（在I/O线程中执行）：把字节提交到解析进程池，结果放入 results"""
+        try:
+            self._submit_parse(url, fetch.result(), results)
+        except Exception as e:
+            results.put((url, None, e))
+    
+    def _submit_parse(self, url: str, content: bytes, results: queue.Queue):
+        """把页面字节提交到解析进程池，解析完成后 (url, 游戏信息, 错误) 放入 results"""
+        def on_parsed(parse: Future):
+            try:
+                game_info, parse_path, seconds = parse.result()
+                self._record_parse(parse_path, seconds)
+                results.put((url, game_info, None))
+            except Exception as e:
+                results.put((url, None, e))
+        
+        self._parse_pool.submit(parse_game_page, content, url).add_done_callback(on_parsed)
+    
+    def _report(self, url: str, game_info: Optional[DetailedGameInfo], error: Optional[Exception],
+                detailed_games: List[DetailedGameInfo],
+                on_result: Optional[Callable[[DetailedGameInfo], None]],
+                on_failure: Optional[Callable[[str, str], None]]) -> bool:
+        """处理单个游戏的爬取结果：交给回调或收集到列表，返回是否成功"""
+        if game_info:
+            if on_result:
+                on_result(game_info)
+            else:
+                detailed_games.append(game_info)
+            metrics.inc(ITEMS, stage=self.stage, result='ok')
+            logger.info(f"✅ 成功爬取: {game_info.title}")
+            return True
+        
+        metrics.inc(ITEMS, stage=self.stage, result='failed')
+        if error:
+            logger.error(f"❌ 爬取 {url} 时出错: {error}")
+            if on_failure:
+                on_failure(url, str(error))
+        else:
+            logger.warning(f"❌ 爬取失败: {url}")
+            if on_failure:
+                on_failure(url, "未获取到详细信息")
+        return False
+    
+    def scrape_game_details_to_jsonl(self, game_urls: List[str], jsonl_path: str,
+                                     append: bool = False,
+                                     on_result: Optional[Callable[[DetailedGameInfo], None]] = None,
+                                     on_failure: Optional[Callable[[str, str], None]] = None) -> int:
+        """流式爬取：每完成一个游戏就追加一行JSONL，返回写入的记录数"""
+        with JsonlWriter(jsonl_path, append=append) as writer:
+            def write(game: DetailedGameInfo):
+                writer.write(asdict(game))
+                if on_result:
+                    on_result(game)
             
-            return DetailedGameInfo(
-                title=title,
-                url=url,
-                iframe_url=iframe_url,
-                description=description,
-                features=features,
-                favorites=favorites,
-                likes=likes,
-                duration=duration,
-                tags=tags,
-                category=category,
-                collected_at=datetime.now().isoformat()
-            )
+            self.scrape_game_details(game_urls, on_result=write, on_failure=on_failure)
+        return writer.count
+    
+    def _scrape_single_game(self, url: str) -> Optional[DetailedGameInfo]:
+        """爬取单个游戏的详细信息"""
+        try:
+            return self._fetch_and_parse(url)
             
         except Exception as e:
             logger.error(f"爬取游戏 {url} 时出错: {e}")
             return None
     
+    def _fetch_and_parse(self, url: str) -> DetailedGameInfo:
+        """请求并解析游戏详情页，出错时抛出异常"""
+        return self._parse_game_page(self._fetch_content(url), url)
+    
+    def _fetch_content(self, url: str) -> bytes:
+        """请求游戏详情页的原始字节，启用缓存时走条件请求"""
+        if self.cache:
+            return self.cache.get(url, self._send).body
+        
+        response = self._send(url)
+        response.raise_for_status()
+        return response.content
+    
+    def _send(self, url: str, headers: Optional[dict] = None):
+        """经过限速器发送请求"""
+        return self.limiter.request(self.session, url, headers=headers, stage=self.stage)
+    
+    def _parse_game_page(self, content: Union[bytes, str], url: str) -> DetailedGameInfo:
+        """解析详情页并记录解析耗时"""
+        game_info, parse_path, seconds = self._timed_parse(content, url)
+        self._record_parse(parse_path, seconds)
+        return game_info
+    
+    def _timed_parse(self, content: Union[bytes, str], url: str) -> Tuple[DetailedGameInfo, str, float]:
+        """解析详情页，返回 (游戏信息, 解析路径, 耗时秒数)"""
+        started = time.perf_counter()
+        game_info, parse_path = self._parse_detail(content, url)
+        return game_info, parse_path, time.perf_counter() - started
+    
+    def _record_parse(self, parse_path: str, seconds: float):
+        metrics.observe(PARSE_SECONDS, seconds, stage=self.stage, path=parse_path)
+    
+    def _parse_detail(self, content: Union[bytes, str], url: str) -> Tuple[DetailedGameInfo, str]:
+        """解析详情页，优先走 __NEXT_DATA__ 快速路径，只有失败时才构建DOM
+        
+        返回 (游戏信息, 解析路径)：next_data（原始字节快速路径）、script（扫描script标签）或 fallback（选择器回退）
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        
+        soup = None
+        parse_path = 'next_data'
+        
+        # 快速路径：直接在原始字节中定位 Next.js 数据
+        game_data = self._extract_next_data_game(content)
+        
+        if not game_data:
+            # 解析HTML，按旧方式扫描所有script标签
+            soup = self.parser.parse(content)
+            game_data = self._extract_game_data_from_script(soup)
+            parse_path = 'script' if game_data else 'fallback'
+        
+        if game_data:
+            # 使用提取的游戏数据
+            title = game_data.get('name')
+            if not title:
+                soup = soup or self.parser.parse(content)
+                title = self._extract_title(soup)
+            return self._game_info_from_data(game_data, url, title), parse_path
+        
+        # 回退到原始方法
+        return DetailedGameInfo(
+            title=self._extract_title(soup),
+            url=url,
+            iframe_url=self._extract_iframe_url(soup, url),
+            description=self._extract_description(soup),
+            features=self._extract_features(soup),
+            favorites=self._extract_favorites(soup),
+            likes=self._extract_likes(soup),
+            duration=self._extract_duration(soup),
+            tags=self._extract_tags(soup),
+            category="其他",  # 默认分类
+            collected_at=datetime.now().isoformat()
+        ), parse_path
+    
+    def _game_info_from_data(self, game_data: Dict[str, Any], url: str, title: str) -> DetailedGameInfo:
+        """由 props.pageProps.game 生成游戏信息（HTML中的 __NEXT_DATA__ 和数据路由JSON共用）"""
+        return DetailedGameInfo(
+            title=title,
+            url=url,
+            iframe_url=self._extract_iframe_url_from_data(game_data, url),
+            description=self._extract_description_from_data(game_data),
+            features=self._extract_features_from_data(game_data),
+            favorites=game_data.get('upvotes', 0),
+            likes=game_data.get('upvotes', 0),  # CrazyGames使用upvotes作为likes
+            duration="5-10 分钟",  # 默认值
+            tags=self._extract_tags_from_data(game_data),
+            category=self._extract_category_from_data(game_data),
+            collected_at=datetime.now().isoformat()
+        )
+    
+    def _extract_next_data_game(self, content: bytes) -> Optional[Dict[str, Any]]:
+        """从原始字节中直接提取 __NEXT_DATA__ 的 props.pageProps.game，不构建DOM"""
+        data = extract_next_data(content)
+        if not data:
+            return None
+        
+        try:
+            game = data['props']['pageProps']['game']
+        except (KeyError, TypeError):
+            return None
+        return game if isinstance(game, dict) else None
+    
     def _extract_game_data_from_script(self, soup) -> Optional[Dict[str, Any]]:
         """从script标签中提取游戏数据"""
         try:
@@ -456,8 +718,7 @@ class DetailScraper:
                 "games": [asdict(game) for game in games]
             }
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            atomic_write_json(data, filename)
             
             logger.info(f"详细数据已保存到 {filename}")
             return True
@@ -466,6 +727,21 @@ class DetailScraper:
             logger.error(f"保存详细数据时出错: {e}")
             return False
 
+# 解析进程中复用的爬虫实例（只用于解析，不发请求）
+_worker_scraper: Optional[DetailScraper] = None
+
+def _init_parse_worker(backend: str, base_url: str = DEFAULT_BASE_URL):
+    """解析进程初始化：按主进程的解析后端和站点地址创建爬虫实例"""
+    global _worker_scraper
+    _worker_scraper = DetailScraper(parser=HtmlParserBackend(backend), base_url=base_url)
+
+def parse_game_page(content: bytes, url: str) -> Tuple[DetailedGameInfo, str, float]:
+    """在解析进程中解析详情页字节（模块级函数，可被进程池pickle）
+
+    返回 (游戏信息, 解析路径, 耗时秒数)，解析耗时由主进程记录到指标中
+    """
+    return _worker_scraper._timed_parse(content, url)
+
 def main():
     """主函数"""
     # 从第一步的结果中读取游戏URL
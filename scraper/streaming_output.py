@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式输出：逐条追加JSONL记录并定期fsync，结束时原子地压缩为标准JSON信封
+（type / total_count / collected_at / games）
+"""
+
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class JsonlWriter:
+    """JSONL写入器：每条记录一行，每 fsync_every 条或 fsync_interval 秒落盘一次"""
+
+    def __init__(self, path: str, append: bool = False, fsync_every: int = 50,
+                 fsync_interval: float = 5.0):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        """追加一条记录"""
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+        self._pending += 1
+        if (self._pending >= self.fsync_every or
+                time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """刷新缓冲区并fsync到磁盘"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取JSONL记录，跳过崩溃时可能残留的不完整行"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"跳过 {path} 第 {line_no} 行不完整的记录")
+
+def load_games(path: str) -> List[Dict[str, Any]]:
+    """加载游戏记录：支持 .jsonl 以及带 games 字段的JSON信封或JSON数组"""
+    if str(path).endswith('.jsonl'):
+        return list(iter_jsonl(path))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data.get('games', [])
+    if isinstance(data, list):
+        return data
+    raise ValueError(f"未知的数据格式: {type(data)}")
+
+def _target_mode(target: Path) -> int:
+    """替换后文件应有的权限：沿用目标文件现有的权限，目标不存在时与 open() 新建文件一致（0o666 去掉 umask）"""
+    try:
+        return stat.S_IMODE(os.stat(target).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def _atomic_writer(target: Path):
+    """在目标文件同目录创建临时文件，写完后再重命名
+
+    mkstemp 创建的文件权限是 0600，替换后静态服务器、指标采集等以其他用户运行的进程会读不到，
+    所以先改成目标文件应有的权限
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", suffix='.tmp', dir=str(target.parent))
+    try:
+        os.fchmod(fd, _target_mode(target))
+    except BaseException:
+        os.close(fd)
+        os.unlink(tmp_path)
+        raise
+    return os.fdopen(fd, 'w', encoding='utf-8'), tmp_path
+
+def _commit(f, tmp_path: str, target: Path):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+    os.replace(tmp_path, target)
+
+def atomic_write_json(data: Dict[str, Any], path: str):
+    """原子写入JSON文件：崩溃时不会留下写了一半的文件"""
+    target = Path(path)
+    f, tmp_path = _atomic_writer(target)
+    try:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        _commit(f, tmp_path, target)
+    except BaseException:
+        f.close()
+        os.unlink(tmp_path)
+        raise
+
+def atomic_write_text(text: str, path: str):
+    """原子写入文本文件（例如被其他进程轮询读取的指标文件）"""
+    target = Path(path)
+    f, tmp_path = _atomic_writer(target)
+    try:
+        f.write(text)
+        _commit(f, tmp_path, target)
+    except BaseException:
+        f.close()
+        os.unlink(tmp_path)
+        raise
+
+def stage_text(text: str, path: str) -> str:
+    """把文本写入目标文件同目录的临时文件并落盘，返回临时文件路径
+
+    用于几个文件需要一起生效的场景：都暂存好之后再依次 os.replace，放弃时删除临时文件
+    """
+    target = Path(path)
+    f, tmp_path = _atomic_writer(target)
+    try:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        return tmp_path
+    except BaseException:
+        f.close()
+        os.unlink(tmp_path)
+        raise
+
+def atomic_write_chunks(chunks: Iterable[str], path: str, unchanged_sha256: Optional[str] = None,
+                        before_replace: Optional[Callable[[str], Any]] = None) -> str:
+    """把生成器逐块产生的文本流式写入临时文件，再原子地替换目标文件，返回内容的 sha256
+
+    内存占用只有当前这一块；内容的 sha256 等于 unchanged_sha256 时丢弃临时文件、不替换目标文件；
+    before_replace 在替换前以临时文件路径调用（例如验证新内容、备份旧文件），抛出异常时放弃替换
+    """
+    target = Path(path)
+    f, tmp_path = _atomic_writer(target)
+    digest = hashlib.sha256()
+    try:
+        for chunk in chunks:
+            f.write(chunk)
+            digest.update(chunk.encode('utf-8'))
+        content_hash = digest.hexdigest()
+        if content_hash == unchanged_sha256:
+            f.close()
+            os.unlink(tmp_path)
+            return content_hash
+        if before_replace is not None:
+            f.flush()
+            before_replace(tmp_path)
+        _commit(f, tmp_path, target)
+        return content_hash
+    except BaseException:
+        f.close()
+        os.unlink(tmp_path)
+        raise
+
+def compact_jsonl(jsonl_path: str, json_path: str, data_type: str) -> int:
+    """把JSONL流式压缩为标准JSON信封（格式与 json.dump(indent=2) 一致），返回记录数"""
+    total = sum(1 for _ in iter_jsonl(jsonl_path))
+    target = Path(json_path)
+    f, tmp_path = _atomic_writer(target)
+    try:
+        header = {
+            "type": data_type,
+            "total_count": total,
+            "collected_at": datetime.now().isoformat()
+        }
+        f.write('{\n')
+        for key, value in header.items():
+            f.write(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n')
+
+        if total == 0:
+            f.write('  "games": []\n}')
+        else:
+            f.write('  "games": [\n')
+            for i, record in enumerate(iter_jsonl(jsonl_path)):
+                item = json.dumps(record, ensure_ascii=False, indent=2)
+                f.write('    ' + item.replace('\n', '\n    '))
+                f.write(',\n' if i < total - 1 else '\n')
+            f.write('  ]\n}')
+        _commit(f, tmp_path, target)
+    except BaseException:
+        f.close()
+        os.unlink(tmp_path)
+        raise
+
+    logger.info(f"已将 {jsonl_path} 压缩为 {json_path}（{total} 条记录）")
+    return total
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据分片测试：生效后的分片和索引清单要能被以其他用户运行的静态服务器读取
+
+运行（在 scraper 目录下）：
+    python -m unittest discover tests
+"""
+
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRAPER_DIR = Path(__file__).resolve().parent.parent
+if str(SCRAPER_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRAPER_DIR))
+
+from game_shards import load_shard_games, shard_games, stage_shards
+
+GAMES = [
+    {'id': i, 'slug': f'game-{i}', 'title': f'Game {i}', 'image': '', 'category': category}
+    for i, category in enumerate(['action', 'action', 'puzzle', 'racing'], 1)
+]
+
+def file_mode(path: Path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+class StagedShardsModeTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.shard_dir = self.root / 'game-data'
+        self.manifest_path = self.root / 'gamesManifest.ts'
+        self.umask = os.umask(0o022)
+
+    def tearDown(self):
+        os.umask(self.umask)
+        self._tmp.cleanup()
+
+    def commit(self, games):
+        staged = stage_shards(games, shard_games(games), str(self.shard_dir), str(self.manifest_path))
+        staged.commit()
+        return staged
+
+    def test_new_files_follow_umask(self):
+        staged = self.commit(GAMES)
+        self.assertEqual(file_mode(self.manifest_path), 0o644)
+        for shard in staged.shards:
+            self.assertEqual(file_mode(self.shard_dir / shard.file), 0o644)
+        self.assertEqual(len(load_shard_games(str(self.shard_dir), str(self.manifest_path))), len(GAMES))
+
+    def test_replaced_manifest_keeps_its_mode(self):
+        self.commit(GAMES)
+        os.chmod(self.manifest_path, 0o664)
+        self.commit(GAMES[:2])
+        self.assertEqual(file_mode(self.manifest_path), 0o664)
+
+if __name__ == '__main__':
+    unittest.main()
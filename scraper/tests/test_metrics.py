@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+指标导出测试：.prom 文件要能被以其他用户运行的 node_exporter textfile collector 读取
+
+运行（在 scraper 目录下）：
+    python -m unittest discover tests
+"""
+
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRAPER_DIR = Path(__file__).resolve().parent.parent
+if str(SCRAPER_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRAPER_DIR))
+
+from metrics import MetricsRegistry
+
+def file_mode(path: str) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+class MetricsWriteModeTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        self.umask = os.umask(0o022)
+
+    def tearDown(self):
+        os.umask(self.umask)
+        self._tmp.cleanup()
+
+    def test_new_files_follow_umask(self):
+        for path in MetricsRegistry().write('test', self.directory):
+            self.assertEqual(file_mode(path), 0o644)
+
+    def test_rewritten_files_keep_their_mode(self):
+        prom_path, json_path = MetricsRegistry().write('test', self.directory)
+        os.chmod(prom_path, 0o664)
+        os.chmod(json_path, 0o640)
+        MetricsRegistry().write('test', self.directory)
+        self.assertEqual(file_mode(prom_path), 0o664)
+        self.assertEqual(file_mode(json_path), 0o640)
+
+if __name__ == '__main__':
+    unittest.main()
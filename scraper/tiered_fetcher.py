@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分级抓取：详情页先走普通HTTP（requests + 解析），HTML里找不到游戏数据时才升级到无头浏览器
+浏览器只在第一次需要时启动，复用有限个页面；按URL模式记住哪一级能拿到数据，之后直接使用
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+except ImportError:  # 可选依赖，仅浏览器回退需要
+    async_playwright = None
+    PlaywrightTimeoutError = None
+
+import requests
+
+from html_parsers import HtmlParserBackend
+from http_cache import HttpCache
+from metrics import metrics, ERRORS, FETCH_SECONDS, FETCH_TIERS, RESPONSE_BYTES, RESPONSES
+from rate_limiter import RateLimiter
+from scraper_config import DEFAULT_BASE_URL
+from step2_detail_scraper import DetailScraper, DetailedGameInfo
+from streaming_output import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+HTTP = 'http'
+BROWSER = 'browser'
+
+# 浏览器中不加载的资源类型和广告/统计域名
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "google-analytics.com", "googletagmanager.com", "imasdk.googleapis.com", "amazon-adsystem.com",
+)
+# 页面渲染出这些节点之一就可以取HTML了
+READY_SELECTOR = 'script#__NEXT_DATA__, h1'
+
+def url_pattern(url: str) -> str:
+    """URL模式：主机 + 第一段路径，例如 https://www.crazygames.com/game/moto-x3m -> www.crazygames.com/game/*"""
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    return f"{parsed.netloc}/{segments[0]}/*" if segments else f"{parsed.netloc}/"
+
+class TierMemory:
+    """按URL模式记录哪一级抓取能拿到数据
+
+    同一模式连续 escalate_after 次HTTP拿不到数据后直接使用浏览器；
+    之后每 probe_every 个URL再试一次HTTP，成功即切回（例如站点恢复了服务端渲染）
+    浏览器本身出错时下一个URL立即试HTTP，连续 escalate_after 次出错后恢复首选HTTP
+    """
+
+    def __init__(self, state_file: str = "", escalate_after: int = 3, probe_every: int = 25):
+        self.state_file = state_file
+        self.escalate_after = max(1, escalate_after)
+        self.probe_every = max(1, probe_every)
+        self._lock = threading.Lock()
+        self.patterns: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('patterns', {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取 {self.state_file} 失败，重新学习抓取级别: {e}")
+            return {}
+
+    def _entry(self, pattern: str) -> Dict[str, Any]:
+        entry = self.patterns.get(pattern)
+        if entry is None:
+            entry = self.patterns[pattern] = {"preferred": HTTP, "streak": 0, "since_probe": 0,
+                                              "http_ok": 0, "escalated": 0, "browser_ok": 0,
+                                              "browser_errors": 0}
+        return entry
+
+    def choose(self, url: str) -> str:
+        """这个URL先用哪一级抓取"""
+        with self._lock:
+            entry = self._entry(url_pattern(url))
+            if entry["preferred"] == HTTP:
+                return HTTP
+            entry["since_probe"] += 1
+            if entry["since_probe"] >= self.probe_every:
+                entry["since_probe"] = 0
+                return HTTP
+            return BROWSER
+
+    def record(self, url: str, tier: str, ok: bool):
+        """记录一次抓取结果：HTTP拿到数据 / HTTP需要升级 / 浏览器拿到数据"""
+        pattern = url_pattern(url)
+        with self._lock:
+            entry = self._entry(pattern)
+            if tier == BROWSER:
+                entry["browser_ok"] += int(ok)
+                entry["browser_errors"] = 0
+            elif ok:
+                entry["http_ok"] += 1
+                entry["streak"] = 0
+                if entry["preferred"] != HTTP:
+                    logger.info(f"🔽 {pattern} 的HTML重新包含游戏数据，恢复使用HTTP抓取")
+                entry["preferred"] = HTTP
+            else:
+                entry["escalated"] += 1
+                entry["streak"] += 1
+                if entry["preferred"] == HTTP and entry["streak"] >= self.escalate_after:
+                    logger.info(f"🔼 {pattern} 连续 {entry['streak']} 次需要浏览器，之后直接使用浏览器抓取")
+                    entry["preferred"] = BROWSER
+                    entry["since_probe"] = 0
+
+    def record_browser_error(self, url: str):
+        """记录一次浏览器抓取出错（崩溃、超时等，不是页面里没有数据）：降低该模式对浏览器的偏好"""
+        pattern = url_pattern(url)
+        with self._lock:
+            entry = self._entry(pattern)
+            entry["browser_errors"] = entry.get("browser_errors", 0) + 1
+            # 下一个URL直接试探HTTP
+            entry["since_probe"] = self.probe_every - 1
+            if entry["preferred"] == BROWSER and entry["browser_errors"] >= self.escalate_after:
+                logger.info(f"🔽 {pattern} 的浏览器抓取连续出错 {entry['browser_errors']} 次，恢复首选HTTP抓取")
+                entry["preferred"] = HTTP
+                entry["streak"] = 0
+                entry["browser_errors"] = 0
+
+    def save(self):
+        if not self.state_file:
+            return
+        with self._lock:
+            data = {"patterns": dict(self.patterns)}
+        try:
+            atomic_write_json(data, self.state_file)
+        except Exception as e:
+            logger.error(f"保存 {self.state_file} 失败: {e}")
+
+    def log_summary(self):
+        with self._lock:
+            for pattern, entry in self.patterns.items():
+                logger.info(f"🪜 {pattern}: 首选 {entry['preferred']}，HTTP成功 {entry['http_ok']} 次，"
+                            f"升级到浏览器 {entry['escalated']} 次，浏览器成功 {entry['browser_ok']} 次")
+
+class BrowserFetcher:
+    """后台线程里的事件循环 + 一个无头Chromium + 最多 pages 个页面，任意线程都可以同步调用 fetch
+
+    浏览器在第一次 fetch 时才启动；页面在请求之间复用，处理 recycle_after 个页面后连同上下文重建
+    """
+
+    def __init__(self, pages: int = 2, timeout: float = 30, recycle_after: int = 200,
+                 limiter: Optional[RateLimiter] = None, user_agent: Optional[str] = None,
+                 stage: str = 'step2'):
+        self.pages = max(1, pages)
+        self.timeout = timeout
+        self.recycle_after = max(1, recycle_after)
+        self.limiter = limiter or RateLimiter()
+        self.user_agent = user_agent
+        self.stage = f"{stage}_browser"
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._playwright = None
+        self._browser = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._idle = []   # 空闲的 [上下文, 页面, 已用次数]
+        self._launch_error: Optional[Exception] = None
+
+    @property
+    def available(self) -> bool:
+        """已安装 playwright 且浏览器没有启动失败过"""
+        return async_playwright is not None and self._launch_error is None
+
+    def fetch(self, url: str) -> bytes:
+        """用浏览器打开页面，返回渲染后的HTML字节；状态码 >= 400 时抛出 HTTPError"""
+        self._start()
+        # 浏览器的导航请求同样受按主机令牌桶限速
+        self.limiter.wait(url)
+        return asyncio.run_coroutine_threadsafe(self._fetch(url), self._loop).result()
+
+    def close(self):
+        """关闭浏览器和后台事件循环（未启动时什么都不做）"""
+        with self._lock:
+            if self._loop is None:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(self.timeout)
+            except Exception as e:
+                logger.warning(f"关闭浏览器时出错: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(self.timeout)
+            self._loop.close()
+            self._loop = self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            if self._launch_error is not None:
+                # 启动失败过就不再反复尝试，每个页面都重新启动浏览器代价太大
+                raise self._launch_error
+            if async_playwright is None:
+                raise ImportError("浏览器回退需要 playwright，请先执行: "
+                                  "pip install playwright && playwright install chromium")
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="browser-fetcher", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._launch(), loop).result()
+            except Exception as e:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                loop.close()
+                self._launch_error = e
+                logger.error(f"启动无头浏览器失败: {e}")
+                raise
+            self._loop, self._thread = loop, thread
+            logger.info(f"🌐 已启动无头浏览器（最多 {self.pages} 个页面）")
+
+    async def _launch(self):
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=True)
+        except Exception:
+            await self._playwright.stop()
+            raise
+        self._semaphore = asyncio.Semaphore(self.pages)
+        self._idle = []
+
+    async def _shutdown(self):
+        for context, _, _ in self._idle:
+            await context.close()
+        self._idle = []
+        await self._browser.close()
+        await self._playwright.stop()
+
+    async def _block_heavy(self, route):
+        """拦截图片、字体、媒体和广告请求，只加载文档和脚本"""
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or host.endswith(BLOCKED_HOSTS):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_slot(self):
+        options = {"user_agent": self.user_agent} if self.user_agent else {}
+        context = await self._browser.new_context(**options)
+        await context.route("**/*", self._block_heavy)
+        return [context, await context.new_page(), 0]
+
+    async def _fetch(self, url: str) -> bytes:
+        async with self._semaphore:
+            slot = self._idle.pop() if self._idle else await self._new_slot()
+            context, page, _ = slot
+            ok = False
+            started = time.perf_counter()
+            try:
+                response = await page.goto(url, timeout=self.timeout * 1000, wait_until="domcontentloaded")
+                status = response.status if response else 0
+                if status >= 400:
+                    metrics.inc(RESPONSES, stage=self.stage, status=status)
+                    metrics.inc(ERRORS, stage=self.stage, status=status)
+                    raise requests.HTTPError(f"{status} Error for url: {url}")
+                try:
+                    await page.wait_for_selector(READY_SELECTOR, state="attached", timeout=self.timeout * 1000)
+                except PlaywrightTimeoutError:
+                    pass
+                content = (await page.content()).encode('utf-8')
+                metrics.observe(FETCH_SECONDS, time.perf_counter() - started, stage=self.stage)
+                metrics.inc(RESPONSE_BYTES, len(content), stage=self.stage)
+                metrics.inc(RESPONSES, stage=self.stage, status=status)
+                ok = True
+                return content
+            finally:
+                slot[2] += 1
+                if ok and slot[2] < self.recycle_after:
+                    self._idle.append(slot)
+                else:
+                    await context.close()
+
+class TieredDetailScraper(DetailScraper):
+    """分级详情页爬虫：HTTP → 无头浏览器，输出与 DetailScraper 完全相同的 DetailedGameInfo
+
+    HTTP页面走 __NEXT_DATA__/script 路径就算成功；两者都拿不到游戏数据（只能走选择器回退）时
+    认为页面需要执行JS，改用浏览器渲染后再解析一次
+    """
+
+    def __init__(self, max_workers: int = 5, cache: Optional[HttpCache] = None,
+                 parser: Optional[HtmlParserBackend] = None, limiter: Optional[RateLimiter] = None,
+                 parse_processes: int = 0, base_url: str = DEFAULT_BASE_URL,
+                 browser_pages: int = 2, browser_timeout: float = 30, browser_recycle_after: int = 200,
+                 tiers: Optional[TierMemory] = None):
+        if parse_processes > 0:
+            # 是否升级要看解析结果，解析必须留在下载线程里
+            logger.warning("分级抓取需要在下载线程中解析，忽略 parse_processes 设置")
+        super().__init__(max_workers=max_workers, cache=cache, parser=parser, limiter=limiter,
+                         parse_processes=0, base_url=base_url)
+        self.browser = BrowserFetcher(pages=browser_pages, timeout=browser_timeout,
+                                      recycle_after=browser_recycle_after, limiter=self.limiter,
+                                      user_agent=self.session.headers.get('User-Agent'), stage=self.stage)
+        self.tiers = tiers or TierMemory()
+        if not self.browser.available:
+            logger.warning("未安装 playwright，需要浏览器的页面只能使用选择器回退的结果")
+
+    @classmethod
+    def from_config(cls, config: dict, cache: Optional[HttpCache] = None,
+                    parser: Optional[HtmlParserBackend] = None,
+                    limiter: Optional[RateLimiter] = None) -> 'TieredDetailScraper':
+        """根据 config.json 的 scraper 和 browser 段创建"""
+        scraper_config = config.get('scraper', {})
+        browser_config = config.get('browser', {})
+        return cls(max_workers=scraper_config.get('max_workers', 5), cache=cache, parser=parser,
+                   limiter=limiter or RateLimiter.from_config(config),
+                   base_url=scraper_config.get('base_url', DEFAULT_BASE_URL),
+                   browser_pages=browser_config.get('pages', 2),
+                   browser_timeout=browser_config.get('timeout', 30),
+                   browser_recycle_after=browser_config.get('recycle_after', 200),
+                   tiers=TierMemory(state_file=browser_config.get('tier_state_file', 'tier_state.json'),
+                                    escalate_after=browser_config.get('escalate_after', 3),
+                                    probe_every=browser_config.get('probe_every', 25)))
+
+    @contextmanager
+    def _parse_stage(self):
+        """不启用解析进程池；每次爬取结束后关闭浏览器并保存学到的抓取级别"""
+        try:
+            yield None
+        finally:
+            self.browser.close()
+            self.tiers.save()
+            self.tiers.log_summary()
+
+    def _fetch_and_parse(self, url: str) -> DetailedGameInfo:
+        """先按记住的级别抓取；HTTP拿不到游戏数据时升级到浏览器，首选的浏览器出错时降级到HTTP"""
+        fallback = None
+        if not self.browser.available or self.tiers.choose(url) == HTTP:
+            game_info, found = self._fetch_http(url)
+            if found or not self.browser.available:
+                return game_info
+            logger.info(f"🔼 {url} 的HTML中没有游戏数据，改用浏览器抓取")
+            fallback = game_info
+
+        try:
+            content = self.browser.fetch(url)
+        except Exception as e:
+            metrics.inc(FETCH_TIERS, stage=self.stage, tier=BROWSER, result='error')
+            if fallback is not None:
+                # 浏览器不可用（例如未安装Chromium）时保留HTTP选择器回退的结果
+                logger.warning(f"浏览器抓取 {url} 失败，使用选择器回退的结果: {e}")
+                return fallback
+            # 首选浏览器但浏览器出错：这个URL改用HTTP，一个坏掉的浏览器会话不会让整个主机的URL都失败
+            self.tiers.record_browser_error(url)
+            logger.warning(f"浏览器抓取 {url} 失败，改用HTTP抓取: {e}")
+            game_info, _ = self._fetch_http(url)
+            return game_info
+        game_info, parse_path, seconds = self._timed_parse(content, url)
+        self._record_parse(f"browser_{parse_path}", seconds)
+        self.tiers.record(url, BROWSER, parse_path != 'fallback')
+        metrics.inc(FETCH_TIERS, stage=self.stage, tier=BROWSER,
+                    result='ok' if parse_path != 'fallback' else 'fallback')
+        return game_info
+
+    def _fetch_http(self, url: str) -> Tuple[DetailedGameInfo, bool]:
+        """HTTP抓取并解析，返回 (游戏信息, HTML中是否有游戏数据)，结果计入抓取级别"""
+        game_info, parse_path, seconds = self._timed_parse(self._fetch_content(url), url)
+        self._record_parse(parse_path, seconds)
+        found = parse_path != 'fallback'
+        self.tiers.record(url, HTTP, found)
+        metrics.inc(FETCH_TIERS, stage=self.stage, tier=HTTP, result='ok' if found else 'escalated')
+        return game_info, found
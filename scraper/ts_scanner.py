@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gamesData.ts 的单遍扫描：一个只认识字符串、模板字符串、注释、标识符、数字和括号的小型 TS/JS 词法分析器
+一次线性扫描同时完成三件事：找到 export const games 声明的准确位置（字符串/模板字符串/注释中的 `];` 不会干扰）、
+把现有记录解码为字典（普通数组和紧凑编码的 decodeGames({...}) 都支持）、收集结构校验需要的统计
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from game_codec import decode_games
+
+# 一次匹配一个词法单元；未闭合的字符串和块注释落到最后的单字符分支，由 TsScanner 报错
+TOKEN = re.compile(r'''\s*(?:
+    (?P<comment>//[^\n]*|/\*[\s\S]*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\[\s\S])*"|'(?:[^'\\\n]|\\[\s\S])*')
+  | (?P<name>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<number>(?:0[xX][0-9a-fA-F_]+|(?:\d[\d_]*(?:\.[\d_]*)?|\.\d[\d_]*)(?:[eE][+-]?\d+)?)n?)
+  | (?P<template>`)
+  | (?P<punct>[\s\S])
+  | $)''', re.VERBOSE)
+TEMPLATE_BODY = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+LINE_TERMINATORS = '\n\u2028\u2029'
+OPENERS = {'(': ')', '[': ']', '{': '}'}
+CLOSERS = {')', ']', '}'}
+SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+
+class TsSyntaxError(ValueError):
+    """扫描时发现的语法错误（未闭合的字符串/注释、括号不匹配等）"""
+
+@dataclass(slots=True)
+class Token:
+    """一个词法单元；字符串和模板字符串的 value 是转义处理后的内容"""
+    kind: str      # name / number / string / template / punct
+    value: str
+    start: int
+    end: int
+    substitution: bool = False   # 模板字符串中含有 ${...}
+
+@dataclass
+class GamesDataScan:
+    """一次扫描的结果"""
+    span: Optional[Tuple[int, int]] = None          # games 声明（含结尾分号）在文本中的位置
+    games: Optional[List[Dict[str, Any]]] = None    # 解码后的现有记录，无法解码时为 None
+    encoded: bool = False                           # games 是否为紧凑编码 decodeGames({...})
+    games_declarations: int = 0
+    game_interfaces: int = 0
+    errors: List[str] = field(default_factory=list)
+
+def _unescape(text: str, start: int, end: int) -> str:
+    """处理字符串/模板字符串 text[start:end] 中的转义序列"""
+    if '\\' not in text[start:end]:
+        return text[start:end]
+    out = []
+    i = start
+    while i < end:
+        ch = text[i]
+        if ch != '\\':
+            out.append(ch)
+            i += 1
+            continue
+        nxt = text[i + 1]
+        if nxt in SIMPLE_ESCAPES and not (nxt == '0' and text[i + 2:i + 3].isdigit()):
+            out.append(SIMPLE_ESCAPES[nxt])
+            i += 2
+        elif nxt == 'x':
+            out.append(chr(int(text[i + 2:i + 4], 16)))
+            i += 4
+        elif nxt == 'u' and text[i + 2] == '{':
+            close = text.index('}', i + 3)
+            out.append(chr(int(text[i + 3:close], 16)))
+            i = close + 1
+        elif nxt == 'u':
+            code = int(text[i + 2:i + 6], 16)
+            i += 6
+            # UTF-16 代理对
+            if 0xD800 <= code < 0xDC00 and text[i:i + 2] == '\\u':
+                low = int(text[i + 2:i + 6], 16)
+                if 0xDC00 <= low < 0xE000:
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    i += 6
+            out.append(chr(code))
+        elif nxt == '\r':
+            i += 3 if text[i + 2:i + 3] == '\n' else 2   # 续行
+        elif nxt in LINE_TERMINATORS:
+            i += 2
+        else:
+            out.append(nxt)
+            i += 2
+    return ''.join(out)
+
+class TsScanner:
+    """按顺序产生 Token，跳过空白和注释；每个字符只看一次"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def _template_end(self, i: int) -> Tuple[int, bool]:
+        """从反引号之后的位置 i 开始，返回 (闭反引号之后的位置, 是否含有 ${...})"""
+        text = self.text
+        substitution = False
+        while True:
+            i = TEMPLATE_BODY.match(text, i).end()
+            if text[i:i + 1] == '`':
+                return i + 1, substitution
+            if text[i:i + 2] != '${':
+                raise TsSyntaxError(f"第 {text.count(chr(10), 0, i) + 1} 行的模板字符串没有闭合")
+            substitution = True
+            i = self._expression_end(i + 2)
+
+    def _expression_end(self, i: int) -> int:
+        """跳过模板字符串中 ${ 之后的表达式，返回匹配的 } 之后的位置"""
+        depth = 0
+        for token in self._tokens(i):
+            if token.kind == 'punct' and token.value in OPENERS:
+                depth += 1
+            elif token.kind == 'punct' and token.value in CLOSERS:
+                if depth == 0:
+                    return token.end
+                depth -= 1
+        raise TsSyntaxError("模板字符串中的 ${ 没有闭合")
+
+    def tokens(self) -> Iterator[Token]:
+        return self._tokens(0)
+
+    def _tokens(self, i: int) -> Iterator[Token]:
+        text = self.text
+        n = len(text)
+        match = TOKEN.match
+        while i < n:
+            m = match(text, i)
+            kind = m.lastgroup
+            end = m.end()
+            if kind is None or kind == 'comment':
+                i = end
+                continue
+            i = m.start(kind)
+            if kind == 'string':
+                yield Token('string', _unescape(text, i + 1, end - 1), i, end)
+            elif kind == 'template':
+                end, substitution = self._template_end(end)
+                value = '' if substitution else _unescape(text, i + 1, end - 1)
+                yield Token('template', value, i, end, substitution)
+            elif kind == 'punct':
+                ch = text[i]
+                if ch in ('"', "'"):
+                    raise TsSyntaxError(f"第 {text.count(chr(10), 0, i) + 1} 行的字符串没有闭合")
+                if ch == '/' and text[i + 1:i + 2] == '*':
+                    raise TsSyntaxError(f"第 {text.count(chr(10), 0, i) + 1} 行的块注释没有闭合")
+                # 其余都按单字符标点处理（gamesData.ts 中不会出现正则字面量）
+                yield Token('punct', ch, i, end)
+            else:
+                yield Token(kind, m.group(kind), i, end)
+            i = end
+
+class _Stream:
+    """带前瞻的 Token 流，同时跟踪括号栈（不匹配时抛出 TsSyntaxError）"""
+
+    def __init__(self, tokens: Iterator[Token]):
+        self._tokens = tokens
+        self._peeked: deque = deque()
+        self.stack: List[Token] = []
+        self.last_end = 0
+
+    def peek(self, offset: int = 0) -> Optional[Token]:
+        if offset < len(self._peeked):
+            return self._peeked[offset]
+        while len(self._peeked) <= offset:
+            token = next(self._tokens, None)
+            if token is None:
+                return None
+            self._peeked.append(token)
+        return self._peeked[offset]
+
+    def next(self) -> Optional[Token]:
+        if self._peeked:
+            token = self._peeked.popleft()
+        else:
+            token = next(self._tokens, None)
+            if token is None:
+                return None
+        self.last_end = token.end
+        if token.kind == 'punct':
+            if token.value in OPENERS:
+                self.stack.append(token)
+            elif token.value in CLOSERS:
+                if not self.stack or OPENERS[self.stack[-1].value] != token.value:
+                    raise TsSyntaxError(f"位置 {token.start} 的 {token.value} 没有匹配的开括号")
+                self.stack.pop()
+        return token
+
+    def expect(self, kind: str, value: Optional[str] = None) -> Token:
+        token = self.next()
+        if token is None or token.kind != kind or (value is not None and token.value != value):
+            found = '文件结尾' if token is None else f"{token.value!r}（位置 {token.start}）"
+            raise TsSyntaxError(f"应为 {value or kind}，实际是 {found}")
+        return token
+
+    def matches(self, *values: str) -> bool:
+        """接下来的几个 Token 是否依次是这些标识符/标点"""
+        if len(values) == 1:
+            token = self._peeked[0] if self._peeked else self.peek()
+            return token is not None and token.value == values[0] and token.kind in ('name', 'punct')
+        for offset, value in enumerate(values):
+            token = self.peek(offset)
+            if token is None or token.kind not in ('name', 'punct') or token.value != value:
+                return False
+        return True
+
+def _parse_literal(stream: _Stream) -> Any:
+    """解析一个字面量：对象、数组、字符串、无插值的模板字符串、数字、true/false/null"""
+    token = stream.next()
+    if token is None:
+        raise TsSyntaxError("字面量不完整")
+    if token.kind == 'punct' and token.value == '{':
+        obj: Dict[str, Any] = {}
+        while not stream.matches('}'):
+            key = stream.next()
+            if key is None or key.kind not in ('name', 'string', 'number'):
+                raise TsSyntaxError(f"对象的键无法解析（位置 {key.start if key else '文件结尾'}）")
+            stream.expect('punct', ':')
+            obj[key.value] = _parse_literal(stream)
+            if not stream.matches('}'):
+                stream.expect('punct', ',')
+        stream.next()
+        return obj
+    if token.kind == 'punct' and token.value == '[':
+        items = []
+        while not stream.matches(']'):
+            items.append(_parse_literal(stream))
+            if not stream.matches(']'):
+                stream.expect('punct', ',')
+        stream.next()
+        return items
+    if token.kind == 'string' or (token.kind == 'template' and not token.substitution):
+        return token.value
+    if token.kind == 'punct' and token.value == '-':
+        return -_parse_literal(stream)
+    if token.kind == 'number':
+        raw = token.value.replace('_', '')
+        if raw.startswith(('0x', '0X')):
+            return int(raw, 16)
+        return float(raw) if any(c in raw for c in '.eE') else int(raw)
+    if token.kind == 'name' and token.value in ('true', 'false', 'null'):
+        return {'true': True, 'false': False, 'null': None}[token.value]
+    raise TsSyntaxError(f"位置 {token.start} 的 {token.value or token.kind} 不是字面量")
+
+def _parse_games_value(stream: _Stream) -> Tuple[List[Dict[str, Any]], bool]:
+    """解析 games 的值：数组字面量或 decodeGames({...})，返回 (记录, 是否为紧凑编码)"""
+    if stream.matches('decodeGames', '('):
+        stream.next()
+        stream.next()
+        data = _parse_literal(stream)
+        stream.expect('punct', ')')
+        try:
+            return decode_games(data), True
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            raise TsSyntaxError(f"紧凑编码的数据不完整: {e!r}")
+    value = _parse_literal(stream)
+    if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+        raise TsSyntaxError("games 不是对象数组")
+    return value, False
+
+def scan_games_data(text: str) -> GamesDataScan:
+    """单遍扫描 gamesData.ts：定位 games 声明并解码记录，同时统计声明数量、检查括号和字符串是否闭合"""
+    scan = GamesDataScan()
+    stream = _Stream(TsScanner(text).tokens())
+    try:
+        while stream.peek() is not None:
+            if not stream.stack and stream.matches('export', 'interface', 'Game'):
+                scan.game_interfaces += 1
+            if not stream.stack and stream.matches('export', 'const', 'games'):
+                _scan_games_declaration(stream, scan)
+                continue
+            stream.next()
+        if stream.stack:
+            opener = stream.stack[-1]
+            scan.errors.append(f"位置 {opener.start} 的 {opener.value} 没有闭合")
+    except TsSyntaxError as e:
+        scan.errors.append(str(e))
+    return scan
+
+def _scan_games_declaration(stream: _Stream, scan: GamesDataScan):
+    """export const games[: Game[]] = <值>;，第一个声明的位置和记录保存到 scan 中"""
+    start = stream.next().start
+    scan.games_declarations += 1
+    stream.expect('name', 'const')
+    stream.expect('name', 'games')
+    if stream.matches(':'):
+        stream.next()
+        stream.expect('name', 'Game')
+        stream.expect('punct', '[')
+        stream.expect('punct', ']')
+    stream.expect('punct', '=')
+
+    games: Optional[List[Dict[str, Any]]] = None
+    encoded = False
+    try:
+        games, encoded = _parse_games_value(stream)
+    except TsSyntaxError as e:
+        if scan.games_declarations == 1:
+            scan.errors.append(f"无法解码 games 数据: {e}")
+        # 不是字面量：跳到同一层的分号
+        while stream.peek() is not None and (stream.stack or not stream.matches(';')):
+            stream.next()
+
+    if stream.matches(';'):
+        stream.next()
+    if scan.games_declarations == 1:
+        scan.span = (start, stream.last_end)
+        scan.games = games
+        scan.encoded = encoded
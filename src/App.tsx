@@ -9,7 +9,7 @@ import { AuthProvider } from './contexts/AuthContext';
 import { ThemeProvider } from './themes/ThemeContext';
 import { I18nProvider } from './contexts/I18nContext';
 import { initGA, trackPageView } from './utils/analytics';
-import { games } from './data/gamesData';
+import { games, gameShards, loadAllGames } from './data/gamesData';
 import { initializeDefaultAdmin } from './data/userManager';
 import { initializeDefaultCommunity } from './data/communityManager';
 import { addWangzheArticle } from './data/articleManager';
@@ -66,8 +66,13 @@ const AppContent: React.FC = () => {
   const { loadGames } = useGameContext();
 
   useEffect(() => {
-    // 初始化游戏数据
+    // 初始化游戏数据：先用打包的首屏数据，分片输出时再在后台加载完整列表
     loadGames(games);
+    if (gameShards.length > 0) {
+      loadAllGames()
+        .then(loadGames)
+        .catch(error => console.error('加载完整游戏列表失败:', error));
+    }
     // 初始化默认管理员账户
     initializeDefaultAdmin();
     // 初始化默认社区数据
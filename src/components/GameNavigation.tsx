@@ -1,7 +1,7 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ChevronDown, Gamepad2, Star, Clock, Heart, Trophy } from 'lucide-react';
-import { games } from '../data/gamesData';
+import { useGameData } from '../hooks/useGameData';
 import { useI18n } from '../contexts/I18nContext';
 
 interface GameNavigationProps {
@@ -17,6 +17,7 @@ interface GameCategory {
 function GameNavigation({ onClose }: GameNavigationProps) {
   const navigate = useNavigate();
   const { t } = useI18n();
+  const { games } = useGameData();
   const [isOpen, setIsOpen] = useState(false);
   const [selectedCategory, setSelectedCategory] = useState<string | null>(null);
   const dropdownRef = useRef<HTMLDivElement>(null);
@@ -40,7 +41,7 @@ function GameNavigation({ onClose }: GameNavigationProps) {
 
   // 获取热门游戏（按评分排序）
   const getPopularGames = () => {
-    return games
+    return [...games]
       .sort((a, b) => (b.rating || 0) - (a.rating || 0))
       .slice(0, 6);
   };
@@ -1,7 +1,8 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Search, X, Clock, Gamepad2 } from 'lucide-react';
-import { games } from '../data/gamesData';
+import { gameIndex } from '../data/gamesData';
+import { useGameData } from '../hooks/useGameData';
 
 interface SearchBoxProps {
   onQueryChange?: (query: string) => void;
@@ -17,6 +18,7 @@ interface SearchResult {
 
 function SearchBox({ onQueryChange }: SearchBoxProps) {
   const navigate = useNavigate();
+  const { games } = useGameData();
   const [query, setQuery] = useState('');
   const [results, setResults] = useState<SearchResult[]>([]);
   const [selectedIndex, setSelectedIndex] = useState(0);
@@ -68,12 +70,27 @@ function SearchBox({ onQueryChange }: SearchBoxProps) {
       }
     });
 
+    // 分片输出时完整列表还在后台加载，尚未加载的游戏先按索引中的标题和分类搜索
+    const loadedIds = new Set(games.map(game => game.id));
+    gameIndex.forEach(summary => {
+      if (
+        !loadedIds.has(summary.id) &&
+        (summary.title.toLowerCase().includes(searchTerm) || summary.category.toLowerCase().includes(searchTerm))
+      ) {
+        searchResults.push({
+          id: summary.id,
+          title: summary.title,
+          type: 'game',
+          category: summary.category
+        });
+      }
+    });
 
     setResults(searchResults.slice(0, 8)); // 限制结果数量
     setSelectedIndex(0);
     setShowResults(true);
     onQueryChange?.(query);
-  }, [query, onQueryChange]);
+  }, [query, onQueryChange, games]);
 
   // 键盘导航
   const handleKeyDown = (e: React.KeyboardEvent) => {
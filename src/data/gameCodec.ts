@@ -0,0 +1,87 @@
+import type { Game } from './gamesData';
+
+// 紧凑编码的游戏数据（由 scraper/game_codec.py 生成）：
+// iframe 只保存地址，controls 和 features 放在共享表中按下标引用，
+// 标准封面图只保存路径（cover），等于默认值的字段省略（favorites 默认等于 likes）
+type GameControl = Game['controls'][number];
+
+export interface EncodedGame {
+  id: number;
+  slug?: string;
+  title: string;
+  image?: string;
+  cover?: string;
+  description?: string;
+  features?: number[];
+  isNew?: boolean;
+  src?: string;
+  iframe?: string;
+  controls?: number;
+  category?: string;
+  playCount?: number;
+  likes?: number;
+  favorites?: number;
+  duration?: string;
+  addedAt?: string;
+}
+
+export interface EncodedGames {
+  features: string[];
+  controls: GameControl[][];
+  games: EncodedGame[];
+}
+
+const BLANK_IFRAME_SRC = 'about:blank';
+const COVER_PREFIX = 'https://imgs.crazygames.com/';
+const COVER_SUFFIX = '?metadata=none&quality=85&width=273&fit=crop';
+
+const DEFAULTS = {
+  image: '',
+  description: 'A fun and exciting online game!',
+  isNew: true,
+  category: 'other',
+  playCount: 0,
+  likes: 0,
+  duration: '5-10 分钟',
+};
+
+export function iframeHtml(src: string): string {
+  if (src === BLANK_IFRAME_SRC) {
+    return `<iframe src="${src}" style="width: 100%; height: 100%;" frameborder="0"></iframe>`;
+  }
+  return `<iframe src="${src}" style="width: 100%; height: 100%;" frameborder="0" allow="gamepad *;"></iframe>`;
+}
+
+function defaultIframeSrc(slug?: string): string {
+  return slug ? `https://games.crazygames.com/en_US/${slug}/index.html` : BLANK_IFRAME_SRC;
+}
+
+export function decodeGame(record: EncodedGame, tables: Omit<EncodedGames, 'games'>): Game {
+  const likes = record.likes ?? DEFAULTS.likes;
+  const game: Game = {
+    id: record.id,
+    title: record.title,
+    image: record.cover !== undefined ? COVER_PREFIX + record.cover + COVER_SUFFIX : record.image ?? DEFAULTS.image,
+    description: record.description ?? DEFAULTS.description,
+    features: (record.features ?? []).map(index => tables.features[index]),
+    isNew: record.isNew ?? DEFAULTS.isNew,
+    iframe: record.iframe ?? iframeHtml(record.src ?? defaultIframeSrc(record.slug)),
+    controls: record.controls === undefined ? [] : tables.controls[record.controls],
+    category: record.category ?? DEFAULTS.category,
+    playCount: record.playCount ?? DEFAULTS.playCount,
+    likes,
+    favorites: record.favorites ?? likes,
+    duration: record.duration ?? DEFAULTS.duration,
+  };
+  if (record.slug) {
+    game.slug = record.slug;
+  }
+  if (record.addedAt) {
+    game.addedAt = record.addedAt;
+  }
+  return game;
+}
+
+export function decodeGames(data: EncodedGames): Game[] {
+  return data.games.map(record => decodeGame(record, data));
+}
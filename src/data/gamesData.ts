@@ -1,5 +1,9 @@
+import { decodeGames, type EncodedGames } from './gameCodec';
+import { gameIndex, gameShards } from './gamesManifest';
+
 export interface Game {
   id: number;
+  slug?: string;
   title: string;
   image: string;
   description: string;
@@ -15,6 +19,51 @@ export interface Game {
   addedAt?: string;
 }
 
+// 分片输出（modular_data_updater.py --shards）：gameIndex 是全部游戏的摘要，
+// 完整数据按分类存放在 /game-data/ 下带内容哈希的分片中（--compact 时为紧凑编码），按需加载
+export { gameIndex, gameShards };
+export type { GameShard, GameSummary } from './gamesManifest';
+
+const shardCache = new Map<string, Promise<Game[]>>();
+
+export function loadGameShard(file: string): Promise<Game[]> {
+  let shard = shardCache.get(file);
+  if (!shard) {
+    shard = fetch(`/game-data/${file}`).then(response => {
+      if (!response.ok) {
+        throw new Error(`加载游戏数据分片失败: ${file} (${response.status})`);
+      }
+      return response.json() as Promise<Game[] | EncodedGames>;
+    }).then(data => (Array.isArray(data) ? data : decodeGames(data)));
+    shard.catch(() => shardCache.delete(file));
+    shardCache.set(file, shard);
+  }
+  return shard;
+}
+
+export async function loadCategoryGames(category: string): Promise<Game[]> {
+  const files = gameShards.filter(shard => shard.category === category).map(shard => shard.file);
+  return (await Promise.all(files.map(loadGameShard))).flat();
+}
+
+export async function loadGame(id: number): Promise<Game | undefined> {
+  const summary = gameIndex.find(game => game.id === id);
+  if (!summary) {
+    return undefined;
+  }
+  const shard = await loadGameShard(gameShards[summary.shard].file);
+  return shard.find(game => game.id === id);
+}
+
+// 完整的游戏列表：分片输出时 games 只有首屏的部分，需要加载全部分片；否则就是 games
+export async function loadAllGames(): Promise<Game[]> {
+  if (gameShards.length === 0) {
+    return games;
+  }
+  const all = (await Promise.all(gameShards.map(shard => loadGameShard(shard.file)))).flat();
+  return all.sort((a, b) => a.id - b.id);
+}
+
 export const games: Game[] = [
   {
     id: 1,
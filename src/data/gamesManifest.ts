@@ -0,0 +1,19 @@
+// 由 scraper/modular_data_updater.py --shards 生成，请勿手动修改
+export interface GameShard {
+  file: string;
+  category: string;
+  count: number;
+}
+
+export interface GameSummary {
+  id: number;
+  slug: string;
+  title: string;
+  image: string;
+  category: string;
+  shard: number;
+}
+
+export const gameShards: GameShard[] = [];
+
+export const gameIndex: GameSummary[] = [];
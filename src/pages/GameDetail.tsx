@@ -5,6 +5,8 @@ import GameCard from '../components/GameCard';
 import Breadcrumb, { GameCategoryBreadcrumb } from '../components/Breadcrumb';
 import ErrorBoundary, { GameErrorBoundary } from '../components/ErrorBoundary';
 import SEOHead from '../components/SEOHead';
+import LoadingSpinner from '../components/common/LoadingSpinner';
+import { Game, gameIndex, loadGame } from '../data/gamesData';
 import { useGameData, useGameActions, useGameFavorites } from '../hooks/useGameData';
 import { useI18n } from '../contexts/I18nContext';
 
@@ -19,7 +21,32 @@ const GameDetail: React.FC = () => {
   const { updateGameLikes } = useGameActions();
   const { isFavorite, toggleFavorite } = useGameFavorites();
 
-  const game = filteredGames.find(g => g.id === parseInt(id || '0'));
+  const gameId = parseInt(id || '0');
+  // 分片输出时打包的数据只有首屏游戏，直接打开其他游戏的链接时从分片中加载
+  const [shardLookup, setShardLookup] = useState<{ id: number; game?: Game }>();
+  const inIndex = gameIndex.some(summary => summary.id === gameId);
+  const shardLoaded = shardLookup?.id === gameId;
+  const game = filteredGames.find(g => g.id === gameId) ?? (shardLoaded ? shardLookup?.game : undefined);
+
+  useEffect(() => {
+    if (!inIndex || filteredGames.some(g => g.id === gameId)) {
+      return;
+    }
+    let cancelled = false;
+    loadGame(gameId)
+      .catch(error => {
+        console.error('加载游戏数据失败:', error);
+        return undefined;
+      })
+      .then(found => {
+        if (!cancelled) {
+          setShardLookup({ id: gameId, game: found });
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [gameId, inIndex, filteredGames]);
 
   // 监听全屏状态变化
   useEffect(() => {
@@ -87,6 +114,14 @@ const GameDetail: React.FC = () => {
     }
   };
 
+  if (!game && inIndex && !shardLoaded) {
+    return (
+      <div className="min-h-screen bg-gray-900 text-white flex items-center justify-center">
+        <LoadingSpinner text="正在加载..." />
+      </div>
+    );
+  }
+
   if (!game) {
     return (
       <div className="min-h-screen bg-gray-900 text-white flex items-center justify-center">
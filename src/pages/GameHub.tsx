@@ -1,7 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import { Plus, User } from 'lucide-react';
-import { games, Game } from '../data/gamesData';
+import { Game } from '../data/gamesData';
+import { useGameData } from '../hooks/useGameData';
 import { Article, getAllArticlesSortedByTime, initializeSampleArticles } from '../data/databaseArticleManager';
 import UnifiedGameHubLayout from '../components/common/UnifiedGameHubLayout';
 import { useTheme } from '../themes/ThemeContext';
@@ -16,6 +17,7 @@ const GameHub: React.FC<GameHubProps> = () => {
   const { currentTheme } = useTheme();
   const { t } = useI18n();
   const { state: authState, getUserDisplayName } = useAuth();
+  const { games } = useGameData();
   const [searchQuery, setSearchQuery] = useState<string>('');
   const [selectedCategory, setSelectedCategory] = useState<string>('全部');
   const [sortBy, setSortBy] = useState<string>('最新');
@@ -66,8 +68,10 @@ const GameHub: React.FC<GameHubProps> = () => {
     };
 
     loadData();
+  }, []);
 
-    // 初始化游戏排行榜数据
+  // 游戏排行榜数据（分片输出时完整列表加载完成后重新计算）
+  useEffect(() => {
     const gameData: Game[] = games.map(game => ({
       ...game,
       category: game.category || '未分类',
@@ -80,7 +84,7 @@ const GameHub: React.FC<GameHubProps> = () => {
     // 最新游戏（模拟发布时间）- 只显示前10个
     const sortedNewGames = [...gameData].sort(() => Math.random() - 0.5).slice(0, 10);
     setNewGames(sortedNewGames);
-  }, []);
+  }, [games]);
 
   // 筛选和搜索逻辑
   useEffect(() => {